@@ -11,6 +11,7 @@ Tool Usage:
 - **Course content questions**: Use search_course_content for specific course materials
 - **Course outline questions**: Use get_course_outline for course structure, lesson lists, or course overviews
 - **Sequential tool calls**: You can make multiple tool calls across rounds to gather comprehensive information
+- **Several courses or lessons**: Search them in one search_course_content call with course_names and/or lesson_from/lesson_to
 - **Complex queries**: For multi-part questions or comparisons, gather information step by step
 - Synthesize results into accurate, fact-based responses
 - If tools yield no results, state this clearly without offering alternatives
@@ -54,7 +55,8 @@ Provide only the direct answer to what was asked.
     def generate_response(self, query: str,
                          conversation_history: Optional[str] = None,
                          tools: Optional[List] = None,
-                         tool_manager=None) -> str:
+                         tool_manager=None,
+                         tenant_id: Optional[str] = None) -> str:
         """
         Generate AI response with optional tool usage and conversation context.
         
@@ -63,6 +65,7 @@ Provide only the direct answer to what was asked.
             conversation_history: Previous messages for context
             tools: Available tools the AI can use
             tool_manager: Manager to execute tools
+            tenant_id: Tenant whose courses the tools search (None = default)
             
         Returns:
             Generated response as string
@@ -92,12 +95,13 @@ Provide only the direct answer to what was asked.
         
         # Handle tool execution if needed
         if response.stop_reason == "tool_use" and tool_manager:
-            return self._handle_sequential_tool_execution(response, api_params, tool_manager)
+            return self._handle_sequential_tool_execution(response, api_params, tool_manager, tenant_id=tenant_id)
         
         # Return direct response
         return response.content[0].text
     
-    def _handle_sequential_tool_execution(self, initial_response, base_params: Dict[str, Any], tool_manager, max_rounds: int = 2):
+    def _handle_sequential_tool_execution(self, initial_response, base_params: Dict[str, Any], tool_manager, max_rounds: int = 2,
+                                          tenant_id: Optional[str] = None):
         """
         Handle sequential tool execution across multiple API rounds.
         
@@ -106,6 +110,7 @@ Provide only the direct answer to what was asked.
             base_params: Base API parameters
             tool_manager: Manager to execute tools
             max_rounds: Maximum number of tool execution rounds
+            tenant_id: Tenant passed to every tool call
             
         Returns:
             Final response text after all tool execution rounds
@@ -131,10 +136,12 @@ Provide only the direct answer to what was asked.
                     if content_block.type == "tool_use":
                         try:
                             print(f"Round {round_num}: Executing tool {content_block.name}")
-                            tool_result = tool_manager.execute_tool(
-                                content_block.name, 
-                                **content_block.input
-                            )
+                            # The tenant comes from the request, never from the model
+                            tool_input = {key: value for key, value in content_block.input.items()
+                                          if key != "tenant_id"}
+                            if tenant_id is not None:
+                                tool_input["tenant_id"] = tenant_id
+                            tool_result = tool_manager.execute_tool(content_block.name, **tool_input)
                             print(f"Round {round_num}: Tool {content_block.name} executed successfully")
                             
                         except Exception as e:
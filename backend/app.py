@@ -5,13 +5,16 @@ from typing import Any, Dict, List, Optional, Union
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 from config import config
+from index_generations import validate_tenant_id
 from rag_system import RAGSystem
+from vector_store import SearchRequest
 
 warnings.filterwarnings(
     "ignore", message="resource_tracker: There appear to be.*"
@@ -41,6 +44,7 @@ class QueryRequest(BaseModel):
     """Request model for course queries"""
     query: str
     session_id: Optional[str] = None
+    tenant_id: Optional[str] = None
 
 class QueryResponse(BaseModel):
     """Response model for course queries"""
@@ -52,24 +56,77 @@ class CourseStats(BaseModel):
     """Response model for course statistics"""
     total_courses: int
     course_titles: List[str]
+    total_chunks: int = 0
+    course_stats: Dict[str, Dict[str, int]] = {}
 
 class CommandsResponse(BaseModel):
     """Response model for available commands"""
     commands: Dict[str, str]
 
+class SearchItem(BaseModel):
+    """One search in a batch search request"""
+    query: str
+    course_name: Optional[str] = None
+    lesson_number: Optional[int] = None
+    limit: Optional[int] = None
+    course_names: Optional[List[str]] = None
+    lesson_from: Optional[int] = None
+    lesson_to: Optional[int] = None
+
+class BatchSearchRequest(BaseModel):
+    """Request model for batch content search"""
+    searches: List[SearchItem]
+    tenant_id: Optional[str] = None
+
+class SearchResultItem(BaseModel):
+    """Results for one search in a batch"""
+    documents: List[str]
+    metadata: List[Dict[str, Any]]
+    distances: List[float]
+    error: Optional[str] = None
+
+class BatchSearchResponse(BaseModel):
+    """Response model for batch content search"""
+    results: List[SearchResultItem]
+
+def check_tenant(tenant_id: Optional[str]):
+    """Reject tenant ids that cannot name collections with a 400"""
+    if tenant_id is not None:
+        try:
+            validate_tenant_id(tenant_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+async def open_tenant(tenant_id: Optional[str]):
+    """
+    Store of an existing tenant: invalid ids get a 400 and tenants with no
+    courses a 404, so requests never create collections for a tenant
+    """
+    check_tenant(tenant_id)
+    store = rag_system.vector_store
+    try:
+        return await store.async_pool.run(store.for_tenant, tenant_id, False)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 # API Endpoints
 
 @app.post("/api/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     """Process a query and return response with sources"""
+    await open_tenant(request.tenant_id)
     try:
         # Create session if not provided
         session_id = request.session_id
         if not session_id:
-            session_id = rag_system.session_manager.create_session()
+            session_id = rag_system.session_manager.create_session(tenant_id=request.tenant_id)
         
-        # Process query using RAG system
-        answer, sources = rag_system.query(request.query, session_id)
+        # Process query using RAG system, off the event loop. The blocking
+        # Anthropic call runs on the server's threadpool so it never holds
+        # the vector store's search threads.
+        answer, sources = await run_in_threadpool(
+            rag_system.query, request.query, session_id, tenant_id=request.tenant_id
+        )
         
         return QueryResponse(
             answer=answer, sources=sources, session_id=session_id
@@ -80,23 +137,47 @@ async def query_documents(request: QueryRequest):
         print(f"Full traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/search/batch", response_model=BatchSearchResponse)
+async def batch_search(request: BatchSearchRequest):
+    """Run several content searches with shared embedding and Chroma calls"""
+    store = await open_tenant(request.tenant_id)
+    try:
+        results = await store.asearch_many([
+            SearchRequest(**item.model_dump()) for item in request.searches
+        ])
+        return BatchSearchResponse(results=[
+            SearchResultItem(
+                documents=result.documents,
+                metadata=result.metadata,
+                distances=result.distances,
+                error=result.error,
+            )
+            for result in results
+        ])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/courses", response_model=CourseStats)
-async def get_course_stats():
+async def get_course_stats(tenant_id: Optional[str] = None):
     """Get course analytics and statistics"""
+    await open_tenant(tenant_id)
     try:
-        analytics = rag_system.get_course_analytics()
+        analytics = await rag_system.vector_store.async_pool.run(rag_system.get_course_analytics, tenant_id)
         return CourseStats(
             total_courses=analytics["total_courses"],
             course_titles=analytics["course_titles"],
+            total_chunks=analytics.get("total_chunks", 0),
+            course_stats=analytics.get("course_stats", {}),
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/new-session")
-async def create_new_session():
+async def create_new_session(tenant_id: Optional[str] = None):
     """Create a new chat session"""
+    await open_tenant(tenant_id)
     try:
-        session_id = rag_system.session_manager.create_session()
+        session_id = rag_system.session_manager.create_session(tenant_id=tenant_id)
         return {"session_id": session_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -110,9 +191,20 @@ async def get_available_commands():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Report whether the embedding model and vector store are warm"""
+    store = rag_system.vector_store
+    ready = store.is_ready()
+    body = {"ready": ready, "async_pool": store.async_stats()}
+    if store.warm_up_error:
+        body["error"] = store.warm_up_error
+    return JSONResponse(content=body, status_code=200 if ready else 503)
+
 @app.on_event("startup")
 async def startup_event():
-    """Load initial documents on startup"""
+    """Start model warm-up and load initial documents on startup"""
+    rag_system.vector_store.start_warm_up()
     docs_path = "../docs"
     if os.path.exists(docs_path):
         print("Loading initial documents...")
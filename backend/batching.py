@@ -0,0 +1,182 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects items submitted concurrently from many threads and processes
+    them together.
+
+    The first item of a batch waits at most `max_wait_ms` for company; the
+    batch is flushed early once it reaches `max_batch_size`. `process_batch`
+    must return one result per item, in order. If it raises, every caller
+    in that batch receives the exception.
+    """
+
+    def __init__(self, process_batch: Callable[[List[T]], List[R]],
+                 max_wait_ms: float = 2.0, max_batch_size: int = 64,
+                 name: str = "micro-batcher"):
+        self.process_batch = process_batch
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+        self.name = name
+        self._queue: "queue.Queue[Optional[Tuple[T, Future]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: T) -> R:
+        """Queue an item and block until its result is available"""
+        return self.submit_async(item).result()
+
+    def submit_async(self, item: T) -> Future:
+        """Queue an item and return a Future for its result"""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self):
+        """Stop the worker thread after it drains queued items"""
+        with self._lock:
+            if self._worker is not None:
+                self._queue.put(None)
+                self._worker.join()
+                self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batch count and average batch size"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "queued": self._queue.qsize()
+        }
+
+    def _ensure_worker(self):
+        """Start the worker thread on first use"""
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._worker.start()
+
+    def _collect(self, first: Tuple[T, Future]) -> Tuple[List[Tuple[T, Future]], bool]:
+        """Gather items until the wait window closes or the batch is full"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        """Worker loop: collect a batch, process it, resolve futures"""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            items = [item for item, _ in batch]
+            try:
+                results = self.process_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name}: expected {len(items)} results, got {len(results)}"
+                    )
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            self.items += len(items)
+            if stop:
+                return
+
+
+class WorkerPool:
+    """
+    Fixed-size thread pool that runs blocking calls for async callers, so
+    the event loop thread never waits on Chroma or the embedding model.
+
+    Calls beyond `max_workers` wait in the pool's queue; its current and
+    peak depth, and the time calls spend waiting, are reported by stats().
+    """
+
+    def __init__(self, max_workers: int = 8, name: str = "worker-pool"):
+        self.max_workers = max_workers
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queued = 0
+        self._wait_seconds = 0.0
+
+    async def run(self, fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        """Run fn(*args, **kwargs) on a pool thread and await its result"""
+        submitted = time.monotonic()
+
+        def call():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self._wait_seconds += time.monotonic() - submitted
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        future = self._executor.submit(call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A call cancelled before it started never runs, so leaves the queue here
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Get worker count, queue depth and average queue wait"""
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": self._wait_seconds * 1000.0 / started if started else 0.0,
+            }
+
+    def close(self):
+        """Stop accepting calls and let running ones finish"""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Benchmark content search backends (Chroma HNSW, exact NumPy, IVF, quantized) on the same data"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+from search_backends import SEARCH_BACKENDS, create_search_backend
+
+
+def random_vectors(rng, count: int, dimension: int, centres=None):
+    """Random unit vectors, scattered around the given centres if any"""
+    if centres is None:
+        vectors = rng.normal(size=(count, dimension))
+    else:
+        vectors = centres[rng.integers(len(centres), size=count)] + rng.normal(scale=0.5, size=(count, dimension))
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_collection(path: str, chunks: int, dimension: int, courses: int, lessons: int,
+                     rng, centres=None):
+    """Fill a fresh content collection with random unit vectors"""
+    client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_or_create_collection("course_content")
+    batch = 5000
+    for start in range(0, chunks, batch):
+        count = min(batch, chunks - start)
+        vectors = random_vectors(rng, count, dimension, centres)
+        collection.add(
+            ids=[f"chunk_{start + i}" for i in range(count)],
+            embeddings=vectors,
+            documents=[f"chunk {start + i}" for i in range(count)],
+            metadatas=[{
+                "course_title": f"Course {(start + i) % courses}",
+                "lesson_number": (start + i) // courses % lessons,
+                "chunk_index": start + i
+            } for i in range(count)]
+        )
+    return collection
+
+
+def percentile(samples, value):
+    return float(np.percentile(samples, value)) * 1000
+
+
+def run(backend, queries, n_results, where):
+    """Time each query separately; returns (latencies in seconds, result ids)"""
+    latencies = []
+    ids = []
+    for query in queries:
+        start = time.perf_counter()
+        results = backend.query([query], n_results=n_results, where=where)
+        latencies.append(time.perf_counter() - start)
+        ids.append(results["ids"][0])
+    return latencies, ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--lessons", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--oversample", type=int, nargs=2, default=[4, 10], metavar=("INT8", "BINARY"),
+                        help="Quantized candidates rescored per result")
+    parser.add_argument("--clusters", type=int, default=0,
+                        help="Draw vectors around this many topic centres (0 = uniform)")
+    parser.add_argument("--ivf-lists", type=int, default=0, help="IVF partitions (0 = about sqrt(chunks))")
+    parser.add_argument("--ivf-nprobe", type=int, nargs="+", default=[1, 4, 8, 16],
+                        help="IVF nprobe values to compare")
+    args = parser.parse_args()
+
+    path = tempfile.mkdtemp(prefix="search-benchmark-")
+    try:
+        print(f"Building {args.chunks} x {args.dimension} collection...")
+        rng = np.random.default_rng(args.seed)
+        centres = rng.normal(scale=0.2, size=(args.clusters, args.dimension)) if args.clusters else None
+        collection = build_collection(path, args.chunks, args.dimension, args.courses, args.lessons, rng, centres)
+        queries = random_vectors(rng, args.queries, args.dimension, centres).tolist()
+
+        # name -> (backend, nprobe); the IVF index is trained once and probed at each nprobe
+        backends = {name: (create_search_backend(name, collection), None)
+                    for name in SEARCH_BACKENDS if name not in ("ivf", "quantized")}
+        ivf = create_search_backend("ivf", collection, n_lists=args.ivf_lists)
+        for nprobe in args.ivf_nprobe:
+            backends[f"ivf/{nprobe}"] = (ivf, nprobe)
+        for mode, oversample in zip(("int8", "binary"), args.oversample):
+            backends[mode] = (create_search_backend("quantized", collection, mode=mode, oversample=oversample,
+                                                    vectors_path=os.path.join(path, f"{mode}.f32")), None)
+        for backend, _ in backends.values():
+            backend.query(queries[:1], n_results=args.k)  # load indexes
+
+        scenarios = {
+            "unfiltered": None,
+            "course": {"course_title": "Course 1"},
+            "course+lesson": {"$and": [{"course_title": "Course 1"}, {"lesson_number": 2}]},
+        }
+        print(f"{'scenario':<15}{'backend':<10}{'p50 ms':>10}{'p99 ms':>10}{'qps':>10}{'recall@k':>10}")
+        for scenario, where in scenarios.items():
+            _, exact = run(backends["numpy"][0], queries, args.k, where)
+            for name, (backend, nprobe) in backends.items():
+                if nprobe is not None:
+                    backend.nprobe = nprobe
+                latencies, ids = run(backend, queries, args.k, where)
+                recall = np.mean([len(set(got) & set(want)) / max(len(want), 1)
+                                  for got, want in zip(ids, exact)])
+                print(f"{scenario:<15}{name:<10}{percentile(latencies, 50):>10.2f}"
+                      f"{percentile(latencies, 99):>10.2f}{len(latencies) / sum(latencies):>10.0f}{recall:>10.3f}")
+        for mode in ("int8", "binary"):
+            print(f"{mode} memory: {backends[mode][0].index.memory_stats()}")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import json
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class CatalogSnapshot:
+    """
+    Parsed, dict-indexed copy of the course catalog.
+
+    Chroma stores each course's lessons as a JSON string; this keeps them
+    parsed and indexed by (course title, lesson number) so link and outline
+    lookups are dictionary reads. Writers build new indexes and swap them
+    in, so readers never need a lock.
+    """
+
+    def __init__(self, metadatas: Optional[List[Dict[str, Any]]] = None):
+        self._write_lock = threading.Lock()
+        self._courses: Dict[str, Dict[str, Any]] = {}
+        self._lessons: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        if metadatas:
+            self.load(metadatas)
+
+    @staticmethod
+    def _parse(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a raw catalog metadata record into a course dict with a lessons list"""
+        course = dict(metadata)
+        course["lessons"] = json.loads(course.pop("lessons_json", None) or "[]")
+        return course
+
+    @staticmethod
+    def _index_lessons(course: Dict[str, Any]) -> Dict[Tuple[str, int], Dict[str, Any]]:
+        """Build (title, lesson number) -> lesson entries for one course"""
+        return {
+            (course["title"], lesson.get("lesson_number")): lesson
+            for lesson in course["lessons"]
+        }
+
+    def load(self, metadatas: List[Dict[str, Any]]):
+        """Replace the snapshot with the given raw catalog metadata records"""
+        courses = {}
+        lessons = {}
+        for metadata in metadatas:
+            course = self._parse(metadata)
+            courses[course["title"]] = course
+            lessons.update(self._index_lessons(course))
+        with self._write_lock:
+            self._courses, self._lessons = courses, lessons
+
+    def upsert_course(self, metadata: Dict[str, Any]):
+        """Add or replace one course from its raw catalog metadata"""
+        course = self._parse(metadata)
+        title = course["title"]
+        with self._write_lock:
+            courses = dict(self._courses)
+            courses[title] = course
+            lessons = {key: value for key, value in self._lessons.items() if key[0] != title}
+            lessons.update(self._index_lessons(course))
+            self._courses, self._lessons = courses, lessons
+
+    def remove_course(self, title: str):
+        """Drop one course"""
+        with self._write_lock:
+            courses = {key: value for key, value in self._courses.items() if key != title}
+            lessons = {key: value for key, value in self._lessons.items() if key[0] != title}
+            self._courses, self._lessons = courses, lessons
+
+    def clear(self):
+        """Drop all courses"""
+        with self._write_lock:
+            self._courses, self._lessons = {}, {}
+
+    def __len__(self) -> int:
+        return len(self._courses)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._courses
+
+    def titles(self) -> List[str]:
+        """All course titles"""
+        return list(self._courses)
+
+    def course(self, title: str) -> Optional[Dict[str, Any]]:
+        """Parsed course metadata (with lessons list), or None"""
+        course = self._courses.get(title)
+        if course is None:
+            return None
+        return {**course, "lessons": [dict(lesson) for lesson in course["lessons"]]}
+
+    def all_courses(self) -> List[Dict[str, Any]]:
+        """Parsed metadata for every course"""
+        return [self.course(title) for title in list(self._courses)]
+
+    def lesson_count(self, title: str) -> Optional[int]:
+        """Number of lessons in a course's outline, or None"""
+        course = self._courses.get(title)
+        return len(course["lessons"]) if course else None
+
+    def course_link(self, title: str) -> Optional[str]:
+        """Course link, or None"""
+        course = self._courses.get(title)
+        return course.get("course_link") if course else None
+
+    def lesson(self, title: str, lesson_number: int) -> Optional[Dict[str, Any]]:
+        """Lesson entry (number, title, link), or None"""
+        lesson = self._lessons.get((title, lesson_number))
+        return dict(lesson) if lesson else None
+
+    def lesson_link(self, title: str, lesson_number: int) -> Optional[str]:
+        """Lesson link, or None"""
+        lesson = self._lessons.get((title, lesson_number))
+        return lesson.get("lesson_link") if lesson else None
+
+
+class ContentStats:
+    """
+    Per-course chunk counts for the content collection.
+
+    Chunk IDs are kept per course so re-added chunks (which Chroma ignores)
+    are not double counted. Counts are read from the collection's metadata
+    once and then maintained on every write, so lookups never touch Chroma
+    (VectorStore.revalidate reloads them after writes by other processes).
+    """
+
+    def __init__(self, ids: Optional[List[str]] = None,
+                 metadatas: Optional[List[Dict[str, Any]]] = None):
+        self._write_lock = threading.Lock()
+        self._chunk_ids: Dict[str, Set[str]] = {}
+        self._lessons: Dict[str, Set[int]] = {}
+        if ids:
+            self.add(ids, metadatas)
+
+    def add(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """Record chunks written to the content collection"""
+        records = [(doc_id, metadata) for doc_id, metadata in zip(ids, metadatas)
+                   if metadata.get("course_title") is not None]
+        touched = {metadata["course_title"] for _, metadata in records}
+        with self._write_lock:
+            # Copy only the touched courses' sets; readers keep the old ones
+            chunk_ids = {**self._chunk_ids, **{title: set(self._chunk_ids.get(title, ())) for title in touched}}
+            lessons = {**self._lessons, **{title: set(self._lessons.get(title, ())) for title in touched}}
+            for doc_id, metadata in records:
+                chunk_ids[metadata["course_title"]].add(doc_id)
+                if metadata.get("lesson_number") is not None:
+                    lessons[metadata["course_title"]].add(metadata["lesson_number"])
+            self._chunk_ids, self._lessons = chunk_ids, lessons
+
+    def remove_course(self, title: str):
+        """Drop one course's counts"""
+        with self._write_lock:
+            self._chunk_ids = {key: value for key, value in self._chunk_ids.items() if key != title}
+            self._lessons = {key: value for key, value in self._lessons.items() if key != title}
+
+    def clear(self):
+        """Drop all counts"""
+        with self._write_lock:
+            self._chunk_ids, self._lessons = {}, {}
+
+    def chunk_count(self, title: Optional[str] = None) -> int:
+        """Chunks stored for one course, or for all courses"""
+        if title is not None:
+            return len(self._chunk_ids.get(title, ()))
+        return sum(len(ids) for ids in list(self._chunk_ids.values()))
+
+    def lesson_count(self, title: str) -> int:
+        """Distinct lessons with stored chunks for one course"""
+        return len(self._lessons.get(title, ()))
+
+    def titles(self) -> List[str]:
+        """Courses with stored chunks"""
+        return list(self._chunk_ids)
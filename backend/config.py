@@ -14,15 +14,96 @@ class Config:
     
     # Embedding model settings
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_PROVIDER: str = os.getenv("EMBEDDING_PROVIDER", "sentence-transformers")  # or "sentence-transformers-quantized", "hashing", "remote"
+    EMBEDDING_SERVER_SOCKET: str = os.getenv("EMBEDDING_SERVER_SOCKET", "/tmp/rag-embeddings.sock")  # Shared embedding server (remote provider)
+    EMBEDDING_DIMENSION: int = 384    # Vector size for the hashing provider
+    EMBEDDING_CACHE_SIZE: int = 1024  # Query embeddings kept in the LRU cache
     
     # Document processing settings
     CHUNK_SIZE: int = 800       # Size of text chunks for vector storage
     CHUNK_OVERLAP: int = 100     # Characters to overlap between chunks
     MAX_RESULTS: int = 5         # Maximum search results to return
     MAX_HISTORY: int = 2         # Number of conversation messages to remember
+    COURSE_RESOLVE_MAX_DISTANCE: float = 1.5  # Vector fallback cutoff for course names with no lexical match
+
+    # Query batching: concurrent searches wait this long to share one embed/query (0 disables).
+    # A search arriving alone still waits the whole window, so only enable it when many
+    # searches run at once (e.g. the batch search API under load)
+    SEARCH_BATCH_WINDOW_MS: float = 0.0
+    SEARCH_BATCH_MAX_SIZE: int = 32
+
+    # Threads serving the async VectorStore methods and the blocking searches of the API handlers
+    ASYNC_SEARCH_WORKERS: int = 8
+
+    # Search result cache, invalidated whenever the corpus changes (0 size disables)
+    SEARCH_CACHE_SIZE: int = 512
+    SEARCH_CACHE_TTL_SECONDS: float = 300.0
+
+    # Neighbouring chunks (each side, same lesson) merged into every search hit (0 disables)
+    SEARCH_CONTEXT_CHUNKS: int = 0
+
+    # Adaptive top-k: vector hits past a distance cutoff are dropped (0 disables a rule)
+    SEARCH_MAX_DISTANCE: float = 0.0        # Absolute, in the content collection's distance space
+    SEARCH_MAX_DISTANCE_RATIO: float = 0.0  # Relative to the best hit's distance
+    SEARCH_DISTANCE_KNEE: bool = False      # Cut where the distances jump
+    SEARCH_MIN_RESULTS: int = 0             # Hits always kept when a rule is on (when there are that many)
+
+    # Hybrid retrieval: BM25 and vector hits fused by reciprocal rank fusion
+    HYBRID_LEXICAL_WEIGHT: float = 0.0  # 0 disables the lexical index (e.g. 1.0 to enable)
+    HYBRID_VECTOR_WEIGHT: float = 1.0
+    HYBRID_CANDIDATES: int = 20         # Hits taken from each ranking before fusion
+    RRF_K: int = 60
+
+    # Content search engine: "chroma" (HNSW), "numpy" (exact, in-memory), "ivf" (partitioned)
+    # "quantized" (compact codes in RAM, exact rescoring from disk), "snapshot" (shared read-only
+    # export) or "sharded" (per-course collections)
+    SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "chroma")
+
+    # IVF index (SEARCH_BACKEND="ivf"); build offline with `python ivf_index.py`
+    IVF_INDEX_PATH: str = "./ivf_index"
+    IVF_LISTS: int = 0              # Partitions (0 = about sqrt(chunk count))
+    IVF_NPROBE: int = 8             # Partitions scanned per query: higher = better recall, slower
+    IVF_TRAIN_ITERATIONS: int = 20  # k-means iterations when training
+
+    # Quantized index (SEARCH_BACKEND="quantized")
+    QUANTIZATION_MODE: str = "int8"  # "int8" (4x smaller) or "binary" (32x smaller)
+    QUANTIZATION_OVERSAMPLE: int = 4  # Candidates rescored per result; use ~10 for binary
+    QUANTIZED_VECTORS_PATH: str = "./quantized_vectors.f32"  # Prefix of each process's memory-mapped exact vectors file
     
+    # Sharded content (SEARCH_BACKEND="sharded"): one collection per course, or N course groups
+    CONTENT_SHARDS: int = 0          # 0 = one shard per course
+    SHARD_FANOUT_WORKERS: int = 8    # Parallel shard queries for searches across all courses
+
+    # HNSW index parameters per collection (Chroma's defaults). Space, construction ef and M
+    # are fixed when a collection is created, so changing them needs a rebuild
+    # (RAGSystem.reindex_folder); search ef is applied on startup. Tune with `python hnsw_sweep.py`
+    CONTENT_HNSW_SPACE: str = "l2"         # "l2", "cosine" or "ip"
+    CONTENT_HNSW_CONSTRUCTION_EF: int = 100
+    CONTENT_HNSW_SEARCH_EF: int = 100      # Candidates kept per search: higher = better recall, slower
+    CONTENT_HNSW_M: int = 16               # Graph neighbours per node: higher = better recall, more memory
+    CATALOG_HNSW_SPACE: str = "l2"         # COURSE_RESOLVE_MAX_DISTANCE is an l2 distance
+    CATALOG_HNSW_CONSTRUCTION_EF: int = 100
+    CATALOG_HNSW_SEARCH_EF: int = 100
+    CATALOG_HNSW_M: int = 16
+
+    # Read-only index snapshot (SEARCH_BACKEND="snapshot"); export with `python index_snapshot.py`
+    INDEX_SNAPSHOT_PATH: str = "./index_snapshot"
+
+    # How often a worker checks for courses written by other workers (or other clients of a
+    # Chroma server) and reloads its catalog, statistics and caches (0 = on every read)
+    CORPUS_REVALIDATE_SECONDS: float = 1.0
+    # Replaced index generations are kept this long after a reindex, so workers still
+    # searching them (they switch on their next check) are not cut off
+    GENERATION_GRACE_SECONDS: float = 300.0
+
+    # Tenant stores kept open per worker; the least recently used one is closed beyond this
+    MAX_OPEN_TENANTS: int = 64
+
     # Database paths
     CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
+    # Shared Chroma server (e.g. "http://localhost:8000", started with `chroma run`) used by all
+    # workers instead of the embedded store at CHROMA_PATH; empty keeps the embedded store
+    CHROMA_SERVER_URL: str = os.getenv("CHROMA_SERVER_URL", "")
 
 config = Config()
 
@@ -0,0 +1,43 @@
+import re
+from typing import List
+
+# Context prefix DocumentProcessor puts in front of some chunks
+CONTEXT_PREFIX = re.compile(r"^(?:Course .+? )?Lesson \d+ content: ")
+
+# Leading characters of the following chunk searched for in the previous one
+# to find where a shared tail could start (kept short: overlaps can be a
+# single short sentence)
+_PROBE_LENGTH = 8
+
+
+def strip_context_prefix(text: str) -> str:
+    """Remove a leading 'Course X Lesson N content: ' / 'Lesson N content: ' prefix"""
+    return CONTEXT_PREFIX.sub("", text, count=1)
+
+
+def merge_pair(previous: str, following: str) -> str:
+    """
+    Join two consecutive chunks, dropping the text they share (chunks
+    overlap by whole sentences: the end of one is the start of the next).
+    """
+    following = strip_context_prefix(following)
+    probe = following[:_PROBE_LENGTH]
+    start = previous.find(probe) if probe else -1
+    while start != -1:
+        tail = previous[start:]
+        if following.startswith(tail):
+            return previous + following[len(tail):]
+        if tail.startswith(following):
+            return previous
+        start = previous.find(probe, start + 1)
+    return f"{previous} {following}"
+
+
+def merge_chunks(texts: List[str]) -> str:
+    """Merge consecutive chunks (in chunk_index order) into one passage"""
+    if not texts:
+        return ""
+    merged = texts[0]
+    for text in texts[1:]:
+        merged = merge_pair(merged, text)
+    return merged
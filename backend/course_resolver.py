@@ -0,0 +1,155 @@
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from caching import LRUCache
+
+
+class CourseNameResolver:
+    """
+    In-memory lexical matcher from user-supplied course names to catalog titles.
+
+    Matching stages run in order and the first stage with any match decides:
+    exact, case-folded, prefix, whole-word containment, acronym, then
+    character-trigram similarity. One match resolves the name; several
+    matches are returned as candidates for the caller to disambiguate.
+
+    Final resolutions are cached and the cache is dropped whenever the set
+    of titles changes.
+    """
+
+    WORD_PATTERN = re.compile(r"[^\W_]+")
+    ACRONYM_STOPWORDS = {"a", "an", "and", "for", "in", "of", "on", "the", "to", "with"}
+
+    def __init__(self, titles: Iterable[str] = (), fuzzy_threshold: float = 0.6,
+                 fuzzy_margin: float = 0.05, cache_size: int = 1024):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy_margin = fuzzy_margin
+        self.cache = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self._titles: List[str] = []
+        self._normalized: Dict[str, str] = {}
+        self._acronyms: Dict[str, str] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self.version = 0
+        self.set_titles(titles)
+
+    @property
+    def titles(self) -> List[str]:
+        return list(self._titles)
+
+    @classmethod
+    def _normalize(cls, text: str) -> str:
+        """Case-fold and reduce to space separated words"""
+        return " ".join(cls.WORD_PATTERN.findall(text.casefold()))
+
+    @classmethod
+    def _acronym(cls, normalized: str) -> str:
+        """Initials of each significant word"""
+        return "".join(word[0] for word in normalized.split() if word not in cls.ACRONYM_STOPWORDS)
+
+    @staticmethod
+    def _trigram_set(normalized: str) -> Set[str]:
+        """Character trigrams of the padded string"""
+        padded = f"  {normalized} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def set_titles(self, titles: Iterable[str]):
+        """Replace the known titles and invalidate cached resolutions"""
+        with self._lock:
+            self._titles = list(dict.fromkeys(titles))
+            self._normalized = {title: self._normalize(title) for title in self._titles}
+            self._acronyms = {title: self._acronym(norm) for title, norm in self._normalized.items()}
+            self._trigrams = {title: self._trigram_set(norm) for title, norm in self._normalized.items()}
+            self._invalidate()
+
+    def add_title(self, title: str):
+        """Register a new title and invalidate cached resolutions"""
+        with self._lock:
+            if title not in self._normalized:
+                normalized = self._normalize(title)
+                self._titles.append(title)
+                self._normalized[title] = normalized
+                self._acronyms[title] = self._acronym(normalized)
+                self._trigrams[title] = self._trigram_set(normalized)
+            self._invalidate()
+
+    def remove_title(self, title: str):
+        """Forget a title and invalidate cached resolutions"""
+        with self._lock:
+            if title in self._normalized:
+                self._titles.remove(title)
+                del self._normalized[title]
+                del self._acronyms[title]
+                del self._trigrams[title]
+            self._invalidate()
+
+    def _invalidate(self):
+        """Drop cached resolutions (caller holds the lock)"""
+        self.cache.clear()
+        self.version += 1
+
+    def match(self, name: str) -> Tuple[Optional[str], List[str]]:
+        """
+        Match a name against the catalog titles lexically.
+
+        Returns:
+            (title, candidates): title is set when exactly one title matched;
+            otherwise candidates lists the ambiguous matches (empty if none)
+        """
+        query = self._normalize(name)
+        if not query:
+            return None, []
+
+        with self._lock:
+            return self._match(name, query)
+
+    def _match(self, name: str, query: str) -> Tuple[Optional[str], List[str]]:
+        """Run the matching stages (caller holds the lock)"""
+        stages = [
+            lambda: [title for title in self._titles if title == name.strip()],
+            lambda: [title for title, norm in self._normalized.items() if norm == query],
+            lambda: [title for title, norm in self._normalized.items() if norm.startswith(query)],
+            lambda: [title for title, norm in self._normalized.items() if f" {query} " in f" {norm} "],
+            lambda: [title for title, acronym in self._acronyms.items()
+                     if len(query) > 1 and " " not in query and acronym == query],
+            lambda: self._fuzzy_matches(query),
+        ]
+        for stage in stages:
+            matches = stage()
+            if len(matches) == 1:
+                return matches[0], []
+            if matches:
+                return None, matches
+        return None, []
+
+    def _fuzzy_matches(self, query: str) -> List[str]:
+        """
+        Titles scoring near the best trigram coverage, i.e. the share of the
+        name's trigrams that also occur in the title. Coverage rather than
+        Jaccard so short names are not penalized against long titles.
+        """
+        query_trigrams = self._trigram_set(query)
+        scores = {
+            title: len(query_trigrams & trigrams) / len(query_trigrams)
+            for title, trigrams in self._trigrams.items()
+        }
+        if not scores:
+            return []
+        best = max(scores.values())
+        if best < self.fuzzy_threshold:
+            return []
+        return [title for title, score in scores.items() if score >= best - self.fuzzy_margin]
+
+    def cached(self, name: str) -> Tuple[bool, Optional[str]]:
+        """Look up a cached final resolution; returns (found, title)"""
+        entry = self.cache.get(self._normalize(name))
+        if entry is None:
+            return False, None
+        return True, entry[0]
+
+    def remember(self, name: str, title: Optional[str], version: int):
+        """Cache a final resolution unless the titles changed since version"""
+        with self._lock:
+            if version == self.version:
+                self.cache.put(self._normalize(name), (title,))
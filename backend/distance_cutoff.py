@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+
+@dataclass(frozen=True)
+class DistanceCutoff:
+    """
+    Rules for trimming a hit list ordered by distance, so fewer, closer
+    chunks are returned when the scores fall off. Every rule is off by
+    default:
+
+        max_distance: drop hits farther than this (in the collection's space)
+        max_ratio: drop hits farther than max_ratio times the best hit's
+            distance (ignored when the best distance is not positive)
+        knee: cut at the largest gap between consecutive distances when it
+            is at least knee_factor times the mean of the other gaps
+        min_results: never keep fewer hits than this (when there are that many)
+    """
+    max_distance: Optional[float] = None
+    max_ratio: Optional[float] = None
+    knee: bool = False
+    knee_factor: float = 2.0
+    min_results: int = 1
+
+    def enabled(self) -> bool:
+        return self.max_distance is not None or self.max_ratio is not None or self.knee
+
+    def count(self, distances: Sequence[float]) -> int:
+        """How many of the leading hits to keep"""
+        keep = len(distances)
+        if not self.enabled() or keep == 0:
+            return keep
+        best = distances[0]
+        for position, distance in enumerate(distances):
+            if self.max_distance is not None and distance > self.max_distance:
+                keep = position
+                break
+            if self.max_ratio is not None and best > 0 and distance > best * self.max_ratio:
+                keep = position
+                break
+        if self.knee:
+            keep = min(keep, knee_position(distances[:keep], self.knee_factor))
+        return max(keep, min(self.min_results, len(distances)))
+
+
+def knee_position(distances: Sequence[float], factor: float = 2.0) -> int:
+    """
+    Number of hits before the distances jump: the position after the
+    largest gap, if that gap stands out from the others by factor, else
+    all of them (needs at least three hits to compare gaps).
+    """
+    if len(distances) < 3:
+        return len(distances)
+    gaps = [following - previous for previous, following in zip(distances, distances[1:])]
+    widest = max(range(len(gaps)), key=gaps.__getitem__)
+    others = gaps[:widest] + gaps[widest + 1:]
+    if gaps[widest] > 0 and gaps[widest] >= factor * (sum(others) / len(others)):
+        return widest + 1
+    return len(distances)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Shared embedding server for multiple API workers.
+
+Loads one embedding model and serves it over a Unix socket. Requests from
+all connected workers are micro-batched into single forward passes.
+
+Usage:
+    python embedding_server.py --socket /tmp/rag-embeddings.sock
+
+Workers then use EMBEDDING_PROVIDER=remote (see config.py).
+"""
+
+import argparse
+import errno
+import json
+import os
+import socket
+import socketserver
+import stat
+from typing import List
+
+import numpy as np
+
+from batching import MicroBatcher
+from config import config
+from embeddings import EmbeddingProvider, create_embedding_provider, recv_frame, send_frame
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server that batches embedding requests across connections"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, provider: EmbeddingProvider,
+                 max_wait_ms: float = 2.0, max_batch_size: int = 256):
+        self.socket_path = socket_path
+        self.provider = provider
+        self._remove_stale_socket(socket_path)
+        self.batcher = MicroBatcher(
+            self._embed_batch,
+            max_wait_ms=max_wait_ms,
+            max_batch_size=max_batch_size,
+            name="embedding-server-batcher"
+        )
+        super().__init__(socket_path, EmbeddingRequestHandler)
+        # The socket file this server created, so shutdown never removes another server's
+        self._socket_inode = os.stat(socket_path).st_ino
+
+    @staticmethod
+    def _remove_stale_socket(socket_path: str):
+        """
+        Remove a socket left behind by a server that is no longer running.
+
+        Raises:
+            OSError: if a server is still listening there, or the path is not a socket
+        """
+        try:
+            mode = os.stat(socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise OSError(errno.EEXIST, f"{socket_path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+            return
+        finally:
+            probe.close()
+        raise OSError(errno.EADDRINUSE, f"An embedding server is already listening on {socket_path}")
+
+    def _embed_batch(self, requests: List[List[str]]) -> List[np.ndarray]:
+        """Embed the texts of several requests in one forward pass and split the result"""
+        texts = [text for request in requests for text in request]
+        embeddings = self.provider.embed(texts)
+        results = []
+        offset = 0
+        for request in requests:
+            results.append(embeddings[offset:offset + len(request)])
+            offset += len(request)
+        return results
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+        try:
+            if os.stat(self.socket_path).st_ino == self._socket_inode:
+                os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+class EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    """Serves framed JSON requests on one worker connection until it closes"""
+
+    def handle(self):
+        server: EmbeddingServer = self.server
+        while True:
+            frame = recv_frame(self.request)
+            if frame is None:
+                return
+            try:
+                request = json.loads(frame)
+                if request.get("op") == "info":
+                    send_frame(self.request, json.dumps({
+                        "provider": server.provider.name(),
+                        "config": server.provider.get_config(),
+                        "batcher": server.batcher.stats()
+                    }).encode("utf-8"))
+                    continue
+                embeddings = np.ascontiguousarray(
+                    server.batcher.submit(request["texts"]), dtype=np.float32
+                )
+            except Exception as e:
+                send_frame(self.request, json.dumps({"error": str(e)}).encode("utf-8"))
+                continue
+            send_frame(self.request, json.dumps({"shape": list(embeddings.shape)}).encode("utf-8"))
+            send_frame(self.request, embeddings.tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding server")
+    parser.add_argument("--socket", default=config.EMBEDDING_SERVER_SOCKET,
+                        help="Unix socket path to listen on")
+    parser.add_argument("--provider", default="sentence-transformers",
+                        help="Local embedding provider to serve")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL,
+                        help="Model name for sentence-transformers providers")
+    parser.add_argument("--dimension", type=int, default=config.EMBEDDING_DIMENSION,
+                        help="Vector size for the hashing provider")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0,
+                        help="How long the first request of a batch waits for others")
+    parser.add_argument("--max-batch-size", type=int, default=256,
+                        help="Maximum number of requests per forward pass")
+    args = parser.parse_args()
+
+    if args.provider == "remote":
+        parser.error("the server must run a local provider")
+
+    provider = create_embedding_provider(args.provider, model_name=args.model, dimension=args.dimension)
+    print(f"Loading {provider.name()} provider...")
+    provider.load()
+
+    try:
+        server = EmbeddingServer(args.socket, provider, args.max_wait_ms, args.max_batch_size)
+    except OSError as e:
+        parser.exit(1, f"Cannot start embedding server: {e}\n")
+
+    with server:
+        print(f"Embedding server listening on {args.socket}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Shutting down embedding server")
+
+
+if __name__ == "__main__":
+    main()
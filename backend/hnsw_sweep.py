@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Sweep HNSW parameters (M, construction ef, search ef): recall@k against exact search, latency and memory"""
+
+import argparse
+import itertools
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Sequence
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+from benchmark_search_backends import percentile, random_vectors
+from vector_math import compute_distances, top_k
+
+
+def exact_neighbours(space: str, vectors: np.ndarray, queries: np.ndarray, k: int) -> List[List[int]]:
+    """Row numbers of the true k nearest vectors for each query"""
+    distances = compute_distances(space, queries, vectors)
+    return [top_k(row, k).tolist() for row in distances]
+
+
+def hnsw_memory_bytes(count: int, dimension: int, m: int) -> int:
+    """
+    Approximate hnswlib index size: float32 vectors and labels, 2*M links
+    per node on the base layer, and M links on the upper layers, which
+    hold about 1/(M-1) of the nodes.
+    """
+    base = count * (dimension * 4 + 8 + 4 + 2 * m * 4)
+    upper = count / max(m - 1, 1) * (4 + m * 4)
+    return int(base + upper)
+
+
+def build_index(client, name: str, vectors: np.ndarray, space: str, ef_construction: int, m: int,
+                batch_size: int = 5000):
+    """New collection holding the vectors (IDs are row numbers); returns (collection, build seconds)"""
+    collection = client.create_collection(name, configuration={"hnsw": {
+        "space": space, "ef_construction": ef_construction, "max_neighbors": m
+    }})
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), batch_size):
+        batch = vectors[offset:offset + batch_size]
+        collection.add(ids=[str(offset + row) for row in range(len(batch))], embeddings=batch)
+    return collection, time.perf_counter() - start
+
+
+def sweep(client, vectors: np.ndarray, queries: np.ndarray, k: int = 5, space: str = "l2",
+          ms: Sequence[int] = (16,), ef_constructions: Sequence[int] = (100,),
+          ef_searches: Sequence[int] = (100,)) -> List[Dict[str, Any]]:
+    """
+    Build one collection per (M, construction ef) and query it at each
+    search ef.
+
+    Returns:
+        One row per grid point: parameters, build_seconds, recall,
+        p50_ms, p99_ms and memory_bytes (estimated)
+    """
+    exact = exact_neighbours(space, vectors, queries, k)
+    rows = []
+    for m, ef_construction in itertools.product(ms, ef_constructions):
+        name = f"hnsw_sweep_m{m}_efc{ef_construction}"
+        collection, build_seconds = build_index(client, name, vectors, space, ef_construction, m)
+        try:
+            for ef_search in ef_searches:
+                collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+                latencies, recalls = [], []
+                for query, want in zip(queries, exact):
+                    start = time.perf_counter()
+                    got = collection.query(query_embeddings=[query], n_results=k, include=[])["ids"][0]
+                    latencies.append(time.perf_counter() - start)
+                    recalls.append(len({int(doc_id) for doc_id in got} & set(want)) / max(len(want), 1))
+                rows.append({
+                    "m": m,
+                    "ef_construction": ef_construction,
+                    "ef_search": ef_search,
+                    "build_seconds": build_seconds,
+                    "recall": float(np.mean(recalls)),
+                    "p50_ms": percentile(latencies, 50),
+                    "p99_ms": percentile(latencies, 99),
+                    "memory_bytes": hnsw_memory_bytes(len(vectors), vectors.shape[1], m),
+                })
+        finally:
+            client.delete_collection(name)
+    return rows
+
+
+def load_content_vectors(chroma_path: str):
+    """Stored vectors and distance space of the live content collection"""
+    from index_generations import live_collection_names
+    from ivf_index import read_collection
+    from vector_math import collection_space
+
+    client = chromadb.PersistentClient(path=chroma_path, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_collection(live_collection_names(chroma_path)[1])
+    stored = read_collection(collection)
+    return np.asarray(stored["embeddings"], dtype=np.float32), collection_space(collection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chroma-path", help="Sweep over the vectors of this store's content collection "
+                                              "instead of synthetic data")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=50,
+                        help="Draw synthetic vectors around this many topic centres (0 = uniform)")
+    parser.add_argument("--space", default=None, help="Distance space (default: the collection's, or l2)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 50, 100, 200])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.chroma_path:
+        vectors, space = load_content_vectors(args.chroma_path)
+        # Queries are perturbed stored vectors, so they land where real questions do
+        picks = vectors[rng.integers(len(vectors), size=args.queries)]
+        queries = (picks + rng.normal(scale=float(np.std(vectors)), size=picks.shape)).astype(np.float32)
+    else:
+        centres = rng.normal(scale=0.2, size=(args.clusters, args.dimension)) if args.clusters else None
+        vectors = random_vectors(rng, args.chunks, args.dimension, centres)
+        queries = random_vectors(rng, args.queries, args.dimension, centres)
+        space = "l2"
+    space = args.space or space
+
+    path = tempfile.mkdtemp(prefix="hnsw-sweep-")
+    try:
+        client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+        print(f"Sweeping {len(vectors)} x {vectors.shape[1]} vectors ({space}), {len(queries)} queries, k={args.k}")
+        print(f"{'M':>4}{'ef_con':>8}{'ef_sea':>8}{'build s':>10}{'recall@k':>10}"
+              f"{'p50 ms':>10}{'p99 ms':>10}{'mem MB':>10}")
+        rows = sweep(client, vectors, queries, k=args.k, space=space, ms=args.m,
+                     ef_constructions=args.ef_construction, ef_searches=args.ef_search)
+        for row in rows:
+            print(f"{row['m']:>4}{row['ef_construction']:>8}{row['ef_search']:>8}{row['build_seconds']:>10.2f}"
+                  f"{row['recall']:>10.3f}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                  f"{row['memory_bytes'] / 2**20:>10.1f}")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from chromadb.errors import NotFoundError
+
+from models import Course, CourseChunk
+
+CATALOG_COLLECTION = "course_catalog"
+CONTENT_COLLECTION = "course_content"
+
+# Letters and digits, optionally joined by single "-" or "_" (so "__" stays a separator)
+_TENANT_ID = re.compile(r"^[A-Za-z0-9]+(?:[-_][A-Za-z0-9]+)*$")
+
+
+def validate_tenant_id(tenant_id: str) -> str:
+    """Return the tenant id, or raise ValueError if it cannot prefix collection names"""
+    if not isinstance(tenant_id, str) or len(tenant_id) > 64 or not _TENANT_ID.match(tenant_id):
+        raise ValueError(f"Invalid tenant id {tenant_id!r}: use up to 64 letters, digits, '-' and '_'")
+    return tenant_id
+
+
+def namespace_prefix(tenant_id: Optional[str]) -> str:
+    """Collection name prefix of a tenant ("" for the default namespace)"""
+    return f"{tenant_id}__" if tenant_id else ""
+
+
+def collection_names(generation: int, tenant_id: Optional[str] = None) -> Tuple[str, str]:
+    """(catalog, content) collection names of a tenant's index generation (0 = unversioned)"""
+    prefix = namespace_prefix(tenant_id)
+    if generation == 0:
+        return f"{prefix}{CATALOG_COLLECTION}", f"{prefix}{CONTENT_COLLECTION}"
+    return f"{prefix}{CATALOG_COLLECTION}__v{generation}", f"{prefix}{CONTENT_COLLECTION}__v{generation}"
+
+
+def stored_generations(client, tenant_id: Optional[str] = None) -> Set[int]:
+    """Generations of a tenant with a content collection in a Chroma client"""
+    return {generation for generation, _ in _content_collections(client, tenant_id)}
+
+
+def building_generations(client, tenant_id: Optional[str] = None) -> Set[int]:
+    """Generations of a tenant whose build has not been committed or aborted (see GenerationBuilder)"""
+    return {generation for generation, collection in _content_collections(client, tenant_id)
+            if BUILDING_KEY in (getattr(collection, "metadata", None) or {})}
+
+
+def _content_collections(client, tenant_id: Optional[str]) -> List[Tuple[int, Any]]:
+    """(generation, collection) of every content collection of a tenant"""
+    pattern = re.compile(rf"^{re.escape(namespace_prefix(tenant_id) + CONTENT_COLLECTION)}(?:__v(\d+))?$")
+    found = []
+    for collection in client.list_collections():
+        match = pattern.match(collection.name)
+        if match:
+            found.append((int(match.group(1) or 0), collection))
+    return found
+
+
+# Collection metadata key holding a token that every write replaces
+VERSION_KEY = "version"
+
+# Content collection metadata key marking a generation still being built (value: start time)
+BUILDING_KEY = "building_since"
+
+
+def collection_version(collection) -> Optional[str]:
+    """Version token of a collection as of its handle (None if never written by a VectorStore)"""
+    return (collection.metadata or {}).get(VERSION_KEY)
+
+
+def touch_collection(collection) -> str:
+    """
+    Give a collection a new version token after a write, so processes
+    holding copies of its data can tell they are stale. Returns the token.
+    """
+    token = uuid.uuid4().hex
+    collection.modify(metadata={**_modifiable_metadata(collection), VERSION_KEY: token})
+    return token
+
+
+def _modifiable_metadata(collection) -> Dict[str, Any]:
+    # Chroma replaces the whole metadata and refuses hnsw:* keys once created.
+    # A build's marker goes with its first version token (see GenerationBuilder.commit).
+    return {key: value for key, value in (collection.metadata or {}).items()
+            if not key.startswith("hnsw:") and key != BUILDING_KEY}
+
+
+# Pointer keys recording when each recent generation went live (time.time())
+SWITCHED_AT_PREFIX = "switched_at_"
+_SWITCH_HISTORY = 8
+
+
+def pointer_record(previous: Dict[str, Any], generation: int) -> Dict[str, Any]:
+    """Pointer contents making a generation live, keeping the recent switch times"""
+    times = {key: value for key, value in previous.items() if key.startswith(SWITCHED_AT_PREFIX)}
+    times[f"{SWITCHED_AT_PREFIX}{generation}"] = time.time()
+    recent = sorted(times, key=lambda key: int(key[len(SWITCHED_AT_PREFIX):]))[-_SWITCH_HISTORY:]
+    return {"live": generation, **{key: times[key] for key in recent}}
+
+
+def switch_times(record: Dict[str, Any]) -> Dict[int, float]:
+    """When each recent generation went live, from pointer contents"""
+    return {int(key[len(SWITCHED_AT_PREFIX):]): float(value) for key, value in record.items()
+            if key.startswith(SWITCHED_AT_PREFIX)}
+
+
+def _check_advance(record: Dict[str, Any], generation: int):
+    """Refuse to move the live generation backwards (a build that began before the live one)"""
+    live = int(record.get("live", 0))
+    if generation < live:
+        raise ValueError(f"Index generation {generation} is older than the live generation {live}")
+
+
+class GenerationPointer:
+    """
+    Which index generation is live, stored as a small JSON file in the
+    Chroma directory and replaced atomically (write + rename), so every
+    process opening the directory agrees on the live collections. It also
+    records when recent generations went live, so old ones are kept until
+    other processes have had time to move off them.
+
+    Writes hold an exclusive flock on the Chroma directory for their
+    read-modify-write, so concurrent commits from any process are ordered.
+    """
+
+    FILE_NAME = "index_generation.json"
+
+    def __init__(self, chroma_path: str, tenant_id: Optional[str] = None):
+        self.directory = chroma_path
+        self.path = os.path.join(chroma_path, namespace_prefix(tenant_id) + self.FILE_NAME)
+
+    @contextmanager
+    def _locked(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def record(self) -> Dict[str, Any]:
+        """Pointer contents (empty when no pointer has been written)"""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def read(self) -> int:
+        """Live generation (0 when no pointer has been written)"""
+        return int(self.record().get("live", 0))
+
+    def write(self, generation: int):
+        """
+        Make a generation live.
+
+        Raises:
+            ValueError: if the generation is older than the live one
+        """
+        with self._locked():
+            record = self.record()
+            _check_advance(record, generation)
+            staging = f"{self.path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(staging, "w") as f:
+                json.dump(pointer_record(record, generation), f)
+            os.replace(staging, self.path)
+
+
+class CollectionGenerationPointer:
+    """
+    GenerationPointer kept on a Chroma server, as the metadata of an empty
+    collection, for stores that share a server rather than a directory.
+
+    Chroma offers no compare-and-set, so writes are ordered only within
+    this process; across processes a commit refuses to go backwards from
+    the generation it read just before writing.
+    """
+
+    COLLECTION_NAME = "index_generation"
+    _write_lock = threading.Lock()
+
+    def __init__(self, client, tenant_id: Optional[str] = None):
+        self.client = client
+        self.name = namespace_prefix(tenant_id) + self.COLLECTION_NAME
+
+    def record(self) -> Dict[str, Any]:
+        """Pointer contents (empty when no pointer has been written; reading never creates it)"""
+        try:
+            collection = self.client.get_collection(self.name)
+        except NotFoundError:
+            return {}
+        return dict(collection.metadata or {})
+
+    def read(self) -> int:
+        """Live generation (0 when no pointer has been written)"""
+        return int(self.record().get("live", 0))
+
+    def write(self, generation: int):
+        """
+        Make a generation live.
+
+        Raises:
+            ValueError: if the generation is older than the live one
+        """
+        with self._write_lock:
+            collection = self.client.get_or_create_collection(self.name, embedding_function=None)
+            record = dict(collection.metadata or {})
+            _check_advance(record, generation)
+            collection.modify(metadata=pointer_record(record, generation))
+
+
+def live_collection_names(chroma_path: str, tenant_id: Optional[str] = None) -> Tuple[str, str]:
+    """(catalog, content) collection names of a tenant currently live under a Chroma directory"""
+    return collection_names(GenerationPointer(chroma_path, tenant_id).read(), tenant_id)
+
+
+class GenerationBuilder:
+    """
+    A new generation of the catalog and content collections, filled while
+    the live generation keeps serving searches. Nothing is visible to
+    searches until commit() validates it and VectorStore switches to it.
+
+    Obtain one from VectorStore.begin_generation().
+    """
+
+    def __init__(self, store, generation: int):
+        self.store = store
+        self.generation = generation
+        catalog_name, content_name = collection_names(generation, store.tenant_id)
+        # Fails if the generation exists, e.g. another process began it first.
+        # The marker keeps collect_generations off it until commit or abort.
+        self.course_content = store._create_collection(content_name, exclusive=True,
+                                                       metadata={BUILDING_KEY: time.time()})
+        self.course_catalog = store._create_collection(catalog_name)
+        self.course_titles: List[str] = []
+        self.chunk_ids: Set[str] = set()
+        self.closed = False
+
+    def add_course(self, course: Course, chunks: List[CourseChunk]):
+        """Embed and write one course into the new generation"""
+        strays = {chunk.course_title for chunk in chunks if chunk.course_title != course.title}
+        if strays:
+            raise ValueError(f"Chunks for {', '.join(sorted(strays))} passed to add_course('{course.title}')")
+
+        store = self.store
+        self.course_catalog.upsert(
+            documents=[course.title],
+            embeddings=store.embedding_function.embed([course.title]),
+            metadatas=[store._catalog_metadata(course)],
+            ids=[course.title]
+        )
+        ids, documents, metadatas = store._content_records(chunks)
+        batch_size = store._write_batch_size()
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self.course_content.upsert(
+                documents=documents[start:end],
+                embeddings=store.embedding_function.embed(documents[start:end]),
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
+            )
+        if course.title not in self.course_titles:
+            self.course_titles.append(course.title)
+        self.chunk_ids.update(ids)
+
+    def validate(self, allow_empty: bool = False, probes: int = 3):
+        """
+        Check the new generation before it goes live: record counts match
+        what was written, every chunk belongs to a cataloged course, and a
+        few stored chunks are found as their own nearest neighbour.
+
+        Raises:
+            ValueError: describing the first problem found
+        """
+        if not self.course_titles and not allow_empty:
+            raise ValueError(f"Index generation {self.generation} is empty")
+        catalog_count = self.course_catalog.count()
+        if catalog_count != len(self.course_titles):
+            raise ValueError(f"Index generation {self.generation} has {catalog_count} catalog records, "
+                             f"expected {len(self.course_titles)}")
+        content_count = self.course_content.count()
+        if content_count != len(self.chunk_ids):
+            raise ValueError(f"Index generation {self.generation} has {content_count} chunks, "
+                             f"expected {len(self.chunk_ids)}")
+
+        sample = sorted(self.chunk_ids)[:probes]
+        if not sample:
+            return
+        stored = self.course_content.get(ids=sample, include=["embeddings", "metadatas"])
+        for metadata in stored['metadatas']:
+            if metadata.get("course_title") not in self.course_titles:
+                raise ValueError(f"Chunk of uncataloged course '{metadata.get('course_title')}' "
+                                 f"in index generation {self.generation}")
+        # Chunks with identical text tie, so look for the probe among the top few
+        found = self.course_content.query(query_embeddings=list(stored['embeddings']),
+                                          n_results=min(10, content_count))
+        for doc_id, hits in zip(stored['ids'], found['ids']):
+            if doc_id not in hits:
+                raise ValueError(f"Probe query for {doc_id} in index generation {self.generation} returned {hits}")
+
+    def commit(self, allow_empty: bool = False, keep_previous: int = 1):
+        """
+        Validate, switch the store to this generation and drop old ones
+        that other processes have had time to move off (see
+        VectorStore.collect_generations).
+
+        Raises:
+            ValueError: if validation fails, or a newer generation went live
+                while this one was being built; the build is dropped
+        """
+        try:
+            self.validate(allow_empty=allow_empty)
+            touch_collection(self.course_content)
+            self.store._switch_generation(self.generation, self.course_catalog, self.course_content)
+        except Exception:
+            self.abort()
+            raise
+        self.closed = True
+        self.store.collect_generations(keep_previous=keep_previous)
+
+    def abort(self):
+        """Drop the partially built generation"""
+        if self.closed:
+            return
+        self.closed = True
+        self.store._drop_generation(self.generation)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"generation": self.generation, "courses": len(self.course_titles), "chunks": len(self.chunk_ids)}
+
+
+def previous_generations(generations: Set[int], live: int, keep_previous: int) -> List[int]:
+    """Generations older than live beyond the newest keep_previous, oldest first"""
+    older = sorted(generation for generation in generations if generation < live)
+    return older[:max(len(older) - keep_previous, 0)]
+
+
+def draining_generations(generations: List[int], times: Dict[int, float], grace_seconds: float,
+                         now: Optional[float] = None) -> Set[int]:
+    """
+    Generations that may still have readers: the generation that replaced
+    them went live less than grace_seconds ago. Generations with no
+    recorded successor switch are not considered draining.
+    """
+    now = time.time() if now is None else now
+    draining = set()
+    for generation in generations:
+        successors = [switched for successor, switched in times.items() if successor > generation]
+        if successors and now - min(successors) < grace_seconds:
+            draining.add(generation)
+    return draining
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Read-only, memory-mapped snapshots of the course content index"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from catalog_snapshot import CatalogSnapshot
+from filters import matches_where
+from index_generations import collection_version
+from ivf_index import read_collection
+from vector_math import compute_distances, top_k
+from versioned_dir import open_current, publish
+
+# Stored for lesson_number / chunk_index when a chunk has none
+MISSING = -1
+
+_INT_COLUMNS = ("lesson_number", "chunk_index")
+
+_RANGES = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}
+
+
+class StringColumn:
+    """UTF-8 strings stored back to back in one file, with an offsets array"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @staticmethod
+    def write(path: str, name: str, values: List[str]):
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        with open(os.path.join(path, f"{name}.bin"), "wb") as f:
+            f.write(b"".join(encoded))
+        np.save(os.path.join(path, f"{name}_offsets.npy"), offsets)
+
+    @classmethod
+    def open(cls, path: str, name: str) -> 'StringColumn':
+        """Memory-map a column written by write"""
+        offsets = np.load(os.path.join(path, f"{name}_offsets.npy"), mmap_mode="r")
+        blob_path = os.path.join(path, f"{name}.bin")
+        # np.memmap cannot map an empty file
+        blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if offsets[-1] else np.zeros(0, dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+
+class IndexSnapshot:
+    """
+    Immutable export of the content collection, opened with memory maps.
+
+    Layout of a snapshot version (see versioned_dir; path/CURRENT names
+    the live one):
+        manifest.json        format version, distance space, sizes, source collections
+        vectors.npy          (chunks, dimension) float32 embeddings
+        norms.npy            row L2 norms
+        ids.bin / documents.bin (+ *_offsets.npy)   UTF-8 string columns
+        course_codes.npy     course of each chunk, as an index into columns.json
+        lesson_number.npy / chunk_index.npy         int64 columns (-1 = missing)
+        columns.json         course title dictionary
+        catalog.json         raw course_catalog metadata records
+
+    Every worker that opens the same snapshot maps the same files, so the
+    vectors and text are shared through the OS page cache instead of being
+    copied into each process.
+    """
+
+    FORMAT_VERSION = 1
+    # Files of one snapshot version (see the layout above)
+    FILES = ("manifest.json", "vectors.npy", "norms.npy", "ids.bin", "ids_offsets.npy", "documents.bin",
+             "documents_offsets.npy", "course_codes.npy", *(f"{column}.npy" for column in _INT_COLUMNS),
+             "columns.json", "catalog.json")
+
+    def __init__(self, path: str, manifest: Dict[str, Any], vectors: np.ndarray, norms: np.ndarray,
+                 ids: StringColumn, documents: StringColumn, course_codes: np.ndarray,
+                 course_titles: List[str], int_columns: Dict[str, np.ndarray], catalog: List[Dict[str, Any]]):
+        self.path = path
+        self.manifest = manifest
+        self.space = manifest["space"]
+        self.vectors = vectors
+        self.norms = norms
+        self.ids = ids
+        self.documents = documents
+        self.course_codes = course_codes
+        self.course_titles = course_titles
+        self.int_columns = int_columns
+        self.catalog = catalog
+        self._course_code = {title: code for code, title in enumerate(course_titles)}
+        self._positions: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def write(cls, path: str, ids: List[str], embeddings: Any, documents: List[str],
+              metadatas: List[Dict[str, Any]], catalog: List[Dict[str, Any]], space: str = "l2",
+              embedding_model: Optional[str] = None, source: Optional[Dict[str, Any]] = None):
+        """
+        Publish a new version of a snapshot directory; readers see the old
+        version or the new one, never a partial or missing one.
+
+        source names the collections (and their version tokens) the
+        snapshot was exported from, so readers can tell when it is stale.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors = vectors.reshape(len(ids), vectors.shape[-1] if vectors.size else 0)
+
+        def write_files(directory: str):
+            np.save(os.path.join(directory, "vectors.npy"), vectors)
+            np.save(os.path.join(directory, "norms.npy"), np.linalg.norm(vectors, axis=1).astype(np.float32))
+            StringColumn.write(directory, "ids", list(ids))
+            StringColumn.write(directory, "documents", list(documents))
+
+            course_titles = list(dict.fromkeys(metadata.get("course_title", "") for metadata in metadatas))
+            codes = {title: code for code, title in enumerate(course_titles)}
+            np.save(os.path.join(directory, "course_codes.npy"),
+                    np.array([codes[metadata.get("course_title", "")] for metadata in metadatas], dtype=np.int32))
+            for column in _INT_COLUMNS:
+                values = [metadata.get(column) for metadata in metadatas]
+                np.save(os.path.join(directory, f"{column}.npy"),
+                        np.array([MISSING if value is None else value for value in values], dtype=np.int64))
+            with open(os.path.join(directory, "columns.json"), "w") as f:
+                json.dump({"course_titles": course_titles}, f)
+            with open(os.path.join(directory, "catalog.json"), "w") as f:
+                json.dump(catalog, f)
+            with open(os.path.join(directory, "manifest.json"), "w") as f:
+                json.dump({
+                    "version": cls.FORMAT_VERSION,
+                    "space": space,
+                    "chunks": len(ids),
+                    "dimension": vectors.shape[1],
+                    "courses": len(catalog),
+                    "embedding_model": embedding_model,
+                    "source": source or {},
+                    "created_at": time.time(),
+                }, f)
+
+        publish(path, write_files, legacy_files=cls.FILES)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['IndexSnapshot']:
+        """Open the live version of a snapshot (arrays are memory-mapped), or None if none was written"""
+        return open_current(path, cls._read)
+
+    @classmethod
+    def _read(cls, path: str) -> 'IndexSnapshot':
+        """Open one snapshot version directory"""
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported index snapshot version: {manifest.get('version')}")
+        with open(os.path.join(path, "columns.json")) as f:
+            columns = json.load(f)
+        with open(os.path.join(path, "catalog.json")) as f:
+            catalog = json.load(f)
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        return cls(
+            path,
+            manifest,
+            vectors.reshape(manifest["chunks"], manifest["dimension"]),
+            np.load(os.path.join(path, "norms.npy"), mmap_mode="r"),
+            StringColumn.open(path, "ids"),
+            StringColumn.open(path, "documents"),
+            np.load(os.path.join(path, "course_codes.npy"), mmap_mode="r"),
+            columns["course_titles"],
+            {column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r") for column in _INT_COLUMNS},
+            catalog
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        """Metadata record of one chunk, as stored in Chroma"""
+        metadata = {"course_title": self.course_titles[self.course_codes[row]]}
+        for column, values in self.int_columns.items():
+            if values[row] != MISSING:
+                metadata[column] = int(values[row])
+        return metadata
+
+    def catalog_snapshot(self) -> CatalogSnapshot:
+        """Parsed catalog, without opening Chroma"""
+        return CatalogSnapshot(self.catalog)
+
+    def mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Boolean row mask for a where clause (None means all rows)"""
+        if not where:
+            return None
+        if len(where) == 1:
+            key, condition = next(iter(where.items()))
+            if key in ("$and", "$or"):
+                masks = [self.mask(clause) for clause in condition]
+                masks = [np.ones(len(self), dtype=bool) if mask is None else mask for mask in masks]
+                return np.logical_and.reduce(masks) if key == "$and" else np.logical_or.reduce(masks)
+            mask = self._column_mask(key, condition)
+            if mask is not None:
+                return mask
+        return np.fromiter((matches_where(self.metadata(row), where) for row in range(len(self))),
+                           dtype=bool, count=len(self))
+
+    def _column_mask(self, key: str, condition: Any) -> Optional[np.ndarray]:
+        """Vectorized mask for equality, membership or a range on one column, or None"""
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        if len(condition) != 1:
+            return None
+        operator, operand = next(iter(condition.items()))
+        if operator in _RANGES and key in self.int_columns:
+            column = self.int_columns[key]
+            return _RANGES[operator](column, operand) & (column != MISSING)
+        if operator not in ("$eq", "$ne", "$in", "$nin"):
+            return None
+        values = operand if operator in ("$in", "$nin") else [operand]
+        if key == "course_title":
+            column = self.course_codes
+            # Unknown titles map to a code no chunk has
+            values = [self._course_code.get(value, -1) for value in values]
+        elif key in self.int_columns:
+            column = self.int_columns[key]
+        else:
+            return None
+        mask = np.isin(column, values)
+        return ~mask if operator in ("$ne", "$nin") else mask
+
+    def search(self, query_embeddings: List[Any], n_results: int,
+               where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        """
+        Exact nearest chunks for each query.
+
+        Returns:
+            Chroma-style results (ids, documents, metadatas, distances)
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        results: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        mask = self.mask(where)
+        if mask is None:
+            rows, matrix, norms = np.arange(len(self)), self.vectors, self.norms
+        else:
+            rows = np.flatnonzero(mask)
+            matrix, norms = self.vectors[rows], self.norms[rows]
+        distances = compute_distances(self.space, queries, matrix, norms) if len(rows) else None
+        for position in range(len(queries)):
+            best, best_distances = [], []
+            if distances is not None:
+                order = top_k(distances[position], n_results)
+                best, best_distances = rows[order].tolist(), distances[position][order].tolist()
+            results["ids"].append([self.ids[row] for row in best])
+            results["documents"].append([self.documents[row] for row in best])
+            results["metadatas"].append([self.metadata(row) for row in best])
+            results["distances"].append(best_distances)
+        return results
+
+    def vector(self, doc_id: str) -> Optional[np.ndarray]:
+        """Stored vector for an ID, or None (the ID index is built on first use)"""
+        if self._positions is None:
+            self._positions = {self.ids[row]: row for row in range(len(self))}
+        row = self._positions.get(doc_id)
+        return None if row is None else np.array(self.vectors[row])
+
+
+def export_snapshot(content_collection, catalog_collection, path: str, space: str = "l2",
+                    embedding_model: Optional[str] = None, page_size: int = 10000):
+    """Write a snapshot of a content collection and its course catalog"""
+    # Read the versions first: a write during the export makes the snapshot look stale, not fresh
+    source = {
+        "collection": content_collection.name,
+        "version": collection_version(content_collection),
+        "catalog_collection": catalog_collection.name,
+        "catalog_version": collection_version(catalog_collection),
+    }
+    stored = read_collection(content_collection, page_size)
+    catalog = catalog_collection.get(include=["metadatas"])['metadatas'] or []
+    IndexSnapshot.write(path, stored["ids"], stored["embeddings"], stored["documents"], stored["metadatas"],
+                        catalog, space=space, embedding_model=embedding_model, source=source)
+
+
+def main():
+    import chromadb
+    from chromadb.config import Settings
+    from index_generations import live_collection_names
+    from vector_math import collection_space
+
+    parser = argparse.ArgumentParser(description="Export the content index as a read-only snapshot")
+    parser.add_argument("--chroma-path", default="./chroma_db")
+    parser.add_argument("--output", default="./index_snapshot")
+    parser.add_argument("--tenant", default=None, help="Tenant namespace (output path is not changed)")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=args.chroma_path, settings=Settings(anonymized_telemetry=False))
+    catalog_name, content_name = live_collection_names(args.chroma_path, args.tenant)
+    content = client.get_collection(content_name)
+    export_snapshot(content, client.get_collection(catalog_name), args.output,
+                    space=collection_space(content))
+    snapshot = IndexSnapshot.load(args.output)
+    print(f"Wrote {args.output}: {len(snapshot)} chunks, {len(snapshot.catalog)} courses")
+
+
+if __name__ == "__main__":
+    main()
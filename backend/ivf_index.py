@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""IVF (inverted file) vector index with k-means coarse partitions"""
+
+import argparse
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from vector_math import VectorBlock, compute_distances
+from versioned_dir import open_current, publish
+
+
+def nearest_centroids(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+    """Index of the closest (squared L2) centroid for each vector"""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    centroid_norms = np.linalg.norm(centroids, axis=1)
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size]
+        labels[start:start + batch_size] = compute_distances("l2", batch, centroids, centroid_norms).argmin(axis=1)
+    return labels
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Lloyd's k-means with random initial centroids; empty clusters are
+    re-seeded from random vectors.
+
+    Returns:
+        (k, dimension) float32 centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        labels = nearest_centroids(vectors, centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=k)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        centroids[filled] = np.add.reduceat(vectors[order], starts, axis=0) / counts[filled, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+    return centroids
+
+
+class IVFIndex:
+    """
+    Vectors split into partitions around k-means centroids.
+
+    Each partition is a VectorBlock (contiguous float32 rows with
+    precomputed course/lesson masks). A query ranks the centroids, scans
+    the nprobe closest partitions exactly with the where filter pushed
+    down into each, and merges their top hits. Filtered queries keep
+    probing further partitions until they have enough hits.
+
+    Partitions are replaced copy-on-write, so readers never lock. New
+    chunks are assigned to their nearest existing centroid; rebuild the
+    index offline to re-train centroids after large changes.
+    """
+
+    FORMAT_VERSION = 1
+    # Files of one saved index (see save)
+    FILES = ("manifest.json", "records.json", "centroids.npy", "vectors.npy", "list_sizes.npy")
+
+    def __init__(self, centroids: np.ndarray, partitions: List[VectorBlock], space: str = "l2",
+                 manifest: Optional[Dict[str, Any]] = None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.centroid_norms = np.linalg.norm(self.centroids, axis=1)
+        self.partitions = partitions
+        self.space = space
+        # Manifest of a loaded index (None if built in memory)
+        self.manifest = manifest
+        self._partition_of = {
+            doc_id: number for number, partition in enumerate(partitions) for doc_id in partition.ids
+        }
+
+    @classmethod
+    def build(cls, ids: List[str], embeddings: Any, documents: List[str],
+              metadatas: List[Dict[str, Any]], space: str = "l2", n_lists: int = 0,
+              iterations: int = 20, train_size: int = 0, seed: int = 0) -> 'IVFIndex':
+        """
+        Train centroids and partition the given chunks.
+
+        Args:
+            n_lists: Number of partitions (0 picks about sqrt(chunk count))
+            iterations: k-means iterations
+            train_size: Vectors sampled for training (0 trains on all of them)
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if not len(ids):
+            return cls(np.zeros((0, vectors.shape[1] if vectors.ndim == 2 else 0), dtype=np.float32), [], space)
+        vectors = vectors.reshape(len(ids), -1)
+        n_lists = min(n_lists or max(1, round(math.sqrt(len(ids)))), len(ids))
+
+        training = cls._training_vectors(vectors, space)
+        if train_size and train_size < len(training):
+            training = training[np.random.default_rng(seed).choice(len(training), train_size, replace=False)]
+        centroids = kmeans(training, n_lists, iterations, seed)
+
+        labels = nearest_centroids(cls._training_vectors(vectors, space), centroids)
+        partitions = []
+        for number in range(n_lists):
+            rows = np.flatnonzero(labels == number)
+            partitions.append(VectorBlock(
+                [ids[row] for row in rows],
+                vectors[rows],
+                [documents[row] for row in rows],
+                [metadatas[row] for row in rows],
+                dimension=vectors.shape[1]
+            ))
+        return cls(centroids, partitions, space)
+
+    @staticmethod
+    def _training_vectors(vectors: np.ndarray, space: str) -> np.ndarray:
+        """Vectors as clustered: unit length for cosine space"""
+        if space == "cosine":
+            return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def __len__(self) -> int:
+        return len(self._partition_of)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.partitions)
+
+    def stats(self) -> Dict[str, Any]:
+        """Partition count and size distribution"""
+        sizes = [len(partition) for partition in self.partitions] or [0]
+        return {
+            "chunks": len(self),
+            "lists": self.n_lists,
+            "min_list_size": min(sizes),
+            "max_list_size": max(sizes),
+            "mean_list_size": sum(sizes) / len(sizes),
+        }
+
+    def search(self, query_embeddings: List[Any], n_results: int, nprobe: int,
+               where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        """
+        Approximate nearest chunks for each query.
+
+        Returns:
+            Chroma-style results (ids, documents, metadatas, distances)
+        """
+        results: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        if not self.partitions:
+            for key in results:
+                results[key] = [[] for _ in queries]
+            return results
+
+        centroid_space = "cosine" if self.space == "cosine" else "l2"
+        probe_order = np.argsort(compute_distances(centroid_space, queries, self.centroids, self.centroid_norms), axis=1)
+        for query, order in zip(queries, probe_order):
+            hits = []  # (distance, partition, row)
+            for probed, number in enumerate(order):
+                if probed >= nprobe and len(hits) >= n_results:
+                    break
+                partition = self.partitions[number]
+                if not len(partition):
+                    continue
+                rows, distances = partition.search(self.space, query, n_results, where)[0]
+                hits.extend(zip(distances.tolist(), [number] * len(rows), rows.tolist()))
+            hits.sort(key=lambda hit: hit[0])
+            hits = hits[:n_results]
+            results["ids"].append([self.partitions[number].ids[row] for _, number, row in hits])
+            results["documents"].append([self.partitions[number].documents[row] for _, number, row in hits])
+            results["metadatas"].append([self.partitions[number].metadatas[row] for _, number, row in hits])
+            results["distances"].append([distance for distance, _, _ in hits])
+        return results
+
+    def vector(self, doc_id: str) -> Optional[np.ndarray]:
+        """Stored vector for an ID, or None"""
+        number = self._partition_of.get(doc_id)
+        return None if number is None else self.partitions[number].vector(doc_id)
+
+    def upsert(self, ids: List[str], embeddings: Any, documents: List[str],
+               metadatas: List[Dict[str, Any]]) -> 'IVFIndex':
+        """New index with the chunks assigned to their nearest centroids"""
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        if not self.partitions:
+            return IVFIndex.build(ids, vectors, documents, metadatas, self.space)
+
+        # Drop old copies of re-added chunks from whichever partition holds them
+        partitions = list(self.remove(ids).partitions)
+
+        labels = nearest_centroids(self._training_vectors(vectors, self.space), self.centroids)
+        for number in np.unique(labels).tolist():
+            rows = np.flatnonzero(labels == number)
+            partitions[number] = partitions[number].upsert(
+                [ids[row] for row in rows],
+                vectors[rows],
+                [documents[row] for row in rows],
+                [metadatas[row] for row in rows]
+            )
+        return IVFIndex(self.centroids, partitions, self.space)
+
+    def remove(self, ids: List[str]) -> 'IVFIndex':
+        """New index without the given chunks (centroids unchanged)"""
+        stale: Dict[int, List[str]] = {}
+        for doc_id in ids:
+            if doc_id in self._partition_of:
+                stale.setdefault(self._partition_of[doc_id], []).append(doc_id)
+        if not stale:
+            return self
+        partitions = list(self.partitions)
+        for number, doc_ids in stale.items():
+            partitions[number] = partitions[number].remove(doc_ids)
+        return IVFIndex(self.centroids, partitions, self.space)
+
+    def save(self, path: str, source: Optional[Dict[str, Any]] = None):
+        """
+        Write the index to a directory (vectors stored partition by
+        partition). The new files replace any earlier index atomically (see
+        versioned_dir.publish), so loaders never see a partial one.
+
+        Args:
+            source: Where the chunks were read from (e.g. collection name
+                and version), kept in the manifest for staleness checks
+        """
+        publish(path, lambda directory: self._write(directory, source), legacy_files=self.FILES)
+
+    def _write(self, path: str, source: Optional[Dict[str, Any]]):
+        """Write the index files into an empty directory"""
+        dimension = self.centroids.shape[1]
+        vectors = [partition.matrix for partition in self.partitions]
+        np.save(os.path.join(path, "centroids.npy"), self.centroids)
+        np.save(os.path.join(path, "vectors.npy"),
+                np.vstack(vectors) if vectors else np.zeros((0, dimension), dtype=np.float32))
+        np.save(os.path.join(path, "list_sizes.npy"),
+                np.array([len(partition) for partition in self.partitions], dtype=np.int64))
+        with open(os.path.join(path, "records.json"), "w") as f:
+            json.dump({
+                "ids": [doc_id for partition in self.partitions for doc_id in partition.ids],
+                "documents": [document for partition in self.partitions for document in partition.documents],
+                "metadatas": [metadata for partition in self.partitions for metadata in partition.metadatas],
+            }, f)
+        with open(os.path.join(path, "manifest.json"), "w") as f:
+            json.dump({
+                "version": self.FORMAT_VERSION,
+                "space": self.space,
+                "lists": self.n_lists,
+                "chunks": len(self),
+                "dimension": dimension,
+                "source": source or {},
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['IVFIndex']:
+        """Read the index written by save (vectors are memory-mapped), or None if there is none"""
+        return open_current(path, cls._read)
+
+    @classmethod
+    def _read(cls, path: str) -> 'IVFIndex':
+        """Read the index files in a directory"""
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported IVF index version: {manifest.get('version')}")
+        with open(os.path.join(path, "records.json")) as f:
+            records = json.load(f)
+        centroids = np.load(os.path.join(path, "centroids.npy"))
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        sizes = np.load(os.path.join(path, "list_sizes.npy"))
+
+        partitions = []
+        start = 0
+        for size in sizes.tolist():
+            end = start + size
+            partitions.append(VectorBlock(
+                records["ids"][start:end],
+                vectors[start:end],
+                records["documents"][start:end],
+                records["metadatas"][start:end],
+                dimension=manifest["dimension"]
+            ))
+            start = end
+        return cls(centroids, partitions, manifest["space"], manifest)
+
+
+def read_collection(collection, page_size: int = 10000) -> Dict[str, List[Any]]:
+    """All chunks of a Chroma collection with embeddings, read page by page"""
+    stored: Dict[str, List[Any]] = {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings", "documents", "metadatas"],
+                              limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        stored["ids"].extend(page["ids"])
+        stored["embeddings"].extend(page["embeddings"])
+        stored["documents"].extend(page["documents"] or [])
+        stored["metadatas"].extend(page["metadatas"] or [])
+        offset += len(page["ids"])
+    return stored
+
+
+def main():
+    import chromadb
+    from chromadb.config import Settings
+    from index_generations import collection_version, live_collection_names
+    from vector_math import collection_space
+
+    parser = argparse.ArgumentParser(description="Build an IVF index from the course_content collection")
+    parser.add_argument("--chroma-path", default="./chroma_db")
+    parser.add_argument("--output", default="./ivf_index")
+    parser.add_argument("--tenant", default=None, help="Tenant namespace (output path is not changed)")
+    parser.add_argument("--lists", type=int, default=0, help="Partitions (0 = about sqrt(chunks))")
+    parser.add_argument("--iterations", type=int, default=20, help="k-means iterations")
+    parser.add_argument("--train-size", type=int, default=0, help="Training sample size (0 = all chunks)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=args.chroma_path, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_collection(live_collection_names(args.chroma_path, args.tenant)[1])
+    source = {"collection": collection.name, "version": collection_version(collection)}
+    stored = read_collection(collection)
+    print(f"Training on {len(stored['ids'])} chunks...")
+    index = IVFIndex.build(stored["ids"], stored["embeddings"], stored["documents"], stored["metadatas"],
+                           space=collection_space(collection), n_lists=args.lists,
+                           iterations=args.iterations, train_size=args.train_size, seed=args.seed)
+    index.save(args.output, source)
+    print(f"Wrote {args.output}: {index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from filters import matches_where
+
+
+class BM25Index:
+    """
+    Incrementally maintained in-memory BM25 inverted index.
+
+    Keeps each document's text and metadata so hits can be returned (and
+    filtered with the same where clauses as Chroma) without another lookup.
+    """
+
+    TOKEN_PATTERN = re.compile(r"\w+")
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._documents: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._total_length = 0
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """Lowercased word tokens (identifiers split on punctuation)"""
+        return cls.TOKEN_PATTERN.findall(text.lower())
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, doc_ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Index documents, replacing any existing entries with the same IDs"""
+        with self._lock:
+            for doc_id, document, metadata in zip(doc_ids, documents, metadatas):
+                self._remove(doc_id)
+                counts = Counter(self.tokenize(document))
+                for term, count in counts.items():
+                    self._postings.setdefault(term, {})[doc_id] = count
+                length = sum(counts.values())
+                self._doc_lengths[doc_id] = length
+                self._total_length += length
+                self._documents[doc_id] = (document, metadata)
+
+    def remove(self, doc_ids: List[str]):
+        """Remove documents from the index"""
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        """Remove one document (caller holds the lock)"""
+        if doc_id not in self._documents:
+            return
+        document, _ = self._documents.pop(doc_id)
+        for term in set(self.tokenize(document)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def clear(self):
+        """Remove all documents"""
+        with self._lock:
+            self._postings.clear()
+            self._doc_lengths.clear()
+            self._documents.clear()
+            self._total_length = 0
+
+    def get(self, doc_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Stored (document, metadata) for an ID"""
+        return self._documents.get(doc_id)
+
+    def search(self, query: str, limit: int,
+               where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """
+        Score documents against the query with BM25.
+
+        Args:
+            query: Query text
+            limit: Maximum number of hits
+            where: Optional Chroma-style metadata filter
+
+        Returns:
+            (doc_id, score) pairs, best first
+        """
+        terms = set(self.tokenize(query))
+        with self._lock:
+            count = len(self._documents)
+            if not count or not terms:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[str, float] = {}
+            allowed: Dict[str, bool] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    if where:
+                        if doc_id not in allowed:
+                            allowed[doc_id] = matches_where(self._documents[doc_id][1], where)
+                        if not allowed[doc_id]:
+                            continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
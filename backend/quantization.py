@@ -0,0 +1,337 @@
+import glob
+import os
+import socket
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from vector_math import MetadataMasks, compute_distances, distances_from_products, top_k
+
+# +1/-1 for each bit (most significant first, as np.packbits) of every byte value
+_BYTE_SIGNS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float32) * 2 - 1
+
+
+class ScalarQuantizer:
+    """
+    int8 codes: each dimension is mapped linearly from its [min, max] range
+    to 0..255. Values outside the fitted range are clipped (rescoring with
+    the exact vectors corrects the ranking).
+    """
+
+    name = "int8"
+    bytes_per_dimension = 1.0
+
+    def __init__(self, vectors: np.ndarray):
+        self.offset = vectors.min(axis=0) if len(vectors) else np.zeros(vectors.shape[1], dtype=np.float32)
+        high = vectors.max(axis=0) if len(vectors) else self.offset + 1.0
+        self.scale = np.maximum(high - self.offset, 1e-12) / 255.0
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint((vectors - self.offset) / self.scale), 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale + self.offset
+
+    def distances(self, space: str, query: np.ndarray, codes: np.ndarray, norms: np.ndarray,
+                  batch_size: int = 65536) -> np.ndarray:
+        """
+        Approximate distances from the query to the decoded codes, without
+        decoding: q . decode(c) = (q * scale) . c + q . offset, combined
+        with the exact row norms.
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        weights = query * self.scale
+        products = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), batch_size):
+            products[start:start + batch_size] = codes[start:start + batch_size] @ weights
+        products += float(query @ self.offset)
+        return distances_from_products(space, products[None, :], np.linalg.norm(query), norms)[0]
+
+
+class BinaryQuantizer:
+    """
+    1-bit codes: each dimension becomes the sign of its offset from the
+    mean, packed 8 per byte.
+
+    Candidates are ranked asymmetrically: the full-precision query is
+    scored against each code's signs, using a per-byte lookup table of
+    partial dot products, which ranks far better than Hamming distance
+    between two binarized vectors.
+    """
+
+    name = "binary"
+    bytes_per_dimension = 0.125
+
+    def __init__(self, vectors: np.ndarray):
+        self.center = vectors.mean(axis=0) if len(vectors) else np.zeros(vectors.shape[1], dtype=np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(np.atleast_2d(vectors) > self.center, axis=1)
+
+    def distances(self, space: str, query: np.ndarray, codes: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        """Negated dot product of the centred query with each code's signs"""
+        centred = np.asarray(query, dtype=np.float32).ravel() - self.center
+        padded = np.zeros(codes.shape[1] * 8, dtype=np.float32)
+        padded[:len(centred)] = centred
+        # table[j, byte] = contribution of code byte j having that value
+        table = padded.reshape(-1, 8) @ _BYTE_SIGNS.T
+        return -table[np.arange(codes.shape[1]), codes].sum(axis=1)
+
+
+QUANTIZERS = {
+    "int8": ScalarQuantizer,
+    "binary": BinaryQuantizer,
+}
+
+
+@dataclass
+class _CodeState:
+    """One immutable version of a QuantizedIndex"""
+    ids: List[str]
+    positions: Dict[str, int]
+    file_rows: np.ndarray   # Row of each chunk in the vectors file
+    codes: np.ndarray
+    norms: np.ndarray
+    documents: List[str]
+    metadatas: List[Dict[str, Any]]
+    masks: MetadataMasks
+    quantizer: Any
+    vectors: Optional[np.memmap]
+    vectors_file: str
+    rows_on_disk: int
+    dimension: int
+
+
+class QuantizedIndex:
+    """
+    Compact codes in RAM for candidate generation, exact fp32 vectors on disk.
+
+    Each query ranks the (filtered) codes, takes the best
+    n_results * oversample candidates, and rescores them with their exact
+    vectors read from a memory-mapped file. Only the codes, row norms and
+    metadata stay resident, so memory for the vectors drops 4x (int8) or
+    32x (binary).
+
+    Re-added chunks get a new file row and their old row is abandoned.
+    Every build writes a new file next to vectors_path, named after this
+    host and process, and later adds append only to it: workers sharing
+    vectors_path never truncate or extend a file another one has mapped.
+    A rebuild or reset removes the index's previous file, and files left
+    by processes that are no longer running on this host.
+    """
+
+    def __init__(self, vectors_path: str, mode: str = "int8", oversample: int = 4):
+        if mode not in QUANTIZERS:
+            raise ValueError(f"Unknown quantization mode '{mode}'. Choose from: {', '.join(QUANTIZERS)}")
+        self.vectors_path = vectors_path
+        self.mode = mode
+        self.oversample = oversample
+        self._write_lock = threading.Lock()
+        self._state: Optional[_CodeState] = None
+
+    def build(self, ids: List[str], embeddings: Any, documents: List[str], metadatas: List[Dict[str, Any]],
+              dimension: Optional[int] = None):
+        """Replace the index contents, writing a new vectors file"""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors = vectors.reshape(len(ids), dimension or (vectors.shape[-1] if vectors.size else 0))
+        with self._write_lock:
+            self._build(ids, vectors, documents, metadatas)
+
+    def _build(self, ids: List[str], vectors: np.ndarray, documents: List[str],
+               metadatas: List[Dict[str, Any]]):
+        """Fit the quantizer and write the vectors file (caller holds the write lock)"""
+        directory = os.path.dirname(self.vectors_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._remove_stale_files()
+        vectors_file = f"{self.vectors_path}.{socket.gethostname()}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        with open(vectors_file, "wb") as f:
+            f.write(vectors.tobytes())
+        previous = self._state
+        quantizer = QUANTIZERS[self.mode](vectors)
+        self._state = self._make_state(
+            quantizer, list(ids), np.arange(len(ids)), quantizer.encode(vectors),
+            np.linalg.norm(vectors, axis=1), list(documents), list(metadatas),
+            vectors_file=vectors_file, rows_on_disk=len(ids), dimension=vectors.shape[1]
+        )
+        if previous is not None:
+            # Searches still holding the old state keep its pages until they finish
+            self._remove_file(previous.vectors_file)
+
+    def reset(self):
+        """Drop the contents and remove the vectors file; the next build starts afresh"""
+        with self._write_lock:
+            previous, self._state = self._state, None
+            if previous is not None:
+                self._remove_file(previous.vectors_file)
+
+    def _remove_stale_files(self):
+        """Remove vectors files written by processes on this host that have exited"""
+        host = socket.gethostname()
+        for path in glob.glob(glob.escape(self.vectors_path) + ".*"):
+            parts = path[len(self.vectors_path) + 1:].rsplit(".", 2)
+            if len(parts) != 3 or parts[0] != host or not parts[1].isdigit():
+                continue
+            try:
+                os.kill(int(parts[1]), 0)
+            except ProcessLookupError:
+                self._remove_file(path)
+            except PermissionError:
+                pass
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _make_state(self, quantizer, ids, file_rows, codes, norms, documents, metadatas,
+                    vectors_file: str, rows_on_disk: int, dimension: int) -> '_CodeState':
+        """Immutable snapshot of the index arrays"""
+        vectors = None
+        if rows_on_disk and dimension:
+            vectors = np.memmap(vectors_file, dtype=np.float32, mode="r", shape=(rows_on_disk, dimension))
+        return _CodeState(
+            ids=ids,
+            positions={doc_id: position for position, doc_id in enumerate(ids)},
+            file_rows=np.asarray(file_rows, dtype=np.int64),
+            codes=codes,
+            norms=np.asarray(norms, dtype=np.float32),
+            documents=documents,
+            metadatas=metadatas,
+            masks=MetadataMasks(metadatas),
+            quantizer=quantizer,
+            vectors=vectors,
+            vectors_file=vectors_file,
+            rows_on_disk=rows_on_disk,
+            dimension=dimension
+        )
+
+    @property
+    def is_built(self) -> bool:
+        return self._state is not None
+
+    def __len__(self) -> int:
+        return len(self._state.ids) if self._state else 0
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Resident bytes for codes versus the fp32 vectors they replace"""
+        state = self._state
+        if not state:
+            return {"chunks": 0, "code_bytes": 0, "float32_bytes": 0, "compression": 0.0}
+        code_bytes = state.codes.nbytes + state.norms.nbytes
+        float32_bytes = len(state.ids) * state.dimension * 4
+        return {
+            "chunks": len(state.ids),
+            "code_bytes": code_bytes,
+            "float32_bytes": float32_bytes,
+            "compression": float32_bytes / code_bytes if code_bytes else 0.0,
+        }
+
+    def add(self, ids: List[str], embeddings: Any, documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Append chunks (replacing any with the same IDs) using the fitted quantizer"""
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        with self._write_lock:
+            state = self._state
+            if state is None or not state.ids:
+                # Nothing to keep: fit the quantizer on these vectors instead
+                self._build(ids, vectors, documents, metadatas)
+                return
+            # The file is this index's own, so appending never moves rows under another process
+            with open(state.vectors_file, "ab") as f:
+                f.write(vectors.tobytes())
+            replaced = {state.positions[doc_id] for doc_id in ids if doc_id in state.positions}
+            keep = [position for position in range(len(state.ids)) if position not in replaced]
+            start = state.rows_on_disk
+            self._state = self._make_state(
+                state.quantizer,
+                [state.ids[position] for position in keep] + list(ids),
+                np.concatenate([state.file_rows[keep], np.arange(start, start + len(ids))]),
+                np.vstack([state.codes[keep], state.quantizer.encode(vectors)]),
+                np.concatenate([state.norms[keep], np.linalg.norm(vectors, axis=1)]),
+                [state.documents[position] for position in keep] + list(documents),
+                [state.metadatas[position] for position in keep] + list(metadatas),
+                vectors_file=state.vectors_file,
+                rows_on_disk=start + len(ids),
+                dimension=vectors.shape[1]
+            )
+
+    def remove(self, ids: List[str]):
+        """Drop chunks (their rows in the vectors file are abandoned)"""
+        with self._write_lock:
+            state = self._state
+            if state is None:
+                return
+            dropped = {state.positions[doc_id] for doc_id in ids if doc_id in state.positions}
+            if not dropped:
+                return
+            keep = [position for position in range(len(state.ids)) if position not in dropped]
+            self._state = self._make_state(
+                state.quantizer,
+                [state.ids[position] for position in keep],
+                state.file_rows[keep],
+                state.codes[keep],
+                state.norms[keep],
+                [state.documents[position] for position in keep],
+                [state.metadatas[position] for position in keep],
+                vectors_file=state.vectors_file,
+                rows_on_disk=state.rows_on_disk,
+                dimension=state.dimension
+            )
+
+    def vector(self, doc_id: str) -> Optional[np.ndarray]:
+        """Exact stored vector for an ID, or None"""
+        state = self._state
+        position = state.positions.get(doc_id) if state else None
+        if position is None:
+            return None
+        return np.array(state.vectors[state.file_rows[position]])
+
+    def search(self, space: str, query_embeddings: List[Any], n_results: int,
+               where: Optional[Dict[str, Any]] = None,
+               oversample: Optional[int] = None) -> Dict[str, List[List[Any]]]:
+        """
+        Nearest chunks for each query: candidates from the codes, exact
+        distances from the vectors file.
+
+        Returns:
+            Chroma-style results (ids, documents, metadatas, distances)
+        """
+        state = self._state
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        results: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if state is None:
+            for key in results:
+                results[key] = [[] for _ in queries]
+            return results
+
+        mask = state.masks.mask(where)
+        positions = np.arange(len(state.ids)) if mask is None else np.flatnonzero(mask)
+        depth = n_results * (oversample or self.oversample)
+        for query in queries:
+            if not len(positions):
+                best, distances = positions, np.zeros(0, dtype=np.float32)
+            else:
+                if mask is None:
+                    codes, norms = state.codes, state.norms
+                else:
+                    codes, norms = state.codes[positions], state.norms[positions]
+                approximate = state.quantizer.distances(space, query, codes, norms)
+                candidates = positions[top_k(approximate, depth)]
+
+                # Rescore with the exact vectors, read in file order
+                file_rows = state.file_rows[candidates]
+                order = np.argsort(file_rows)
+                exact_vectors = np.asarray(state.vectors[file_rows[order]])
+                exact = compute_distances(space, query, exact_vectors, state.norms[candidates[order]])[0]
+                ranked = top_k(exact, n_results)
+                best, distances = candidates[order][ranked], exact[ranked]
+            results["ids"].append([state.ids[position] for position in best])
+            results["documents"].append([state.documents[position] for position in best])
+            results["metadatas"].append([state.metadatas[position] for position in best])
+            results["distances"].append(distances.tolist())
+        return results
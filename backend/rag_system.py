@@ -16,7 +16,37 @@ class RAGSystem:
         
         # Initialize core components
         self.document_processor = DocumentProcessor(config.CHUNK_SIZE, config.CHUNK_OVERLAP)
-        self.vector_store = VectorStore(config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS)
+        self.vector_store = VectorStore(
+            config.CHROMA_PATH,
+            config.EMBEDDING_MODEL,
+            config.MAX_RESULTS,
+            embedding_cache_size=config.EMBEDDING_CACHE_SIZE,
+            embedding_provider=config.EMBEDDING_PROVIDER,
+            embedding_dimension=config.EMBEDDING_DIMENSION,
+            embedding_server_socket=config.EMBEDDING_SERVER_SOCKET,
+            search_batch_window_ms=config.SEARCH_BATCH_WINDOW_MS,
+            search_batch_max_size=config.SEARCH_BATCH_MAX_SIZE,
+            course_resolve_max_distance=config.COURSE_RESOLVE_MAX_DISTANCE,
+            hybrid_lexical_weight=config.HYBRID_LEXICAL_WEIGHT,
+            hybrid_vector_weight=config.HYBRID_VECTOR_WEIGHT,
+            hybrid_candidates=config.HYBRID_CANDIDATES,
+            rrf_k=config.RRF_K,
+            search_backend=config.SEARCH_BACKEND,
+            search_backend_options=self._search_backend_options(config),
+            search_cache_size=config.SEARCH_CACHE_SIZE,
+            search_cache_ttl_seconds=config.SEARCH_CACHE_TTL_SECONDS,
+            context_chunks=config.SEARCH_CONTEXT_CHUNKS,
+            async_workers=config.ASYNC_SEARCH_WORKERS,
+            hnsw_settings=self._hnsw_settings(config),
+            chroma_server_url=config.CHROMA_SERVER_URL or None,
+            max_distance=config.SEARCH_MAX_DISTANCE or None,
+            max_distance_ratio=config.SEARCH_MAX_DISTANCE_RATIO or None,
+            distance_knee=config.SEARCH_DISTANCE_KNEE,
+            cutoff_min_results=config.SEARCH_MIN_RESULTS,
+            revalidate_seconds=config.CORPUS_REVALIDATE_SECONDS,
+            generation_grace_seconds=config.GENERATION_GRACE_SECONDS,
+            max_tenants=config.MAX_OPEN_TENANTS
+        )
         self.ai_generator = AIGenerator(config.ANTHROPIC_API_KEY, config.ANTHROPIC_MODEL)
         self.session_manager = SessionManager(config.MAX_HISTORY)
         
@@ -30,56 +60,114 @@ class RAGSystem:
         # Initialize command processor
         self.command_processor = CommandProcessor()
     
-    def add_course_document(self, file_path: str) -> Tuple[Course, int]:
+    def _store(self, tenant_id: Optional[str] = None, create: bool = False):
+        """
+        Vector store of a tenant (None = the default namespace). Only writes
+        pass create=True; reading an unknown tenant raises LookupError.
+        """
+        return self.vector_store.for_tenant(tenant_id, create=create) if tenant_id else self.vector_store
+
+    @staticmethod
+    def _search_backend_options(config) -> Dict:
+        """Settings for the configured content search backend"""
+        if config.SEARCH_BACKEND == "ivf":
+            return {
+                "index_path": config.IVF_INDEX_PATH,
+                "n_lists": config.IVF_LISTS,
+                "nprobe": config.IVF_NPROBE,
+                "iterations": config.IVF_TRAIN_ITERATIONS,
+            }
+        if config.SEARCH_BACKEND == "quantized":
+            return {
+                "vectors_path": config.QUANTIZED_VECTORS_PATH,
+                "mode": config.QUANTIZATION_MODE,
+                "oversample": config.QUANTIZATION_OVERSAMPLE,
+            }
+        if config.SEARCH_BACKEND == "sharded":
+            return {"shards": config.CONTENT_SHARDS, "max_workers": config.SHARD_FANOUT_WORKERS}
+        if config.SEARCH_BACKEND == "snapshot":
+            return {"path": config.INDEX_SNAPSHOT_PATH}
+        return {}
+
+    @staticmethod
+    def _hnsw_settings(config) -> Dict:
+        """HNSW parameters of the catalog and content collections"""
+        return {
+            "course_catalog": {
+                "space": config.CATALOG_HNSW_SPACE,
+                "ef_construction": config.CATALOG_HNSW_CONSTRUCTION_EF,
+                "ef_search": config.CATALOG_HNSW_SEARCH_EF,
+                "max_neighbors": config.CATALOG_HNSW_M,
+            },
+            "course_content": {
+                "space": config.CONTENT_HNSW_SPACE,
+                "ef_construction": config.CONTENT_HNSW_CONSTRUCTION_EF,
+                "ef_search": config.CONTENT_HNSW_SEARCH_EF,
+                "max_neighbors": config.CONTENT_HNSW_M,
+            },
+        }
+
+    def add_course_document(self, file_path: str, replace: bool = False,
+                            tenant_id: Optional[str] = None) -> Tuple[Course, int]:
         """
         Add a single course document to the knowledge base.
         
         Args:
             file_path: Path to the course document
+            replace: Replace any stored version of the course atomically
+            tenant_id: Tenant whose knowledge base receives the course (None = default)
             
         Returns:
             Tuple of (Course object, number of chunks created)
         """
+        store = self._store(tenant_id, create=True)
         try:
             # Process the document
             course, course_chunks = self.document_processor.process_course_document(file_path)
             
+            if replace:
+                store.replace_course(course, course_chunks)
+                return course, len(course_chunks)
+
             # Add course metadata to vector store for semantic search
-            self.vector_store.add_course_metadata(course)
+            store.add_course_metadata(course)
             
             # Add course content chunks to vector store
-            self.vector_store.add_course_content(course_chunks)
+            store.add_course_content(course_chunks)
             
             return course, len(course_chunks)
         except Exception as e:
             print(f"Error processing course document {file_path}: {e}")
             return None, 0
     
-    def add_course_folder(self, folder_path: str, clear_existing: bool = False) -> Tuple[int, int]:
+    def add_course_folder(self, folder_path: str, clear_existing: bool = False,
+                          tenant_id: Optional[str] = None) -> Tuple[int, int]:
         """
         Add all course documents from a folder.
         
         Args:
             folder_path: Path to folder containing course documents
             clear_existing: Whether to clear existing data first
+            tenant_id: Tenant whose knowledge base receives the courses (None = default)
             
         Returns:
             Tuple of (total courses added, total chunks created)
         """
+        store = self._store(tenant_id, create=True)
         total_courses = 0
         total_chunks = 0
         
         # Clear existing data if requested
         if clear_existing:
             print("Clearing existing data for fresh rebuild...")
-            self.vector_store.clear_all_data()
+            store.clear_all_data()
         
         if not os.path.exists(folder_path):
             print(f"Folder {folder_path} does not exist")
             return 0, 0
         
         # Get existing course titles to avoid re-processing
-        existing_course_titles = set(self.vector_store.get_existing_course_titles())
+        existing_course_titles = set(store.get_existing_course_titles())
         
         # Process each file in the folder
         for file_name in os.listdir(folder_path):
@@ -92,8 +180,8 @@ class RAGSystem:
                     
                     if course and course.title not in existing_course_titles:
                         # This is a new course - add it to the vector store
-                        self.vector_store.add_course_metadata(course)
-                        self.vector_store.add_course_content(course_chunks)
+                        store.add_course_metadata(course)
+                        store.add_course_content(course_chunks)
                         total_courses += 1
                         total_chunks += len(course_chunks)
                         print(f"Added new course: {course.title} ({len(course_chunks)} chunks)")
@@ -104,14 +192,49 @@ class RAGSystem:
                     print(f"Error processing {file_name}: {e}")
         
         return total_courses, total_chunks
+
+    def reindex_folder(self, folder_path: str, tenant_id: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Rebuild the whole index from a folder without emptying it first: a
+        new index generation is built while the current one keeps serving,
+        then validated and switched to atomically (see
+        VectorStore.begin_generation). On any error the current generation
+        stays live.
+        
+        Returns:
+            Tuple of (total courses indexed, total chunks created)
+        """
+        if not os.path.exists(folder_path):
+            print(f"Folder {folder_path} does not exist")
+            return 0, 0
+
+        builder = self._store(tenant_id, create=True).begin_generation()
+        try:
+            for file_name in sorted(os.listdir(folder_path)):
+                file_path = os.path.join(folder_path, file_name)
+                if os.path.isfile(file_path) and file_name.lower().endswith(('.pdf', '.docx', '.txt')):
+                    course, course_chunks = self.document_processor.process_course_document(file_path)
+                    if course:
+                        builder.add_course(course, course_chunks)
+            builder.commit()
+        except Exception as e:
+            builder.abort()
+            print(f"Reindexing {folder_path} failed, keeping the current index: {e}")
+            return 0, 0
+        stats = builder.stats()
+        print(f"Switched to index generation {stats['generation']}: "
+              f"{stats['courses']} courses, {stats['chunks']} chunks")
+        return stats["courses"], stats["chunks"]
     
-    def query(self, query: str, session_id: Optional[str] = None) -> Tuple[str, List[str]]:
+    def query(self, query: str, session_id: Optional[str] = None,
+              tenant_id: Optional[str] = None) -> Tuple[str, List[str]]:
         """
         Process a user query using the RAG system with tool-based search.
         
         Args:
             query: User's question
             session_id: Optional session ID for conversation context
+            tenant_id: Tenant whose courses are searched (None = default)
             
         Returns:
             Tuple of (response, sources list - empty for tool-based approach)
@@ -133,23 +256,30 @@ class RAGSystem:
                 # Create prompt for the AI with clear instructions
                 prompt = f"""Answer this question about course materials: {query}"""
             
+            # Sessions of other tenants are kept apart (the default namespace needs no argument)
+            session_tenant = {"tenant_id": tenant_id} if tenant_id else {}
+            
             # Get conversation history if session exists
             history = None
             if session_id:
                 try:
-                    history = self.session_manager.get_conversation_history(session_id)
+                    history = self.session_manager.get_conversation_history(session_id, **session_tenant)
                     print(f"Retrieved conversation history for session {session_id}")
                 except Exception as e:
                     print(f"Warning: Could not get conversation history: {e}")
             
+            # Tools of this query only: sources never mix with concurrent queries
+            tool_manager = self.tool_manager.request_scope()
+            
             # Generate response using AI with tools
             try:
                 print("Calling AI generator...")
                 response = self.ai_generator.generate_response(
                     query=prompt,
                     conversation_history=history,
-                    tools=self.tool_manager.get_tool_definitions(),
-                    tool_manager=self.tool_manager
+                    tools=tool_manager.get_tool_definitions(),
+                    tool_manager=tool_manager,
+                    tenant_id=tenant_id
                 )
                 print(f"AI response received: {response[:100]}...")
             except Exception as e:
@@ -160,7 +290,10 @@ class RAGSystem:
                 # Fallback: try to use search tool directly
                 try:
                     print("Attempting fallback search...")
-                    search_result = self.tool_manager.execute_tool("search_course_content", query=query)
+                    search_input = {"query": query}
+                    if tenant_id:
+                        search_input["tenant_id"] = tenant_id
+                    search_result = tool_manager.execute_tool("search_course_content", **search_input)
                     if search_result and "No relevant content found" not in search_result:
                         return f"Based on course materials: {search_result}", []
                     else:
@@ -171,22 +304,16 @@ class RAGSystem:
             
             # Get sources from the search tool
             try:
-                sources = self.tool_manager.get_last_sources()
+                sources = tool_manager.get_last_sources()
                 print(f"Retrieved {len(sources)} sources")
             except Exception as e:
                 print(f"Warning: Could not get sources: {e}")
                 sources = []
-
-            # Reset sources after retrieving them
-            try:
-                self.tool_manager.reset_sources()
-            except Exception as e:
-                print(f"Warning: Could not reset sources: {e}")
             
             # Update conversation history
             if session_id:
                 try:
-                    self.session_manager.add_exchange(session_id, query, response)
+                    self.session_manager.add_exchange(session_id, query, response, **session_tenant)
                 except Exception as e:
                     print(f"Warning: Could not update conversation history: {e}")
             
@@ -200,11 +327,14 @@ class RAGSystem:
             traceback.print_exc()
             return f"Query processing failed: {str(e)}", []
     
-    def get_course_analytics(self) -> Dict:
-        """Get analytics about the course catalog"""
+    def get_course_analytics(self, tenant_id: Optional[str] = None) -> Dict:
+        """Get analytics about a tenant's course catalog"""
+        store = self._store(tenant_id)
         return {
-            "total_courses": self.vector_store.get_course_count(),
-            "course_titles": self.vector_store.get_existing_course_titles()
+            "total_courses": store.get_course_count(),
+            "course_titles": store.get_existing_course_titles(),
+            "total_chunks": store.get_chunk_count(),
+            "course_stats": store.get_course_stats()
         }
     
     def get_available_commands(self) -> Dict[str, str]:
@@ -0,0 +1,650 @@
+import hashlib
+import os
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from index_generations import collection_version
+from index_snapshot import IndexSnapshot
+from ivf_index import IVFIndex, read_collection
+from quantization import QuantizedIndex
+from vector_math import VectorBlock, collection_space, hnsw_configuration
+from versioned_dir import current_dir
+
+
+class SearchBackend(ABC):
+    """
+    Engine that answers nearest-neighbour queries over course content.
+
+    Chroma stays the system of record: VectorStore writes every chunk to
+    the content collection and then tells the backend, so backends that
+    keep their own index can mirror the write.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.space = collection_space(collection)
+
+    @abstractmethod
+    def query(self, query_embeddings: List[Any], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        """
+        Nearest chunks for each query embedding.
+
+        Returns:
+            Chroma-style results: ids, documents, metadatas and distances,
+            each a list with one entry per query
+        """
+
+    @abstractmethod
+    def get_embeddings(self, ids: List[str]) -> Tuple[List[str], List[Any]]:
+        """Stored embeddings for the given IDs as (found ids, vectors)"""
+
+    def added(self, ids: List[str], embeddings: Any, documents: List[str],
+              metadatas: List[Dict[str, Any]]):
+        """Chunks were written to the collection"""
+
+    def removed(self, ids: List[str]):
+        """Chunks were deleted from the collection"""
+
+    def cleared(self, collection):
+        """The collection was dropped and recreated"""
+        self.collection = collection
+        self.space = collection_space(collection)
+
+    def rebind(self, collection):
+        """Searches now go to a different, already filled collection"""
+        self.collection = collection
+        self.space = collection_space(collection)
+
+    def changed(self, collection):
+        """Another process wrote to the collection (collection is a fresh handle to it)"""
+        self.rebind(collection)
+
+    def close(self):
+        """Release threads and files the backend holds (the store is being closed)"""
+
+
+class ChromaBackend(SearchBackend):
+    """Query the Chroma collection directly (HNSW + SQLite metadata filters)"""
+
+    def query(self, query_embeddings: List[Any], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where
+        )
+
+    def get_embeddings(self, ids: List[str]) -> Tuple[List[str], List[Any]]:
+        stored = self.collection.get(ids=ids, include=["embeddings"])
+        return stored['ids'], list(stored['embeddings'])
+
+
+class NumpyBackend(SearchBackend):
+    """
+    Exact search over a contiguous float32 matrix of every chunk embedding.
+
+    Course and lesson filters use precomputed masks (see VectorBlock), so a
+    filtered query has no SQLite round trip. The block is read from the
+    collection on first query and replaced copy-on-write on every write.
+    """
+
+    def __init__(self, collection):
+        super().__init__(collection)
+        self._lock = threading.Lock()
+        self._block: Optional[VectorBlock] = None
+
+    def _get_block(self) -> VectorBlock:
+        """Load the arrays from the collection on first use"""
+        if self._block is None:
+            with self._lock:
+                if self._block is None:
+                    stored = self.collection.get(include=["embeddings", "documents", "metadatas"])
+                    self._block = VectorBlock(stored['ids'], stored['embeddings'],
+                                              stored['documents'] or [], stored['metadatas'] or [])
+        return self._block
+
+    def __len__(self) -> int:
+        return len(self._get_block())
+
+    def query(self, query_embeddings: List[Any], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        block = self._get_block()
+        return block_results(block, block.search(self.space, query_embeddings, n_results, where))
+
+    def get_embeddings(self, ids: List[str]) -> Tuple[List[str], List[Any]]:
+        block = self._get_block()
+        found = [doc_id for doc_id in ids if doc_id in block.positions]
+        return found, [block.vector(doc_id) for doc_id in found]
+
+    def added(self, ids: List[str], embeddings: Any, documents: List[str],
+              metadatas: List[Dict[str, Any]]):
+        with self._lock:
+            if self._block is not None:
+                self._block = self._block.upsert(ids, embeddings, documents, metadatas)
+
+    def removed(self, ids: List[str]):
+        with self._lock:
+            if self._block is not None:
+                self._block = self._block.remove(ids)
+
+    def cleared(self, collection):
+        with self._lock:
+            super().cleared(collection)
+            self._block = None
+
+    def rebind(self, collection):
+        with self._lock:
+            super().rebind(collection)
+            self._block = None
+
+
+class IVFBackend(SearchBackend):
+    """
+    Approximate search over an IVF index (see ivf_index.IVFIndex).
+
+    The index is loaded from index_path when it was built from this
+    collection at its current version (see index_generations.
+    touch_collection), otherwise trained from the collection and saved to
+    index_path when one is given. Writes update the index in memory and
+    change the collection's version, so the saved copy is retrained on the
+    next start. Build it offline for large corpora with `python ivf_index.py`.
+
+    Tuning: more lists means smaller partitions (faster scans, lower
+    recall at a fixed nprobe); a higher nprobe scans more partitions per
+    query (higher recall, more latency).
+    """
+
+    def __init__(self, collection, index_path: Optional[str] = None, n_lists: int = 0,
+                 nprobe: int = 8, iterations: int = 20, train_size: int = 0):
+        super().__init__(collection)
+        self.index_path = index_path
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.train_size = train_size
+        self._lock = threading.Lock()
+        self._index: Optional[IVFIndex] = None
+
+    def _get_index(self) -> IVFIndex:
+        """Load or train the index on first use"""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load_index() or self._build_index()
+        return self._index
+
+    def _load_index(self) -> Optional[IVFIndex]:
+        """The saved index, if present and built from the collection as it is now"""
+        if not self.index_path:
+            return None
+        try:
+            index = IVFIndex.load(self.index_path)
+        except Exception as e:
+            print(f"Error loading IVF index: {e}")
+            return None
+        if index is None:
+            return None
+        source = index.manifest.get("source") or {}
+        count = self.collection.count()
+        if (source.get("collection", self.collection.name) != self.collection.name
+                or source.get("version") != collection_version(self.collection)
+                or len(index) != count or index.space != self.space):
+            print(f"IVF index at {self.index_path} was not built from {self.collection.name} as it is now "
+                  f"({len(index)} vs {count} chunks); rebuilding")
+            return None
+        return index
+
+    def _build_index(self) -> IVFIndex:
+        """Train the index from the collection"""
+        # Read the version first: a write during the read makes the saved copy look stale, not fresh
+        source = {"collection": self.collection.name, "version": collection_version(self.collection)}
+        stored = read_collection(self.collection)
+        index = IVFIndex.build(stored['ids'], stored['embeddings'], stored['documents'], stored['metadatas'],
+                               space=self.space, n_lists=self.n_lists, iterations=self.iterations,
+                               train_size=self.train_size)
+        if self.index_path and len(index):
+            index.save(self.index_path, source)
+        return index
+
+    def query(self, query_embeddings: List[Any], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        return self._get_index().search(query_embeddings, n_results, self.nprobe, where)
+
+    def get_embeddings(self, ids: List[str]) -> Tuple[List[str], List[Any]]:
+        index = self._get_index()
+        vectors = [(doc_id, index.vector(doc_id)) for doc_id in ids]
+        found = [(doc_id, vector) for doc_id, vector in vectors if vector is not None]
+        return [doc_id for doc_id, _ in found], [vector for _, vector in found]
+
+    def added(self, ids: List[str], embeddings: Any, documents: List[str],
+              metadatas: List[Dict[str, Any]]):
+        with self._lock:
+            if self._index is None:
+                return
+            if len(self._index):
+                self._index = self._index.upsert(ids, embeddings, documents, metadatas)
+            else:
+                self._index = IVFIndex.build(ids, embeddings, documents, metadatas, space=self.space,
+                                             n_lists=self.n_lists, iterations=self.iterations,
+                                             train_size=self.train_size)
+
+    def removed(self, ids: List[str]):
+        with self._lock:
+            if self._index is not None:
+                self._index = self._index.remove(ids)
+
+    def cleared(self, collection):
+        with self._lock:
+            super().cleared(collection)
+            self._index = IVFIndex.build([], [], [], [], self.space)
+
+    def rebind(self, collection):
+        with self._lock:
+            super().rebind(collection)
+            # Reloaded on the next query; a saved index of the previous collection is rejected
+            self._index = None
+
+
+class QuantizedBackend(SearchBackend):
+    """
+    Candidates from int8 or binary codes held in RAM, rescored with exact
+    vectors from a memory-mapped fp32 file (see quantization.QuantizedIndex).
+    The codes and the vectors file are built from the collection on first
+    query.
+
+    Tuning: a higher oversample rescores more candidates (higher recall,
+    more disk reads); binary codes need more oversampling than int8.
+    """
+
+    def __init__(self, collection, vectors_path: str = "./quantized_vectors.f32",
+                 mode: str = "int8", oversample: int = 4):
+        super().__init__(collection)
+        self.index = QuantizedIndex(vectors_path, mode, oversample)
+        self._lock = threading.Lock()
+
+    def _get_index(self) -> QuantizedIndex:
+        """Build the codes and vectors file on first use"""
+        if not self.index.is_built:
+            with self._lock:
+                if not self.index.is_built:
+                    stored = read_collection(self.collection)
+                    self.index.build(stored['ids'], stored['embeddings'], stored['documents'], stored['metadatas'])
+        return self.index
+
+    def query(self, query_embeddings: List[Any], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        return self._get_index().search(self.space, query_embeddings, n_results, where)
+
+    def get_embeddings(self, ids: List[str]) -> Tuple[List[str], List[Any]]:
+        index = self._get_index()
+        vectors = [(doc_id, index.vector(doc_id)) for doc_id in ids]
+        found = [(doc_id, vector) for doc_id, vector in vectors if vector is not None]
+        return [doc_id for doc_id, _ in found], [vector for _, vector in found]
+
+    def added(self, ids: List[str], embeddings: Any, documents: List[str],
+              metadatas: List[Dict[str, Any]]):
+        with self._lock:
+            if self.index.is_built:
+                self.index.add(ids, embeddings, documents, metadatas)
+
+    def removed(self, ids: List[str]):
+        with self._lock:
+            if self.index.is_built:
+                self.index.remove(ids)
+
+    def cleared(self, collection):
+        with self._lock:
+            super().cleared(collection)
+            self.index.build([], [], [], [])
+
+    def rebind(self, collection):
+        with self._lock:
+            super().rebind(collection)
+            # Rebuilt from the new collection on the next query
+            self.index.reset()
+
+    def close(self):
+        self.index.reset()
+
+
+class SnapshotBackend(SearchBackend):
+    """
+    Exact search over a read-only snapshot (see index_snapshot.IndexSnapshot)
+    exported with VectorStore.export_snapshot or `python index_snapshot.py`.
+
+    The snapshot's vectors and text are memory-mapped, so every worker
+    process serving the same snapshot shares one copy in the page cache.
+    The snapshot is used only while its manifest names the collection and
+    version token it is searching; otherwise queries go back to Chroma.
+    After any write, or once a new snapshot is published, it is checked
+    again, so exporting a fresh snapshot brings it back into use.
+    """
+
+    def __init__(self, collection, path: str = "./index_snapshot"):
+        super().__init__(collection)
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._loaded = False
+        self._checked_dir: Optional[str] = None  # Published version last found unusable
+        self._fallback = ChromaBackend(collection)
+
+    def _get_snapshot(self) -> Optional[IndexSnapshot]:
+        """The snapshot, opened on first use, or None when Chroma must answer"""
+        if self._needs_check():
+            with self._lock:
+                if self._needs_check():
+                    self._checked_dir = current_dir(self.path)
+                    self._snapshot = self._open_snapshot()
+                    self._loaded = True
+        return self._snapshot
+
+    def _needs_check(self) -> bool:
+        """Not opened yet, or unusable when last opened and a new version was published since"""
+        return not self._loaded or (self._snapshot is None and current_dir(self.path) != self._checked_dir)
+
+    def _open_snapshot(self) -> Optional[IndexSnapshot]:
+        """Open the snapshot if present and exported from the collection as it is now"""
+        try:
+            snapshot = IndexSnapshot.load(self.path)
+        except Exception as e:
+            print(f"Error loading index snapshot: {e}")
+            return None
+        if snapshot is None:
+            print(f"No index snapshot at {self.path}; querying Chroma")
+            return None
+        source = snapshot.manifest.get("source") or {}
+        count = self.collection.count()
+        if (source.get("collection", self.collection.name) != self.collection.name
+                or source.get("version") != collection_version(self.collection)
+                or len(snapshot) != count or snapshot.space != self.space):
+            print(f"Index snapshot at {self.path} was not exported from {self.collection.name} as it is now "
+                  f"({len(snapshot)} vs {count} chunks); querying Chroma")
+            return None
+        return snapshot
+
+    def catalog_records(self, catalog_collection) -> Optional[List[Dict[str, Any]]]:
+        """Catalog stored in the snapshot, if it was exported from catalog_collection as it is now"""
+        snapshot = self._get_snapshot()
+        if snapshot is None:
+            return None
+        source = snapshot.manifest.get("source") or {}
+        if (source.get("catalog_collection") != catalog_collection.name
+                or source.get("catalog_version") != collection_version(catalog_collection)):
+            return None
+        return snapshot.catalog
+
+    def query(self, query_embeddings: List[Any], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        snapshot = self._get_snapshot()
+        if snapshot is None:
+            return self._fallback.query(query_embeddings, n_results, where)
+        return snapshot.search(query_embeddings, n_results, where)
+
+    def get_embeddings(self, ids: List[str]) -> Tuple[List[str], List[Any]]:
+        snapshot = self._get_snapshot()
+        if snapshot is None:
+            return self._fallback.get_embeddings(ids)
+        vectors = [(doc_id, snapshot.vector(doc_id)) for doc_id in ids]
+        found = [(doc_id, vector) for doc_id, vector in vectors if vector is not None]
+        return [doc_id for doc_id, _ in found], [vector for _, vector in found]
+
+    def _recheck(self):
+        """Check the snapshot against the collection again on the next query"""
+        with self._lock:
+            self._snapshot, self._loaded = None, False
+
+    def added(self, ids: List[str], embeddings: Any, documents: List[str],
+              metadatas: List[Dict[str, Any]]):
+        self._recheck()
+
+    def removed(self, ids: List[str]):
+        self._recheck()
+
+    def cleared(self, collection):
+        super().cleared(collection)
+        self._fallback.cleared(collection)
+        self._recheck()
+
+    def rebind(self, collection):
+        super().rebind(collection)
+        self._fallback.rebind(collection)
+        self._recheck()
+
+
+class ShardedBackend(SearchBackend):
+    """
+    Content mirrored into one Chroma collection per course (shards=0) or
+    per group of courses (shards=N, courses assigned by a stable hash).
+
+    Queries filtered to a course (or a $in list of courses) search only
+    the shards holding those courses, each a small HNSW graph; unscoped
+    queries fan out to every shard in parallel and the hits are merged by
+    distance. Shards persist alongside the content collection, every write
+    is copied into them (opening them first if needed), and they are
+    rebuilt from it when their layout or total size no longer match.
+    """
+
+    uses_client = True
+
+    def __init__(self, collection, client=None, shards: int = 0, max_workers: int = 8):
+        super().__init__(collection)
+        if client is None:
+            raise ValueError("ShardedBackend needs the Chroma client that owns the collection")
+        self.client = client
+        self.shards = shards
+        self.scheme = f"groups-{shards}" if shards else "course"
+        self.prefix = self.shard_prefix(collection.name)
+        self._lock = threading.Lock()
+        self._collections: Optional[Dict[str, Any]] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard-query")
+
+    @staticmethod
+    def shard_prefix(content_name: str) -> str:
+        """Name prefix of the shards derived from a content collection"""
+        return f"{content_name}_shard_"
+
+    def shard_name(self, course_title: str) -> str:
+        """Collection holding a course's chunks"""
+        if self.shards:
+            return f"{self.prefix}g{zlib.crc32(course_title.encode('utf-8')) % self.shards}"
+        return f"{self.prefix}{hashlib.sha1(course_title.encode('utf-8')).hexdigest()[:16]}"
+
+    def _get_shards(self) -> Dict[str, Any]:
+        """Shard collections by name, opened or rebuilt on first use"""
+        if self._collections is None:
+            with self._lock:
+                if self._collections is None:
+                    self._collections = self._open_shards() or self._build_shards()
+        return self._collections
+
+    def _existing_shards(self) -> List[Any]:
+        return [collection for collection in self.client.list_collections()
+                if collection.name.startswith(self.prefix)]
+
+    def _open_shards(self) -> Optional[Dict[str, Any]]:
+        """Shards already on disk, if they match this layout and the collection"""
+        existing = self._existing_shards()
+        if not existing:
+            return None
+        in_step = all((shard.metadata or {}).get("shard_scheme") == self.scheme for shard in existing)
+        count = self.collection.count()
+        if not in_step or sum(shard.count() for shard in existing) != count:
+            print(f"Content shards out of step with the collection ({count} chunks); rebuilding")
+            return None
+        return {shard.name: shard for shard in existing}
+
+    def _build_shards(self) -> Dict[str, Any]:
+        """Drop any shards and copy the collection into new ones"""
+        for shard in self._existing_shards():
+            self.client.delete_collection(shard.name)
+        collections: Dict[str, Any] = {}
+        stored = read_collection(self.collection)
+        self._write(collections, stored['ids'], stored['embeddings'], stored['documents'], stored['metadatas'])
+        return collections
+
+    def _shard(self, collections: Dict[str, Any], name: str):
+        """Open or create a shard collection (caller holds the lock)"""
+        if name not in collections:
+            collections[name] = self.client.get_or_create_collection(
+                name=name, metadata={"shard_scheme": self.scheme},
+                configuration={"hnsw": hnsw_configuration(self.collection) or {"space": self.space}}
+            )
+        return collections[name]
+
+    def _write(self, collections: Dict[str, Any], ids: List[str], embeddings: Any,
+               documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Upsert chunks into their shards in batches (caller holds the lock)"""
+        groups: Dict[str, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            groups.setdefault(self.shard_name(metadata.get("course_title", "")), []).append(row)
+        batch_size = self.client.get_max_batch_size()
+        for name, rows in groups.items():
+            shard = self._shard(collections, name)
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                shard.upsert(
+                    ids=[ids[row] for row in batch],
+                    embeddings=[embeddings[row] for row in batch],
+                    documents=[documents[row] for row in batch],
+                    metadatas=[metadatas[row] for row in batch]
+                )
+
+    def _route(self, collections: Dict[str, Any], where: Optional[Dict[str, Any]]) -> List[Any]:
+        """Shards that can hold matches for a where clause"""
+        titles = course_titles_in(where)
+        if titles is None:
+            return list(collections.values())
+        names = dict.fromkeys(self.shard_name(title) for title in titles)
+        return [collections[name] for name in names if name in collections]
+
+    def query(self, query_embeddings: List[Any], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        shards = self._route(self._get_shards(), where)
+        if len(shards) == 1:
+            return shards[0].query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+
+        results: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        answers = list(self._executor.map(
+            lambda shard: shard.query(query_embeddings=query_embeddings, n_results=n_results, where=where),
+            shards
+        ))
+        for position in range(len(query_embeddings)):
+            hits = sorted(
+                (distance, doc_id, document, metadata)
+                for answer in answers
+                for distance, doc_id, document, metadata in zip(
+                    answer['distances'][position], answer['ids'][position],
+                    answer['documents'][position], answer['metadatas'][position])
+            )[:n_results]
+            results["ids"].append([hit[1] for hit in hits])
+            results["documents"].append([hit[2] for hit in hits])
+            results["metadatas"].append([hit[3] for hit in hits])
+            results["distances"].append([hit[0] for hit in hits])
+        return results
+
+    def get_embeddings(self, ids: List[str]) -> Tuple[List[str], List[Any]]:
+        stored = self.collection.get(ids=ids, include=["embeddings"])
+        return stored['ids'], list(stored['embeddings'])
+
+    def added(self, ids: List[str], embeddings: Any, documents: List[str],
+              metadatas: List[Dict[str, Any]]):
+        # Shards persist, so writes reach them even before this process has searched
+        collections = self._get_shards()
+        with self._lock:
+            self._write(collections, ids, embeddings, documents, metadatas)
+
+    def removed(self, ids: List[str]):
+        collections = self._get_shards()
+        with self._lock:
+            for shard in collections.values():
+                shard.delete(ids=ids)
+
+    def cleared(self, collection):
+        with self._lock:
+            super().cleared(collection)
+            for shard in self._existing_shards():
+                self.client.delete_collection(shard.name)
+            self._collections = {}
+
+    def rebind(self, collection):
+        with self._lock:
+            super().rebind(collection)
+            self.prefix = self.shard_prefix(collection.name)
+            self._collections = None
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+def course_titles_in(where: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """
+    Course titles a where clause restricts results to (via $eq / $in on
+    course_title, possibly inside $and), or None when any course can match.
+    """
+    if not where or len(where) != 1:
+        return None
+    key, condition = next(iter(where.items()))
+    if key == "$and":
+        for clause in condition:
+            titles = course_titles_in(clause)
+            if titles is not None:
+                return titles
+        return None
+    if key != "course_title":
+        return None
+    if not isinstance(condition, dict):
+        return [condition]
+    if list(condition) == ["$eq"]:
+        return [condition["$eq"]]
+    if list(condition) == ["$in"]:
+        return list(condition["$in"])
+    return None
+
+
+def block_results(block: VectorBlock, hits: List[Tuple[np.ndarray, np.ndarray]]) -> Dict[str, List[List[Any]]]:
+    """Chroma-style query results from VectorBlock.search hits"""
+    return {
+        "ids": [[block.ids[row] for row in rows] for rows, _ in hits],
+        "documents": [[block.documents[row] for row in rows] for rows, _ in hits],
+        "metadatas": [[block.metadatas[row] for row in rows] for rows, _ in hits],
+        "distances": [distances.tolist() for _, distances in hits],
+    }
+
+
+SEARCH_BACKENDS = {
+    "chroma": ChromaBackend,
+    "numpy": NumpyBackend,
+    "ivf": IVFBackend,
+    "quantized": QuantizedBackend,
+    "snapshot": SnapshotBackend,
+    "sharded": ShardedBackend,
+}
+
+
+def create_search_backend(backend, collection, client=None, **options) -> SearchBackend:
+    """
+    Build the search backend for a content collection.
+
+    Args:
+        backend: Backend name (see SEARCH_BACKENDS) or a SearchBackend class
+        collection: Chroma content collection (the system of record)
+        client: Chroma client owning the collection, for backends that
+            keep their own collections
+        **options: Backend-specific settings (e.g. nprobe for "ivf")
+    """
+    if isinstance(backend, type) and issubclass(backend, SearchBackend):
+        backend_class = backend
+    elif backend in SEARCH_BACKENDS:
+        backend_class = SEARCH_BACKENDS[backend]
+    else:
+        raise ValueError(f"Unknown search backend '{backend}'. Choose from: {', '.join(SEARCH_BACKENDS)}")
+    if getattr(backend_class, "uses_client", False):
+        options.setdefault("client", client)
+    return backend_class(collection, **options)
@@ -1,5 +1,6 @@
-from typing import Dict, Any, Optional, Protocol
+from typing import Dict, Any, List, Optional, Protocol
 from abc import ABC, abstractmethod
+import copy
 from vector_store import VectorStore, SearchResults
 
 
@@ -43,13 +44,28 @@ class CourseSearchTool(Tool):
                     "lesson_number": {
                         "type": "integer",
                         "description": "Specific lesson number to search within (e.g. 1, 2, 3)"
+                    },
+                    "course_names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Several courses to search in one call, e.g. to compare them"
+                    },
+                    "lesson_from": {
+                        "type": "integer",
+                        "description": "First lesson of a range to search within (inclusive)"
+                    },
+                    "lesson_to": {
+                        "type": "integer",
+                        "description": "Last lesson of a range to search within (inclusive)"
                     }
                 },
                 "required": ["query"]
             }
         }
     
-    def execute(self, query: str, course_name: Optional[str] = None, lesson_number: Optional[int] = None) -> str:
+    def execute(self, query: str, course_name: Optional[str] = None, lesson_number: Optional[int] = None,
+                tenant_id: Optional[str] = None, course_names: Optional[List[str]] = None,
+                lesson_from: Optional[int] = None, lesson_to: Optional[int] = None) -> str:
         """
         Execute the search tool with given parameters.
         
@@ -57,6 +73,10 @@ class CourseSearchTool(Tool):
             query: What to search for
             course_name: Optional course filter
             lesson_number: Optional lesson filter
+            tenant_id: Tenant whose courses are searched (None = default)
+            course_names: Optional list of courses searched together
+            lesson_from: Optional first lesson of a range
+            lesson_to: Optional last lesson of a range
             
         Returns:
             Formatted search results or error message
@@ -65,10 +85,15 @@ class CourseSearchTool(Tool):
             print(f"CourseSearchTool.execute called with query: '{query}'")
             
             # Use the vector store's unified search interface
-            results = self.store.search(
+            store = self.store.for_tenant(tenant_id, create=False) if tenant_id else self.store
+            # Multi-course and lesson-range filters compile into the same single query
+            filters = {key: value for key, value in (("course_names", course_names), ("lesson_from", lesson_from),
+                                                    ("lesson_to", lesson_to)) if value is not None}
+            results = store.search(
                 query=query,
                 course_name=course_name,
-                lesson_number=lesson_number
+                lesson_number=lesson_number,
+                **filters
             )
             
             print(f"Vector store returned: {len(results.documents) if results.documents else 0} documents")
@@ -83,14 +108,20 @@ class CourseSearchTool(Tool):
                 filter_info = ""
                 if course_name:
                     filter_info += f" in course '{course_name}'"
+                if course_names:
+                    filter_info += f" in courses {', '.join(repr(name) for name in course_names)}"
                 if lesson_number:
                     filter_info += f" in lesson {lesson_number}"
+                if lesson_from is not None or lesson_to is not None:
+                    first = "" if lesson_from is None else lesson_from
+                    last = "" if lesson_to is None else lesson_to
+                    filter_info += f" in lessons {first}-{last}"
                 message = f"No relevant content found{filter_info}."
                 print(f"Empty results: {message}")
                 return message
             
             # Format and return results
-            formatted_result = self._format_results(results)
+            formatted_result = self._format_results(results, store)
             print(f"Formatted result length: {len(formatted_result)}")
             return formatted_result
             
@@ -101,8 +132,9 @@ class CourseSearchTool(Tool):
             traceback.print_exc()
             return error_msg
     
-    def _format_results(self, results: SearchResults) -> str:
+    def _format_results(self, results: SearchResults, store: Optional[VectorStore] = None) -> str:
         """Format search results with course and lesson context"""
+        store = store or self.store
         formatted = []
         sources = []  # Track sources with links for the UI
         
@@ -119,7 +151,7 @@ class CourseSearchTool(Tool):
             # Get lesson link if available
             lesson_link = None
             if lesson_num is not None:
-                lesson_link = self.store.get_lesson_link(course_title, lesson_num)
+                lesson_link = store.get_lesson_link(course_title, lesson_num)
             
             # Track source with link for the UI
             source_text = course_title
@@ -164,25 +196,22 @@ class CourseOutlineTool(Tool):
             }
         }
     
-    def execute(self, course_title: str) -> str:
+    def execute(self, course_title: str, tenant_id: Optional[str] = None) -> str:
         """Execute the outline tool to get course structure"""
+        store = self.store.for_tenant(tenant_id, create=False) if tenant_id else self.store
         # Resolve course name using vector search
-        resolved_title = self.store._resolve_course_name(course_title)
+        resolved_title = store._resolve_course_name(course_title)
         if not resolved_title:
             return f"No course found matching '{course_title}'"
         
-        # Get course metadata
+        # Get course metadata from the catalog snapshot
         try:
-            results = self.store.course_catalog.get(ids=[resolved_title])
-            if not results or not results['metadatas']:
+            outline = store.get_course_outline(resolved_title)
+            if not outline:
                 return f"Course metadata not found for '{resolved_title}'"
             
-            metadata = results['metadatas'][0]
-            course_link = metadata.get('course_link', '')
-            lessons_json = metadata.get('lessons_json', '[]')
-            
-            import json
-            lessons = json.loads(lessons_json)
+            course_link = outline.get('course_link', '')
+            lessons = outline.get('lessons', [])
             
             # Format response
             response = f"Course: {resolved_title}\n"
@@ -226,6 +255,18 @@ class ToolManager:
         
         return self.tools[tool_name].execute(**kwargs)
     
+    def request_scope(self) -> "ToolManager":
+        """
+        Manager with its own copy of every tool, so the sources one query
+        collects are never read or reset by a query running concurrently
+        """
+        scoped = ToolManager()
+        for name, tool in self.tools.items():
+            scoped.tools[name] = copy.copy(tool)
+            if hasattr(tool, 'last_sources'):
+                scoped.tools[name].last_sources = []
+        return scoped
+
     def get_last_sources(self) -> list:
         """Get sources from the last search operation"""
         # Check all tools for last_sources attribute
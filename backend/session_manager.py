@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 
 @dataclass
@@ -8,43 +8,57 @@ class Message:
     content: str  # The message content
 
 class SessionManager:
-    """Manages conversation sessions and message history"""
+    """
+    Manages conversation sessions and message history.
+
+    Sessions belong to a tenant (None = the default namespace): the same
+    session id under another tenant is a different, empty session. Default
+    namespace sessions stay keyed by their id in `sessions`; other tenants'
+    by (tenant_id, session_id).
+    """
     
     def __init__(self, max_history: int = 5):
         self.max_history = max_history
-        self.sessions: Dict[str, List[Message]] = {}
+        self.sessions: Dict[Union[str, Tuple[str, str]], List[Message]] = {}
         self.session_counter = 0
     
-    def create_session(self) -> str:
+    @staticmethod
+    def _key(session_id: str, tenant_id: Optional[str]) -> Union[str, Tuple[str, str]]:
+        return (tenant_id, session_id) if tenant_id else session_id
+    
+    def create_session(self, *, tenant_id: Optional[str] = None) -> str:
         """Create a new conversation session"""
         self.session_counter += 1
         session_id = f"session_{self.session_counter}"
-        self.sessions[session_id] = []
+        self.sessions[self._key(session_id, tenant_id)] = []
         return session_id
     
-    def add_message(self, session_id: str, role: str, content: str):
+    def add_message(self, session_id: str, role: str, content: str, *, tenant_id: Optional[str] = None):
         """Add a message to the conversation history"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
+        key = self._key(session_id, tenant_id)
+        if key not in self.sessions:
+            self.sessions[key] = []
         
         message = Message(role=role, content=content)
-        self.sessions[session_id].append(message)
+        self.sessions[key].append(message)
         
         # Keep conversation history within limits
-        if len(self.sessions[session_id]) > self.max_history * 2:
-            self.sessions[session_id] = self.sessions[session_id][-self.max_history * 2:]
+        if len(self.sessions[key]) > self.max_history * 2:
+            self.sessions[key] = self.sessions[key][-self.max_history * 2:]
     
-    def add_exchange(self, session_id: str, user_message: str, assistant_message: str):
+    def add_exchange(self, session_id: str, user_message: str, assistant_message: str, *,
+                     tenant_id: Optional[str] = None):
         """Add a complete question-answer exchange"""
-        self.add_message(session_id, "user", user_message)
-        self.add_message(session_id, "assistant", assistant_message)
+        self.add_message(session_id, "user", user_message, tenant_id=tenant_id)
+        self.add_message(session_id, "assistant", assistant_message, tenant_id=tenant_id)
     
-    def get_conversation_history(self, session_id: Optional[str]) -> Optional[str]:
+    def get_conversation_history(self, session_id: Optional[str], *,
+                                 tenant_id: Optional[str] = None) -> Optional[str]:
         """Get formatted conversation history for a session"""
-        if not session_id or session_id not in self.sessions:
+        if not session_id or self._key(session_id, tenant_id) not in self.sessions:
             return None
         
-        messages = self.sessions[session_id]
+        messages = self.sessions[self._key(session_id, tenant_id)]
         if not messages:
             return None
         
@@ -55,7 +69,8 @@ class SessionManager:
         
         return "\n".join(formatted_messages)
     
-    def clear_session(self, session_id: str):
+    def clear_session(self, session_id: str, *, tenant_id: Optional[str] = None):
         """Clear all messages from a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id] = []
\ No newline at end of file
+        key = self._key(session_id, tenant_id)
+        if key in self.sessions:
+            self.sessions[key] = []
\ No newline at end of file
@@ -1,3 +1,9 @@
+import shutil
+import socket
+import subprocess
+import time
+import urllib.request
+
 import pytest
 from unittest.mock import Mock, patch
 from fastapi.testclient import TestClient
@@ -105,4 +111,56 @@ def sample_course_data():
             "Building Computer Use",
             "RAG Fundamentals"
         ]
-    }
\ No newline at end of file
+    }
+
+
+@pytest.fixture
+def chroma_server(tmp_path):
+    """URL of a throwaway local Chroma server (`chroma run`), stopped after the test"""
+    executable = shutil.which("chroma")
+    if executable is None:
+        pytest.skip("chroma CLI not installed")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [executable, "run", "--path", str(tmp_path / "chroma-server"), "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(f"{url}/api/v2/heartbeat", timeout=1)
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    pytest.skip("Chroma server did not start")
+                time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def hashing_store(path, **kwargs):
+    """VectorStore with the hashing provider and a few chunks from two courses"""
+    from models import CourseChunk
+    from vector_store import VectorStore
+
+    store = VectorStore(str(path), "unused", embedding_provider="hashing", **kwargs)
+    chunks = []
+    for title in ("MCP Course", "Computer Use"):
+        for index, text in enumerate(["servers expose tools", "clients call tools",
+                                      "agents take screenshots"]):
+            chunks.append(CourseChunk(content=f"{title}: {text}", course_title=title,
+                                      lesson_number=index % 2, chunk_index=index))
+    store.add_course_content(chunks)
+    return store
+
+
+@pytest.fixture
+def make_hashing_store():
+    """Factory of small hashing-provider stores: make_hashing_store(path, **VectorStore kwargs)"""
+    return hashing_store
@@ -39,6 +39,34 @@ class TestAIGeneratorToolCalling(unittest.TestCase):
         self.assertEqual(result, "Test response")
         self.mock_client.messages.create.assert_called_once()
     
+    def test_tool_calls_use_request_tenant(self):
+        """Test the request's tenant reaches tools and the model cannot choose one"""
+        mock_tool_block = Mock()
+        mock_tool_block.type = "tool_use"
+        mock_tool_block.name = "search_course_content"
+        mock_tool_block.id = "tool_123"
+        mock_tool_block.input = {"query": "What is MCP?", "tenant_id": "other"}
+
+        mock_initial_response = Mock()
+        mock_initial_response.stop_reason = "tool_use"
+        mock_initial_response.content = [mock_tool_block]
+        mock_final_response = Mock()
+        mock_final_response.stop_reason = "end_turn"
+        mock_final_response.content = [Mock(text="Answer")]
+        self.mock_client.messages.create.side_effect = [mock_initial_response, mock_final_response]
+        self.tool_manager.execute_tool.return_value = "Search results"
+
+        self.ai_generator.generate_response(
+            "What is MCP?",
+            tools=[{"name": "search_course_content"}],
+            tool_manager=self.tool_manager,
+            tenant_id="acme"
+        )
+
+        self.tool_manager.execute_tool.assert_called_once_with(
+            "search_course_content", query="What is MCP?", tenant_id="acme"
+        )
+
     def test_generate_response_with_tool_use(self):
         """Test response generation that triggers tool use"""
         # Mock initial response with tool use
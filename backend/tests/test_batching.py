@@ -0,0 +1,157 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+
+import pytest
+from unittest.mock import patch
+
+from batching import MicroBatcher, WorkerPool
+
+
+@pytest.mark.unit
+class TestMicroBatcher:
+    """Concurrent submissions are processed together"""
+
+    def test_concurrent_items_share_a_batch(self):
+        batches = []
+        start = threading.Barrier(8)
+
+        def process(items):
+            batches.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(process, max_wait_ms=50, max_batch_size=64)
+        results = {}
+
+        def worker(value):
+            start.wait()
+            results[value] = batcher.submit(value)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+
+        assert results == {i: i * 2 for i in range(8)}
+        assert len(batches) < 8
+        assert batcher.stats()["items"] == 8
+
+    def test_batch_size_limit(self):
+        sizes = []
+
+        def process(items):
+            sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher(process, max_wait_ms=20, max_batch_size=2)
+        futures = [batcher.submit_async(i) for i in range(5)]
+
+        assert [future.result() for future in futures] == list(range(5))
+        assert max(sizes) <= 2
+        batcher.close()
+
+    def test_errors_reach_every_caller(self):
+        def process(items):
+            raise ValueError("boom")
+
+        batcher = MicroBatcher(process, max_wait_ms=1)
+        with pytest.raises(ValueError):
+            batcher.submit("x")
+        batcher.close()
+
+
+@pytest.mark.unit
+class TestWorkerPool:
+    """Blocking calls run off the event loop with queue metrics"""
+
+    def test_loop_stays_responsive(self):
+        pool = WorkerPool(max_workers=1)
+        release = threading.Event()
+
+        async def main():
+            blocked = asyncio.ensure_future(pool.run(release.wait, 2))
+            queued = asyncio.ensure_future(pool.run(lambda: "done"))
+            await asyncio.sleep(0.05)
+            # The loop keeps running while the only worker is busy
+            stats = pool.stats()
+            release.set()
+            return stats, await blocked, await queued
+
+        stats, blocked, queued = asyncio.run(main())
+
+        assert (blocked, queued) == (True, "done")
+        assert stats["running"] == 1
+        assert stats["queued"] == 1
+        assert pool.stats()["completed"] == 2
+        pool.close()
+
+    def test_errors_propagate_and_are_counted(self):
+        pool = WorkerPool(max_workers=2)
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            asyncio.run(pool.run(fail))
+        assert pool.stats()["failed"] == 1
+        assert pool.stats()["queued"] == 0
+        pool.close()
+
+    def test_cancelled_before_start_leaves_queue(self):
+        pool = WorkerPool(max_workers=1)
+        release = threading.Event()
+
+        async def main():
+            blocked = asyncio.ensure_future(pool.run(release.wait, 2))
+            waiting = asyncio.ensure_future(pool.run(lambda: "never"))
+            await asyncio.sleep(0.05)
+            waiting.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            await blocked
+
+        asyncio.run(main())
+
+        assert pool.stats()["queued"] == 0
+        assert pool.stats()["completed"] == 1
+        pool.close()
+
+
+@pytest.mark.unit
+class TestSearchBatching:
+    """Concurrent searches share embedding and Chroma calls"""
+
+    def test_concurrent_searches_are_batched(self, tmp_path, make_hashing_store):
+        from concurrent.futures import ThreadPoolExecutor
+
+        store = make_hashing_store(tmp_path / "chroma", search_batch_window_ms=50)
+        expected = {query: make_hashing_store(tmp_path / "plain").search(query, limit=2).documents
+                    for query in ("servers", "screenshots", "clients")}
+        queries = ["servers", "screenshots", "clients"] * 4
+
+        with patch.object(store.course_content, "query", wraps=store.course_content.query) as query_spy:
+            with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+                results = list(pool.map(lambda q: store.search(q, limit=2), queries))
+
+        for query, result in zip(queries, results):
+            assert result.error is None
+            assert result.documents == expected[query]
+        assert query_spy.call_count < len(queries)
+
+    def test_mixed_filters_and_limits_in_one_batch(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        results = store._run_content_queries([
+            ("tools", None, 1),
+            ("tools", {"course_title": "Computer Use"}, 3),
+            ("tools", None, 3),
+        ])
+
+        assert len(results[0].documents) == 1
+        assert all(meta["course_title"] == "Computer Use" for meta in results[1].metadata)
+        assert len(results[2].documents) == 3
+        assert results[2].documents[0] == results[0].documents[0]
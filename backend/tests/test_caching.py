@@ -0,0 +1,109 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import patch
+
+from caching import LRUCache
+from models import Course, CourseChunk
+
+
+@pytest.mark.unit
+class TestLRUCache:
+    """Bounded LRU behaviour and statistics"""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_stats_track_hits_and_misses(self):
+        cache = LRUCache(max_size=4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("missing")
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["size"] == 1
+
+    def test_zero_size_disables_cache(self):
+        cache = LRUCache(max_size=0)
+        cache.put("a", 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_entries_expire_after_ttl(self):
+        cache = LRUCache(max_size=4, ttl_seconds=60)
+        with patch("caching.time.monotonic", return_value=1000.0):
+            cache.put("a", 1)
+        with patch("caching.time.monotonic", return_value=1059.0):
+            assert cache.get("a") == 1
+        with patch("caching.time.monotonic", return_value=1061.0):
+            assert cache.get("a") is None
+
+        assert len(cache) == 0
+        assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.unit
+class TestSearchResultCache:
+    """Result cache keyed on normalized arguments and corpus generation"""
+
+    def test_repeat_search_served_from_cache(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+        first = store.search("servers  expose tools", limit=2)
+
+        with patch.object(store, "_run_content_queries", side_effect=AssertionError("not cached")):
+            again = store.search(" servers expose tools", limit=2)
+            batched = store.search_many([("servers expose tools", None, None, 2)])
+
+        assert again is first
+        assert batched[0] is first
+        assert store.cache_stats()["search_results"]["hits"] == 2
+
+    def test_limit_and_filters_are_part_of_key(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+
+        assert len(store.search("tools", limit=1).documents) == 1
+        assert len(store.search("tools", limit=3).documents) == 3
+        assert all(meta["lesson_number"] == 1 for meta in store.search("tools", lesson_number=1).metadata)
+
+    @pytest.mark.parametrize("write", ["content", "metadata", "clear"])
+    def test_writes_invalidate(self, tmp_path, write, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+        store.search("brand new topic", limit=1)
+        generation = store.corpus_generation
+
+        if write == "content":
+            store.add_course_content([CourseChunk(content="brand new topic", course_title="MCP Course",
+                                                  lesson_number=2, chunk_index=9)])
+        elif write == "metadata":
+            store.add_course_metadata(Course(title="Brand New", instructor="Test",
+                                             course_link="http://example.com/new"))
+        else:
+            store.clear_all_data()
+
+        assert store.corpus_generation == generation + 1
+        with patch.object(store, "_run_content_queries", wraps=store._run_content_queries) as run_spy:
+            results = store.search("brand new topic", limit=1)
+        assert run_spy.call_count == 1
+        if write == "content":
+            assert results.ids == ["MCP_Course_9"]
+
+    def test_transient_errors_not_cached(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+        with patch.object(store.content_backend, "query", side_effect=RuntimeError("boom")):
+            assert store.search("tools").error == "Search error: boom"
+
+        assert store.search("tools").error is None
@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import pytest
+
+from catalog_snapshot import CatalogSnapshot, ContentStats
+
+
+def catalog_record(title, lessons):
+    """Raw catalog metadata as stored in Chroma"""
+    return {
+        "title": title,
+        "instructor": "Test",
+        "course_link": f"http://example.com/{title}",
+        "lessons_json": json.dumps([
+            {"lesson_number": n, "lesson_title": f"Lesson {n}", "lesson_link": f"http://example.com/{title}/{n}"}
+            for n in lessons
+        ]),
+        "lesson_count": len(lessons)
+    }
+
+
+@pytest.mark.unit
+class TestCatalogSnapshot:
+    """Parsed catalog lookups"""
+
+    def test_lookups(self):
+        snapshot = CatalogSnapshot([catalog_record("A", [0, 1]), catalog_record("B", [1])])
+
+        assert len(snapshot) == 2
+        assert snapshot.course_link("A") == "http://example.com/A"
+        assert snapshot.lesson_link("A", 1) == "http://example.com/A/1"
+        assert snapshot.lesson_link("B", 0) is None
+        assert snapshot.course("B")["lessons"][0]["lesson_title"] == "Lesson 1"
+        assert "lessons_json" not in snapshot.course("A")
+
+    def test_upsert_replaces_lessons(self):
+        snapshot = CatalogSnapshot([catalog_record("A", [0, 1])])
+        snapshot.upsert_course(catalog_record("A", [2]))
+
+        assert snapshot.lesson_link("A", 1) is None
+        assert snapshot.lesson_link("A", 2) == "http://example.com/A/2"
+
+    def test_remove_and_clear(self):
+        snapshot = CatalogSnapshot([catalog_record("A", [0]), catalog_record("B", [0])])
+        snapshot.remove_course("A")
+        assert snapshot.titles() == ["B"]
+        assert snapshot.lesson_link("A", 0) is None
+
+        snapshot.clear()
+        assert len(snapshot) == 0
+
+    def test_returned_courses_are_copies(self):
+        snapshot = CatalogSnapshot([catalog_record("A", [0])])
+        snapshot.course("A")["lessons"].clear()
+
+        assert len(snapshot.course("A")["lessons"]) == 1
+
+    def test_lesson_count(self):
+        snapshot = CatalogSnapshot([catalog_record("A", [0, 1, 2])])
+
+        assert snapshot.lesson_count("A") == 3
+        assert snapshot.lesson_count("B") is None
+
+
+@pytest.mark.unit
+class TestContentStats:
+    """Maintained per-course chunk counts"""
+
+    def test_counts_per_course(self):
+        stats = ContentStats(["A_0", "A_1", "B_0"], [
+            {"course_title": "A", "lesson_number": 0, "chunk_index": 0},
+            {"course_title": "A", "lesson_number": 1, "chunk_index": 1},
+            {"course_title": "B", "lesson_number": 0, "chunk_index": 0},
+        ])
+
+        assert stats.chunk_count() == 3
+        assert stats.chunk_count("A") == 2
+        assert stats.lesson_count("A") == 2
+        assert stats.chunk_count("C") == 0
+
+    def test_re_added_chunks_not_double_counted(self):
+        stats = ContentStats()
+        stats.add(["A_0"], [{"course_title": "A", "lesson_number": 0}])
+        stats.add(["A_0", "A_1"], [{"course_title": "A", "lesson_number": 0},
+                                   {"course_title": "A", "lesson_number": 0}])
+
+        assert stats.chunk_count("A") == 2
+        assert stats.lesson_count("A") == 1
+
+        stats.clear()
+        assert stats.chunk_count() == 0
+        assert stats.titles() == []
@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import patch
+
+from context_expansion import merge_chunks, merge_pair, strip_context_prefix
+from models import CourseChunk
+from vector_store import VectorStore
+
+
+@pytest.mark.unit
+class TestContextExpansion:
+    """Merging neighbouring chunks without repeating their overlap"""
+
+    def test_strips_context_prefixes(self):
+        assert strip_context_prefix("Lesson 2 content: Tools are typed.") == "Tools are typed."
+        assert strip_context_prefix("Course MCP Lesson 4 content: Done.") == "Done."
+        assert strip_context_prefix("Plain text.") == "Plain text."
+
+    def test_overlapping_sentences_kept_once(self):
+        previous = "Servers expose tools to clients. Each tool has a JSON schema."
+        following = "Each tool has a JSON schema. Clients call tools by name."
+
+        assert merge_pair(previous, following) == (
+            "Servers expose tools to clients. Each tool has a JSON schema. Clients call tools by name."
+        )
+
+    def test_prefixed_neighbour_without_overlap_is_appended(self):
+        merged = merge_chunks(["First sentence here.", "Lesson 1 content: Second sentence here."])
+        assert merged == "First sentence here. Second sentence here."
+
+    def test_contained_chunk_adds_nothing(self):
+        assert merge_pair("Alpha beta. Gamma delta.", "Gamma delta.") == "Alpha beta. Gamma delta."
+
+    def test_empty_and_single(self):
+        assert merge_chunks([]) == ""
+        assert merge_chunks(["Only chunk."]) == "Only chunk."
+
+
+@pytest.mark.unit
+class TestContextExpansionSearch:
+    """Hits can carry their neighbouring chunks, fetched by ID"""
+
+    def make_store(self, path, **kwargs):
+        store = VectorStore(str(path), "unused", embedding_provider="hashing", **kwargs)
+        texts = [
+            (0, "Lesson 0 content: Servers expose tools. Tools have schemas."),
+            (0, "Tools have schemas. Clients list the tools."),
+            (0, "Clients list the tools. Agents call them."),
+            (1, "Lesson 1 content: Screenshots drive computer use."),
+        ]
+        store.add_course_content([
+            CourseChunk(content=text, course_title="MCP Course", lesson_number=lesson, chunk_index=index)
+            for index, (lesson, text) in enumerate(texts)
+        ])
+        return store
+
+    def test_disabled_by_default(self, tmp_path):
+        store = self.make_store(tmp_path / "chroma")
+        results = store.search("Clients list the tools. Agents call them.", limit=1)
+        assert results.documents == ["Clients list the tools. Agents call them."]
+
+    def test_neighbours_merged_within_lesson(self, tmp_path):
+        store = self.make_store(tmp_path / "chroma")
+
+        with patch.object(store, "_embed_queries", wraps=store._embed_queries) as embed_spy, \
+                patch.object(store.content_backend, "query", wraps=store.content_backend.query) as query_spy:
+            results = store.search("Clients list the tools. Agents call them.", limit=1, context_chunks=1)
+
+        assert results.ids == ["MCP_Course_2"]
+        # The next chunk belongs to lesson 1, so only the previous one is merged
+        assert results.documents == ["Tools have schemas. Clients list the tools. Agents call them."]
+        assert results.metadata[0]["chunk_index"] == 2
+        assert embed_spy.call_count == 1
+        assert query_spy.call_count == 1
+
+    def test_store_default_applies_to_search_many(self, tmp_path):
+        store = self.make_store(tmp_path / "chroma", context_chunks=2)
+        results = store.search_many([("Tools have schemas. Clients list the tools.", None, 0, 1)])[0]
+
+        assert results.documents == [
+            "Lesson 0 content: Servers expose tools. Tools have schemas. Clients list the tools. Agents call them."
+        ]
@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from course_resolver import CourseNameResolver
+
+TITLES = [
+    "MCP: Build Rich-Context AI Apps with Anthropic",
+    "Building Towards Computer Use with Anthropic",
+    "Advanced Retrieval for AI with Chroma",
+    "Prompt Compression and Query Optimization",
+]
+
+
+@pytest.fixture
+def resolver():
+    return CourseNameResolver(TITLES)
+
+
+@pytest.mark.unit
+class TestCourseNameResolver:
+    """Lexical matching stages"""
+
+    def test_exact_and_case_folded(self, resolver):
+        assert resolver.match(TITLES[2]) == (TITLES[2], [])
+        assert resolver.match("advanced retrieval for ai with chroma") == (TITLES[2], [])
+
+    def test_prefix(self, resolver):
+        assert resolver.match("MCP") == (TITLES[0], [])
+        assert resolver.match("prompt compression") == (TITLES[3], [])
+
+    def test_word_containment(self, resolver):
+        assert resolver.match("Computer Use") == (TITLES[1], [])
+
+    def test_acronym(self, resolver):
+        assert resolver.match("PCQO") == (TITLES[3], [])
+
+    def test_fuzzy_typo(self, resolver):
+        assert resolver.match("Compter Use") == (TITLES[1], [])
+
+    def test_ambiguous_returns_candidates(self, resolver):
+        title, candidates = resolver.match("Anthropic")
+        assert title is None
+        assert set(candidates) == {TITLES[0], TITLES[1]}
+
+    def test_no_match(self, resolver):
+        assert resolver.match("Quantum Chemistry") == (None, [])
+
+    def test_cache_invalidated_on_title_change(self, resolver):
+        resolver.remember("Prompt", TITLES[3], resolver.version)
+        assert resolver.cached("prompt") == (True, TITLES[3])
+
+        resolver.add_title("Prompt Engineering Basics")
+        assert resolver.cached("prompt") == (False, None)
+
+    def test_stale_resolution_not_cached(self, resolver):
+        version = resolver.version
+        resolver.remove_title(TITLES[3])
+        resolver.remember("Prompt", TITLES[3], version)
+
+        assert resolver.cached("Prompt") == (False, None)
@@ -9,7 +9,7 @@ import unittest
 from unittest.mock import Mock, patch
 from config import config
 from vector_store import VectorStore, SearchResults
-from search_tools import CourseSearchTool
+from search_tools import CourseSearchTool, ToolManager
 
 class TestCourseSearchTool(unittest.TestCase):
     
@@ -87,5 +87,56 @@ class TestCourseSearchTool(unittest.TestCase):
         
         self.assertIn("No relevant content found", result)
 
+    def test_execute_for_tenant(self):
+        """Test tenant searches go to the tenant's store"""
+        tenant_store = Mock(spec=VectorStore)
+        tenant_store.search.return_value = SearchResults(
+            documents=["Tenant content"],
+            metadata=[{"course_title": "Tenant Course", "lesson_number": 1}],
+            distances=[0.2]
+        )
+        tenant_store.get_lesson_link.return_value = "http://example.com/tenant"
+        self.vector_store.for_tenant.return_value = tenant_store
+
+        result = self.search_tool.execute("query", tenant_id="acme")
+
+        self.vector_store.for_tenant.assert_called_once_with("acme", create=False)
+        self.vector_store.search.assert_not_called()
+        tenant_store.get_lesson_link.assert_called_once_with("Tenant Course", 1)
+        self.assertIn("Tenant content", result)
+
+    def test_execute_with_courses_and_lesson_range(self):
+        """Test several courses and a lesson range go to one search"""
+        self.vector_store.search.return_value = SearchResults(documents=[], metadata=[], distances=[])
+
+        result = self.search_tool.execute("query", course_names=["MCP", "Chroma"], lesson_from=2, lesson_to=3)
+
+        self.vector_store.search.assert_called_once_with(
+            query="query",
+            course_name=None,
+            lesson_number=None,
+            course_names=["MCP", "Chroma"],
+            lesson_from=2,
+            lesson_to=3
+        )
+        self.assertIn("MCP", result)
+        self.assertIn("lessons 2", result)
+
+    def test_request_scopes_keep_their_own_sources(self):
+        """Test two queries sharing a manager never see each other's sources"""
+        manager = ToolManager()
+        manager.register_tool(self.search_tool)
+        first, second = manager.request_scope(), manager.request_scope()
+        self.vector_store.get_lesson_link.return_value = None
+        for scope, title in ((first, "First Course"), (second, "Second Course")):
+            self.vector_store.search.return_value = SearchResults(
+                documents=["content"], metadata=[{"course_title": title, "lesson_number": 1}], distances=[0.1]
+            )
+            scope.execute_tool("search_course_content", query="query")
+
+        self.assertEqual(first.get_last_sources()[0]["text"], "First Course - Lesson 1")
+        self.assertEqual(second.get_last_sources()[0]["text"], "Second Course - Lesson 1")
+        self.assertEqual(manager.get_last_sources(), [])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from distance_cutoff import DistanceCutoff, knee_position
+
+
+@pytest.mark.unit
+class TestDistanceCutoff:
+    """Adaptive hit counts from absolute, relative and knee rules"""
+
+    DISTANCES = [0.30, 0.32, 0.35, 0.90, 0.95]
+
+    def test_disabled_by_default(self):
+        assert not DistanceCutoff().enabled()
+        assert DistanceCutoff().count(self.DISTANCES) == 5
+
+    def test_absolute_cutoff(self):
+        assert DistanceCutoff(max_distance=0.5).count(self.DISTANCES) == 3
+        assert DistanceCutoff(max_distance=0.1).count(self.DISTANCES) == 1
+
+    def test_relative_cutoff(self):
+        assert DistanceCutoff(max_ratio=1.1).count(self.DISTANCES) == 2
+        assert DistanceCutoff(max_ratio=4.0).count(self.DISTANCES) == 5
+        # A zero best distance cannot be scaled, so the rule is skipped
+        assert DistanceCutoff(max_ratio=1.5).count([0.0, 0.5, 0.6]) == 3
+
+    def test_knee(self):
+        assert knee_position(self.DISTANCES) == 3
+        assert knee_position([0.1, 0.2, 0.3, 0.4, 0.5]) == 5
+        assert knee_position([0.1, 0.9]) == 2
+        assert DistanceCutoff(knee=True).count(self.DISTANCES) == 3
+
+    def test_min_results(self):
+        assert DistanceCutoff(max_distance=0.1, min_results=2).count(self.DISTANCES) == 2
+        assert DistanceCutoff(max_distance=0.1, min_results=9).count(self.DISTANCES) == 5
+        assert DistanceCutoff(max_distance=0.1).count([]) == 0
+
+
+@pytest.mark.unit
+class TestDistanceCutoffSearch:
+    """Fewer, closer hits when distances fall off"""
+
+    def test_default_returns_limit(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        assert len(store.search("servers expose tools", limit=6).documents) == 6
+
+    @pytest.mark.parametrize("lexical_weight", [0.0, 1.0])
+    def test_absolute_cutoff(self, tmp_path, lexical_weight, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", hybrid_lexical_weight=lexical_weight,
+                                   max_distance=1e-6, cutoff_min_results=2)
+        results = store.search("servers expose tools", limit=6)
+
+        assert len(results.documents) == 2
+        assert results.documents[0].endswith("servers expose tools")
+
+    @pytest.mark.parametrize("lexical_weight", [0.0, 1.0])
+    def test_no_minimum_can_drop_every_hit(self, tmp_path, lexical_weight, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", hybrid_lexical_weight=lexical_weight,
+                                   max_distance=1e-6, cutoff_min_results=0)
+        results = store.search("unrelated question about zebras", limit=6)
+
+        assert results.documents == []
+        assert results.error is None
+
+    def test_threshold_keeps_fused_order(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", hybrid_lexical_weight=1.0)
+        fused = store.search("servers expose tools", limit=6)
+        threshold = sorted(fused.distances)[3]
+
+        store.distance_cutoff = DistanceCutoff(max_distance=threshold)
+        trimmed = store.search("servers expose tools", limit=6)
+
+        assert trimmed.ids == [doc_id for doc_id, distance in zip(fused.ids, fused.distances)
+                               if distance <= threshold]
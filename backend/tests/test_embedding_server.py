@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from embedding_server import EmbeddingServer
+from embeddings import HashingEmbeddingProvider, RemoteEmbeddingProvider, create_embedding_provider
+from models import CourseChunk
+from vector_store import VectorStore
+
+
+@pytest.fixture
+def embedding_server():
+    """Embedding server running the hashing provider on a temporary socket"""
+    # Unix socket paths are length limited, so avoid deep pytest tmp dirs
+    socket_dir = tempfile.mkdtemp(prefix="emb")
+    socket_path = os.path.join(socket_dir, "embed.sock")
+    server = EmbeddingServer(socket_path, HashingEmbeddingProvider(dimension=32), max_wait_ms=20)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    os.rmdir(socket_dir)
+
+
+@pytest.mark.integration
+class TestEmbeddingServer:
+    """Remote provider talks to the shared server"""
+
+    def test_remote_matches_local_provider(self, embedding_server):
+        remote = create_embedding_provider("remote", socket_path=embedding_server.socket_path)
+        texts = ["Model Context Protocol", "computer use"]
+
+        np.testing.assert_allclose(remote.embed(texts), embedding_server.provider.embed(texts))
+        assert remote.server_info()["provider"] == "hashing"
+
+    def test_concurrent_workers_are_batched(self, embedding_server):
+        remote = RemoteEmbeddingProvider(socket_path=embedding_server.socket_path)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: remote.embed([f"query {i}"]), range(16)))
+
+        assert all(result.shape == (1, 32) for result in results)
+        stats = embedding_server.batcher.stats()
+        assert stats["items"] == 16
+        assert stats["batches"] < 16
+
+    def test_vector_store_uses_server(self, embedding_server, tmp_path):
+        store = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="remote",
+                            embedding_server_socket=embedding_server.socket_path)
+        store.add_course_content([
+            CourseChunk(content="Servers expose tools", course_title="MCP", lesson_number=1, chunk_index=0),
+            CourseChunk(content="Agents click buttons", course_title="Computer Use", lesson_number=1, chunk_index=0),
+        ])
+
+        results = store.search("which servers expose tools", limit=1)
+
+        assert results.documents == ["Servers expose tools"]
+        assert store.warm_up()
+
+    def test_refuses_socket_of_running_server(self, embedding_server):
+        with pytest.raises(OSError, match="already listening"):
+            EmbeddingServer(embedding_server.socket_path, HashingEmbeddingProvider(dimension=32))
+
+        remote = RemoteEmbeddingProvider(socket_path=embedding_server.socket_path)
+        assert remote.embed(["still served"]).shape == (1, 32)
+
+    def test_replaces_stale_socket(self):
+        socket_dir = tempfile.mkdtemp(prefix="emb")
+        socket_path = os.path.join(socket_dir, "embed.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+
+        server = EmbeddingServer(socket_path, HashingEmbeddingProvider(dimension=32))
+        server.server_close()
+
+        assert not os.path.exists(socket_path)
+        os.rmdir(socket_dir)
+
+    def test_close_keeps_socket_of_newer_server(self, embedding_server):
+        old_inode = os.stat(embedding_server.socket_path).st_ino
+        embedding_server._socket_inode = old_inode + 1  # as if another server had re-created the path
+
+        embedding_server.server_close()
+
+        assert os.path.exists(embedding_server.socket_path)
+        embedding_server._socket_inode = old_inode
+
+    def test_unreachable_server(self):
+        remote = RemoteEmbeddingProvider(socket_path="/nonexistent/embed.sock")
+        with pytest.raises(OSError):
+            remote.embed(["hello"])
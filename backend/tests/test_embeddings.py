@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from embeddings import (
+    HashingEmbeddingProvider,
+    QuantizedSentenceTransformerProvider,
+    SentenceTransformerProvider,
+    create_embedding_provider,
+)
+from models import Course, CourseChunk, Lesson
+from vector_store import VectorStore
+
+
+@pytest.mark.unit
+class TestHashingEmbeddingProvider:
+    """Deterministic hashing-trick embeddings"""
+
+    def test_deterministic_and_normalized(self):
+        provider = HashingEmbeddingProvider(dimension=64)
+        first = provider.embed(["Model Context Protocol servers"])
+        second = HashingEmbeddingProvider(dimension=64).embed(["Model Context Protocol servers"])
+
+        assert first.shape == (1, 64)
+        assert first.dtype == np.float32
+        np.testing.assert_array_equal(first, second)
+        assert np.linalg.norm(first[0]) == pytest.approx(1.0)
+
+    def test_lexical_overlap_drives_similarity(self):
+        provider = HashingEmbeddingProvider()
+        query, related, unrelated = provider.embed([
+            "prompt caching", "how prompt caching works", "computer use agents"
+        ])
+
+        assert query @ related > query @ unrelated
+
+    def test_empty_text_embeds_to_zero_vector(self):
+        vector = HashingEmbeddingProvider(dimension=16).embed([""])[0]
+        assert not vector.any()
+
+
+@pytest.mark.unit
+class TestCreateEmbeddingProvider:
+    """Provider selection by name"""
+
+    def test_known_providers(self):
+        assert isinstance(create_embedding_provider("hashing", dimension=32), HashingEmbeddingProvider)
+        assert isinstance(create_embedding_provider("sentence-transformers"), SentenceTransformerProvider)
+        assert isinstance(create_embedding_provider("sentence-transformers-quantized"),
+                          QuantizedSentenceTransformerProvider)
+
+    def test_sentence_transformer_loads_lazily(self):
+        provider = create_embedding_provider("sentence-transformers")
+        assert not provider.is_loaded
+
+    def test_instance_passes_through(self):
+        provider = HashingEmbeddingProvider()
+        assert create_embedding_provider(provider) is provider
+
+    def test_unknown_provider(self):
+        with pytest.raises(ValueError):
+            create_embedding_provider("word2vec")
+
+
+@pytest.mark.integration
+def test_vector_store_with_hashing_provider(tmp_path):
+    """VectorStore works end to end without loading a transformer"""
+    store = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing")
+    course = Course(title="Prompt Compression", instructor="Test", course_link="http://example.com/pc",
+                    lessons=[Lesson(lesson_number=1, title="Basics")])
+    store.add_course_metadata(course)
+    store.add_course_content([
+        CourseChunk(content="Prompt compression shortens long prompts",
+                    course_title=course.title, lesson_number=1, chunk_index=0),
+        CourseChunk(content="Evaluation datasets measure quality",
+                    course_title=course.title, lesson_number=1, chunk_index=1),
+    ])
+
+    results = store.search("how does prompt compression work", limit=1)
+
+    assert results.error is None
+    assert results.documents == ["Prompt compression shortens long prompts"]
+    assert store.warm_up()
@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb.config import Settings
+
+from hnsw_sweep import exact_neighbours, hnsw_memory_bytes, sweep
+from vector_math import hnsw_configuration
+from vector_store import VectorStore
+
+
+@pytest.mark.unit
+class TestHnswSweep:
+    """Parameter sweep measuring HNSW recall against exact search"""
+
+    def test_sweep_grid(self, tmp_path):
+        client = chromadb.PersistentClient(path=str(tmp_path / "chroma"), settings=Settings(anonymized_telemetry=False))
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(300, 8)).astype(np.float32)
+        queries = rng.normal(size=(20, 8)).astype(np.float32)
+
+        rows = sweep(client, vectors, queries, k=5, ms=[4, 16], ef_searches=[5, 200])
+
+        assert [(row["m"], row["ef_search"]) for row in rows] == [(4, 5), (4, 200), (16, 5), (16, 200)]
+        assert all(0.0 <= row["recall"] <= 1.0 and row["p99_ms"] >= row["p50_ms"] for row in rows)
+        assert rows[-1]["recall"] > 0.95
+        assert rows[0]["memory_bytes"] < rows[-1]["memory_bytes"]
+        assert client.list_collections() == []
+
+    def test_exact_neighbours(self):
+        vectors = np.array([[0.0, 0.0], [1.0, 0.0], [5.0, 5.0]], dtype=np.float32)
+        assert exact_neighbours("l2", vectors, np.array([[0.9, 0.0]], dtype=np.float32), 2) == [[1, 0]]
+
+    def test_memory_grows_with_m(self):
+        assert hnsw_memory_bytes(1000, 384, 32) > hnsw_memory_bytes(1000, 384, 16) > 1000 * 384 * 4
+
+
+@pytest.mark.unit
+class TestHnswSettings:
+    """Per-collection HNSW parameters from the store's settings"""
+
+    SETTINGS = {
+        "course_catalog": {"space": "l2", "ef_search": 40},
+        "course_content": {"space": "cosine", "ef_construction": 200, "ef_search": 50, "max_neighbors": 32},
+    }
+
+    def test_new_collections_use_settings(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", hnsw_settings=self.SETTINGS)
+
+        assert hnsw_configuration(store.course_content) == self.SETTINGS["course_content"]
+        assert hnsw_configuration(store.course_catalog)["ef_search"] == 40
+        assert store.content_backend.space == "cosine"
+        assert store.search("servers expose tools", limit=1).documents[0].endswith("servers expose tools")
+
+    def test_generations_use_settings(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", hnsw_settings=self.SETTINGS)
+        builder = store.begin_generation()
+        assert hnsw_configuration(builder.course_content) == self.SETTINGS["course_content"]
+        builder.abort()
+
+    def test_existing_collection_updates_search_ef_only(self, tmp_path, capsys, make_hashing_store):
+        make_hashing_store(tmp_path / "chroma")
+        settings = {"course_content": {"ef_search": 64, "max_neighbors": 32}}
+
+        reopened = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                               hnsw_settings=settings)
+
+        assert hnsw_configuration(reopened.course_content)["ef_search"] == 64
+        assert hnsw_configuration(reopened.course_content)["max_neighbors"] == 16
+        assert "max_neighbors=16 (configured 32)" in capsys.readouterr().out
+
+    def test_unknown_setting_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="ef"):
+            VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                        hnsw_settings={"course_content": {"ef": 10}})
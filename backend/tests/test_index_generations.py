@@ -0,0 +1,258 @@
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import chromadb
+from chromadb.config import Settings
+
+from index_generations import (BUILDING_KEY, CollectionGenerationPointer, GenerationPointer, building_generations,
+                               collection_names, collection_version, draining_generations, previous_generations,
+                               stored_generations, switch_times, touch_collection, validate_tenant_id)
+from models import Course, CourseChunk
+from vector_store import VectorStore
+
+
+@pytest.mark.unit
+class TestIndexGenerations:
+    """Generation naming, pointer file and garbage-collection choice"""
+
+    def test_collection_names(self):
+        assert collection_names(0) == ("course_catalog", "course_content")
+        assert collection_names(3) == ("course_catalog__v3", "course_content__v3")
+        assert collection_names(0, "acme") == ("acme__course_catalog", "acme__course_content")
+        assert collection_names(2, "acme") == ("acme__course_catalog__v2", "acme__course_content__v2")
+
+    def test_tenant_ids(self):
+        assert validate_tenant_id("acme-corp_2") == "acme-corp_2"
+        for tenant_id in ("", "a__b", "-acme", "acme_", "a/b", "x" * 65, None):
+            with pytest.raises(ValueError):
+                validate_tenant_id(tenant_id)
+
+    def test_stored_generations_per_tenant(self):
+        names = ["course_content", "course_content__v2", "acme__course_content__v1",
+                 "acme__course_content_shard_abc", "course_catalog__v3"]
+        client = SimpleNamespace(list_collections=lambda: [SimpleNamespace(name=name) for name in names])
+
+        assert stored_generations(client) == {0, 2}
+        assert stored_generations(client, "acme") == {1}
+        assert stored_generations(client, "other") == set()
+
+    def test_pointer_round_trip(self, tmp_path):
+        pointer = GenerationPointer(str(tmp_path))
+        assert pointer.read() == 0
+
+        pointer.write(4)
+
+        assert GenerationPointer(str(tmp_path)).read() == 4
+        assert os.listdir(tmp_path) == [GenerationPointer.FILE_NAME]
+
+        GenerationPointer(str(tmp_path), "acme").write(2)
+        assert GenerationPointer(str(tmp_path), "acme").read() == 2
+        assert GenerationPointer(str(tmp_path)).read() == 4
+
+    def test_building_generations(self):
+        collections = [SimpleNamespace(name="course_content__v1", metadata={BUILDING_KEY: 1.0}),
+                       SimpleNamespace(name="course_content__v2", metadata={"version": "a"}),
+                       SimpleNamespace(name="course_content", metadata=None)]
+        client = SimpleNamespace(list_collections=lambda: collections)
+
+        assert building_generations(client) == {1}
+        assert building_generations(client, "acme") == set()
+
+    def test_collection_pointer_read_creates_nothing(self, tmp_path):
+        client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+        pointer = CollectionGenerationPointer(client, "acme")
+
+        assert pointer.read() == 0
+        assert client.list_collections() == []
+
+        pointer.write(2)
+        assert CollectionGenerationPointer(client, "acme").read() == 2
+        assert [collection.name for collection in client.list_collections()] == ["acme__index_generation"]
+
+    def test_pointer_never_moves_backwards(self, tmp_path):
+        pointer = GenerationPointer(str(tmp_path))
+        pointer.write(3)
+
+        with pytest.raises(ValueError):
+            pointer.write(2)
+
+        assert pointer.read() == 3
+        pointer.write(3)
+        assert pointer.read() == 3
+
+    def test_previous_generations(self):
+        assert previous_generations({0, 1, 2, 3}, live=3, keep_previous=1) == [0, 1]
+        assert previous_generations({0, 1, 2, 3}, live=3, keep_previous=0) == [0, 1, 2]
+        # Builds newer than the live generation are never collected
+        assert previous_generations({2, 3, 4}, live=3, keep_previous=0) == [2]
+        assert previous_generations({3}, live=3, keep_previous=1) == []
+
+    def test_pointer_records_switch_times(self, tmp_path):
+        pointer = GenerationPointer(str(tmp_path))
+        pointer.write(1)
+        pointer.write(2)
+
+        times = switch_times(pointer.record())
+        assert sorted(times) == [1, 2]
+        assert times[1] <= times[2] <= time.time()
+
+    def test_draining_generations(self):
+        times = {1: 100.0, 2: 200.0}
+        # Generation 0 was replaced at 100, generation 1 at 200
+        assert draining_generations([0, 1], times, grace_seconds=60, now=230) == {1}
+        assert draining_generations([0, 1], times, grace_seconds=60, now=300) == set()
+        # No recorded switch away from it: not waited for
+        assert draining_generations([0], {}, grace_seconds=60, now=0) == set()
+
+    def test_touch_collection_keeps_other_metadata(self, tmp_path):
+        client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+        collection = client.create_collection("course_content", metadata={"hnsw:space": "cosine", "owner": "a"})
+        assert collection_version(collection) is None
+
+        token = touch_collection(collection)
+
+        reopened = client.get_collection("course_content")
+        assert collection_version(reopened) == token
+        assert reopened.metadata["owner"] == "a"
+        assert touch_collection(reopened) != token
+
+    def test_touch_collection_ends_build(self, tmp_path):
+        client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+        client.create_collection("course_content__v1", metadata={BUILDING_KEY: time.time()})
+        assert building_generations(client) == {1}
+
+        touch_collection(client.get_collection("course_content__v1"))
+
+        assert building_generations(client) == set()
+
+
+@pytest.mark.unit
+class TestBlueGreenReindex:
+    """New index generations are built aside and switched to atomically"""
+
+    def course(self, title):
+        return Course(title=title, instructor="Test", course_link=f"http://example.com/{title}")
+
+    def chunk(self, title, text, index=0):
+        return CourseChunk(content=text, course_title=title, lesson_number=0, chunk_index=index)
+
+    def collection_names(self, store):
+        return sorted(collection.name for collection in store.client.list_collections())
+
+    @pytest.mark.parametrize("backend", ["chroma", "numpy", "sharded"])
+    def test_live_generation_serves_until_commit(self, tmp_path, backend, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_backend=backend, search_cache_size=16)
+        before = store.search("servers expose tools", limit=1).documents
+
+        builder = store.begin_generation()
+        builder.add_course(self.course("New Course"), [self.chunk("New Course", "fresh material")])
+        assert store.search("servers expose tools", limit=1).documents == before
+
+        builder.commit()
+
+        assert store.index_generation == 1
+        assert store.course_content.name == "course_content__v1"
+        assert store.search("servers expose tools", limit=5).documents == ["fresh material"]
+        assert store.get_existing_course_titles() == ["New Course"]
+        assert store.search("fresh", course_name="New").documents == ["fresh material"]
+
+    def test_old_generations_collected(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", generation_grace_seconds=0)
+        for generation in (1, 2):
+            builder = store.begin_generation()
+            builder.add_course(self.course(f"Course {generation}"), [self.chunk(f"Course {generation}", "text")])
+            builder.commit()
+
+        # The previous generation is kept for other workers; older ones are dropped
+        assert self.collection_names(store) == ["course_catalog__v1", "course_catalog__v2",
+                                                "course_content__v1", "course_content__v2"]
+        assert store.collect_generations(keep_previous=0) == [1]
+
+    def test_replaced_generations_kept_for_grace_period(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", generation_grace_seconds=60)
+        for generation in (1, 2):
+            builder = store.begin_generation()
+            builder.add_course(self.course(f"Course {generation}"), [self.chunk(f"Course {generation}", "text")])
+            builder.commit()
+
+        # Generation 1 replaced generation 0 moments ago: workers may still be searching it
+        assert "course_content" in self.collection_names(store)
+        assert store.collect_generations(keep_previous=0) == []
+
+    def test_concurrent_builds_get_distinct_generations(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        other = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing")
+        first = other.begin_generation()
+
+        # This store listed the generations before the other process created one
+        with patch("vector_store.stored_generations", side_effect=[{0}, {0, 1}]):
+            second = store.begin_generation()
+
+        assert (first.generation, second.generation) == (1, 2)
+
+    def test_build_older_than_live_is_kept_then_refused(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", generation_grace_seconds=0)
+        slow = store.begin_generation()
+        slow.add_course(self.course("Slow Course"), [self.chunk("Slow Course", "slow material")])
+        fast = store.begin_generation()
+        fast.add_course(self.course("Fast Course"), [self.chunk("Fast Course", "fast material")])
+        fast.commit()
+
+        # Still being built, so never collected despite being older than the live generation
+        assert store.collect_generations(keep_previous=0) == [0]
+        assert "course_content__v1" in self.collection_names(store)
+
+        with pytest.raises(ValueError, match="older than the live generation"):
+            slow.commit()
+
+        assert store.generation_pointer.read() == 2
+        assert store.search("material").documents == ["fast material"]
+        assert "course_content__v1" not in self.collection_names(store)
+
+    def test_failed_validation_keeps_live_generation(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        before = self.collection_names(store)
+
+        with pytest.raises(ValueError):
+            store.begin_generation().commit()
+
+        assert store.index_generation == 0
+        assert self.collection_names(store) == before
+        assert len(store.search("tools", limit=6).documents) == 6
+
+    def test_other_processes_follow_the_pointer(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        builder = store.begin_generation()
+        builder.add_course(self.course("New Course"), [self.chunk("New Course", "fresh material")])
+        worker = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing")
+        assert worker.sync_generation() is False
+
+        builder.commit()
+
+        assert worker.sync_generation() is True
+        assert worker.search("fresh material").documents == ["fresh material"]
+        reopened = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing")
+        assert reopened.index_generation == 1
+        assert reopened.get_course_count() == 1
+
+    def test_reads_switch_to_new_generation(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        worker = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                             revalidate_seconds=0)
+        assert len(worker.search("tools", limit=6).documents) == 6
+
+        builder = store.begin_generation()
+        builder.add_course(self.course("New Course"), [self.chunk("New Course", "fresh material")])
+        builder.commit()
+
+        assert worker.search("fresh material").documents == ["fresh material"]
+        assert worker.index_generation == 1
+        # Switching does not count as a new reindex
+        assert switch_times(store.generation_pointer.record()).keys() == {1}
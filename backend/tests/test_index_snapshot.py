@@ -0,0 +1,190 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb.config import Settings
+from unittest.mock import patch
+
+from index_generations import touch_collection
+from index_snapshot import IndexSnapshot, export_snapshot
+from models import Course, CourseChunk
+from search_backends import ChromaBackend, SnapshotBackend
+from vector_store import VectorStore
+
+
+def make_collections(tmp_path, count=60, dimension=16):
+    """Content collection of random chunks from three courses, plus a catalog"""
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"),
+                                       settings=Settings(anonymized_telemetry=False))
+    content = client.get_or_create_collection("course_content")
+    rng = np.random.default_rng(0)
+    content.add(
+        ids=[f"chunk_{i}" for i in range(count)],
+        embeddings=rng.normal(size=(count, dimension)).astype(np.float32),
+        documents=[f"document {i} – ünïcode" for i in range(count)],
+        metadatas=[{"course_title": f"Course {i % 3}", "lesson_number": i % 4, "chunk_index": i}
+                   for i in range(count)]
+    )
+    catalog = client.get_or_create_collection("course_catalog")
+    catalog.add(ids=["Course 0"], embeddings=[[0.0] * dimension], documents=["Course 0"],
+                metadatas=[{"title": "Course 0", "lessons_json": "[]", "lesson_count": 0}])
+    return content, catalog
+
+
+@pytest.mark.unit
+class TestIndexSnapshot:
+    """Export, memory-mapped load and search"""
+
+    def test_round_trip(self, tmp_path):
+        content, catalog = make_collections(tmp_path)
+        export_snapshot(content, catalog, str(tmp_path / "snapshot"))
+
+        snapshot = IndexSnapshot.load(str(tmp_path / "snapshot"))
+
+        assert len(snapshot) == 60
+        assert isinstance(snapshot.vectors, np.memmap)
+        assert snapshot.ids[7] == "chunk_7"
+        assert snapshot.documents[7] == "document 7 – ünïcode"
+        assert snapshot.metadata(7) == {"course_title": "Course 1", "lesson_number": 3, "chunk_index": 7}
+        assert snapshot.catalog_snapshot().titles() == ["Course 0"]
+        assert np.allclose(snapshot.vector("chunk_7"), content.get(ids=["chunk_7"], include=["embeddings"])
+                           ["embeddings"][0])
+
+    @pytest.mark.parametrize("where", [
+        None,
+        {"course_title": "Course 1"},
+        {"course_title": {"$in": ["Course 0", "Course 2"]}},
+        {"$and": [{"course_title": "Course 2"}, {"lesson_number": {"$ne": 3}}]},
+        {"chunk_index": {"$gte": 40}},
+        {"$and": [{"course_title": {"$in": ["Course 0", "Course 1"]}},
+                  {"lesson_number": {"$gte": 1}}, {"lesson_number": {"$lte": 2}}]},
+        {"course_title": "Missing"},
+    ])
+    def test_search_matches_chroma(self, tmp_path, where):
+        content, catalog = make_collections(tmp_path)
+        export_snapshot(content, catalog, str(tmp_path / "snapshot"))
+        queries = np.random.default_rng(2).normal(size=(2, 16)).astype(np.float32).tolist()
+
+        expected = ChromaBackend(content).query(queries, n_results=4, where=where)
+        actual = SnapshotBackend(content, path=str(tmp_path / "snapshot")).query(queries, n_results=4, where=where)
+
+        assert actual["ids"] == expected["ids"]
+        assert actual["documents"] == expected["documents"]
+        assert actual["metadatas"] == expected["metadatas"]
+        for got, want in zip(actual["distances"], expected["distances"]):
+            assert np.allclose(got, want, atol=1e-3)
+
+    def test_export_replaces_existing_snapshot(self, tmp_path):
+        content, catalog = make_collections(tmp_path)
+        path = str(tmp_path / "snapshot")
+        IndexSnapshot.write(path, [], [], [], [], [])
+        assert len(IndexSnapshot.load(path)) == 0
+
+        export_snapshot(content, catalog, path)
+
+        assert len(IndexSnapshot.load(path)) == 60
+        assert sorted(os.listdir(tmp_path)) == ["chroma", "snapshot"]
+
+    def test_load_missing_snapshot(self, tmp_path):
+        assert IndexSnapshot.load(str(tmp_path / "none")) is None
+
+
+@pytest.mark.unit
+class TestSnapshotBackend:
+    """Falls back to Chroma when the snapshot cannot be trusted"""
+
+    def test_missing_or_stale_snapshot_queries_chroma(self, tmp_path):
+        content, catalog = make_collections(tmp_path)
+        query = np.random.default_rng(3).normal(size=(1, 16)).astype(np.float32).tolist()
+        expected = ChromaBackend(content).query(query, n_results=3)
+
+        assert SnapshotBackend(content, path=str(tmp_path / "none")).query(query, 3)["ids"] == expected["ids"]
+
+        export_snapshot(content, catalog, str(tmp_path / "snapshot"))
+        content.delete(ids=["chunk_0"])
+        backend = SnapshotBackend(content, path=str(tmp_path / "snapshot"))
+        assert backend._get_snapshot() is None
+
+    def test_writes_detach_snapshot(self, tmp_path):
+        content, catalog = make_collections(tmp_path)
+        export_snapshot(content, catalog, str(tmp_path / "snapshot"))
+        backend = SnapshotBackend(content, path=str(tmp_path / "snapshot"))
+        assert backend._get_snapshot() is not None
+
+        vector = np.ones(16, dtype=np.float32)
+        content.add(ids=["new"], embeddings=[vector], documents=["new"],
+                    metadatas=[{"course_title": "Course 0", "lesson_number": 0, "chunk_index": 99}])
+        backend.added(["new"], [vector], ["new"], [{"course_title": "Course 0"}])
+
+        assert backend.query([vector.tolist()], 1)["ids"] == [["new"]]
+
+        # A snapshot exported after the write is picked up again
+        export_snapshot(content, catalog, str(tmp_path / "snapshot"))
+        assert backend._get_snapshot() is not None
+        assert backend.query([vector.tolist()], 1)["ids"] == [["new"]]
+
+    def test_snapshot_of_older_version_not_used(self, tmp_path):
+        content, catalog = make_collections(tmp_path)
+        export_snapshot(content, catalog, str(tmp_path / "snapshot"))
+        # Same number of chunks, different contents
+        content.update(ids=["chunk_0"], embeddings=[[1.0] * 16], documents=["changed"])
+        touch_collection(content)
+
+        backend = SnapshotBackend(content, path=str(tmp_path / "snapshot"))
+
+        assert backend._get_snapshot() is None
+        assert backend.catalog_records(catalog) is None
+
+
+@pytest.mark.unit
+class TestSnapshotExport:
+    """VectorStore exports a snapshot other processes can serve from"""
+
+    def test_snapshot_backend_matches_chroma(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        store.add_course_metadata(Course(title="MCP Course", instructor="Test",
+                                         course_link="http://example.com/mcp"))
+        store.export_snapshot(str(tmp_path / "snapshot"))
+
+        serving = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                              search_backend="snapshot",
+                              search_backend_options={"path": str(tmp_path / "snapshot")})
+
+        assert serving.content_backend._get_snapshot() is not None
+        for course_name in (None, "MCP"):
+            expected = store.search("servers expose tools", course_name=course_name)
+            actual = serving.search("servers expose tools", course_name=course_name)
+            # Hashing embeddings tie often, so compare distances rather than order
+            assert np.allclose(actual.distances, expected.distances, atol=1e-4)
+            assert actual.documents[0] == expected.documents[0]
+
+    def test_catalog_served_from_snapshot(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        store.export_snapshot(str(tmp_path / "snapshot"))
+        serving = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                              search_backend="snapshot",
+                              search_backend_options={"path": str(tmp_path / "snapshot")})
+
+        with patch.object(serving.course_catalog, "get", side_effect=AssertionError("read Chroma")):
+            assert serving._load_catalog_snapshot().titles() == store.get_existing_course_titles()
+
+    def test_serving_follows_new_exports(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        store.export_snapshot(str(tmp_path / "snapshot"))
+        serving = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                              search_backend="snapshot", revalidate_seconds=0,
+                              search_backend_options={"path": str(tmp_path / "snapshot")})
+        store.replace_course(Course(title="MCP Course", instructor="Test"),
+                             [CourseChunk(content="oranges", course_title="MCP Course", lesson_number=0,
+                                          chunk_index=0)])
+
+        # Stale snapshot: Chroma answers
+        assert serving.search("oranges", course_name="MCP Course").documents == ["oranges"]
+        assert serving.content_backend._get_snapshot() is None
+
+        store.export_snapshot(str(tmp_path / "snapshot"))
+        assert serving.search("oranges", course_name="MCP Course").documents == ["oranges"]
+        assert serving.content_backend._get_snapshot() is not None
@@ -0,0 +1,205 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb.config import Settings
+
+from index_generations import touch_collection
+from ivf_index import IVFIndex, kmeans
+from search_backends import IVFBackend, NumpyBackend
+
+
+def clustered_chunks(count=400, dimension=16, clusters=8, seed=0):
+    """Chunks drawn around a few well separated centres"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(scale=10.0, size=(clusters, dimension))
+    labels = rng.integers(clusters, size=count)
+    vectors = (centres[labels] + rng.normal(size=(count, dimension))).astype(np.float32)
+    ids = [f"chunk_{i}" for i in range(count)]
+    documents = [f"document {i}" for i in range(count)]
+    metadatas = [{"course_title": f"Course {i % 5}", "lesson_number": i % 3} for i in range(count)]
+    return ids, vectors, documents, metadatas
+
+
+def make_collection(tmp_path):
+    """Chroma content collection holding the clustered chunks"""
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"),
+                                       settings=Settings(anonymized_telemetry=False))
+    collection = client.get_or_create_collection("course_content")
+    ids, vectors, documents, metadatas = clustered_chunks(count=120)
+    collection.add(ids=ids, embeddings=vectors, documents=documents, metadatas=metadatas)
+    return collection
+
+
+def exact_ids(vectors, ids, query, k, rows=None):
+    rows = np.arange(len(ids)) if rows is None else np.asarray(rows)
+    distances = np.sum((vectors[rows] - query) ** 2, axis=1)
+    return [ids[row] for row in rows[np.argsort(distances)[:k]]]
+
+
+@pytest.mark.unit
+class TestIVFIndex:
+    """Partitioned search, filter pushdown, updates and persistence"""
+
+    def test_kmeans_separates_clusters(self):
+        rng = np.random.default_rng(0)
+        vectors = np.vstack([rng.normal(loc=-5, size=(50, 2)), rng.normal(loc=5, size=(50, 2))]).astype(np.float32)
+
+        centroids = kmeans(vectors, 2, iterations=10)
+
+        assert sorted(np.round(centroids[:, 0]).tolist()) == pytest.approx([-5, 5], abs=1)
+
+    def test_full_probe_is_exact(self):
+        ids, vectors, documents, metadatas = clustered_chunks()
+        index = IVFIndex.build(ids, vectors, documents, metadatas, n_lists=8)
+        query = vectors[7] + 0.1
+
+        results = index.search([query], n_results=5, nprobe=8)
+
+        assert results["ids"][0] == exact_ids(vectors, ids, query, 5)
+        assert results["distances"][0] == sorted(results["distances"][0])
+
+    def test_small_nprobe_keeps_recall(self):
+        ids, vectors, documents, metadatas = clustered_chunks()
+        index = IVFIndex.build(ids, vectors, documents, metadatas, n_lists=16)
+        queries = vectors[:20] + 0.05
+
+        results = index.search(queries, n_results=5, nprobe=2)
+        recall = np.mean([len(set(got) & set(exact_ids(vectors, ids, query, 5))) / 5
+                          for got, query in zip(results["ids"], queries)])
+
+        assert recall >= 0.9
+
+    def test_filters_pushed_down_and_probe_widens(self):
+        ids, vectors, documents, metadatas = clustered_chunks()
+        index = IVFIndex.build(ids, vectors, documents, metadatas, n_lists=16)
+        where = {"$and": [{"course_title": "Course 2"}, {"lesson_number": 1}]}
+        rows = [row for row, meta in enumerate(metadatas) if meta["course_title"] == "Course 2" and meta["lesson_number"] == 1]
+
+        results = index.search([vectors[0]], n_results=10, nprobe=1, where=where)
+
+        assert len(results["ids"][0]) == 10
+        assert all(meta["course_title"] == "Course 2" and meta["lesson_number"] == 1
+                   for meta in results["metadatas"][0])
+        full = index.search([vectors[0]], n_results=10, nprobe=16, where=where)
+        assert full["ids"][0] == exact_ids(vectors, ids, vectors[0], 10, rows)
+
+    def test_upsert_assigns_and_replaces(self):
+        ids, vectors, documents, metadatas = clustered_chunks()
+        index = IVFIndex.build(ids, vectors, documents, metadatas, n_lists=8)
+        moved = vectors[100] + 0.01
+
+        updated = index.upsert(["chunk_0", "new"], np.vstack([moved, moved]), ["moved", "new"],
+                               [{"course_title": "Course 0"}, {"course_title": "New"}])
+
+        assert len(updated) == len(index) + 1
+        assert sorted(updated.search([moved], n_results=2, nprobe=1)["ids"][0]) == ["chunk_0", "new"]
+        assert np.allclose(updated.vector("chunk_0"), moved)
+        assert np.allclose(index.vector("chunk_0"), vectors[0])
+
+    def test_remove_drops_chunks(self):
+        ids, vectors, documents, metadatas = clustered_chunks()
+        index = IVFIndex.build(ids, vectors, documents, metadatas, n_lists=8)
+
+        removed = index.remove(["chunk_0", "missing"])
+
+        assert len(removed) == len(index) - 1
+        assert removed.vector("chunk_0") is None
+        assert "chunk_0" not in removed.search([vectors[0]], n_results=5, nprobe=8)["ids"][0]
+        assert index.remove(["missing"]) is index
+
+    def test_save_and_load(self, tmp_path):
+        ids, vectors, documents, metadatas = clustered_chunks()
+        index = IVFIndex.build(ids, vectors, documents, metadatas, n_lists=8)
+        index.save(str(tmp_path / "ivf"))
+
+        loaded = IVFIndex.load(str(tmp_path / "ivf"))
+
+        assert loaded.stats() == index.stats()
+        query = vectors[3]
+        assert loaded.search([query], 5, nprobe=2) == index.search([query], 5, nprobe=2)
+
+    def test_save_replaces_earlier_index(self, tmp_path):
+        ids, vectors, documents, metadatas = clustered_chunks()
+        path = str(tmp_path / "ivf")
+        assert IVFIndex.load(path) is None
+
+        for version in range(3):
+            IVFIndex.build(ids[:100 + version], vectors[:100 + version], documents, metadatas,
+                           n_lists=4).save(path, {"version": version})
+
+        loaded = IVFIndex.load(path)
+        assert len(loaded) == 102
+        assert loaded.manifest["source"] == {"version": 2}
+        # The live version and the one before it are kept
+        assert len([name for name in os.listdir(path) if name.startswith("v-")]) == 2
+
+    def test_load_flat_layout(self, tmp_path):
+        ids, vectors, documents, metadatas = clustered_chunks()
+        index = IVFIndex.build(ids, vectors, documents, metadatas, n_lists=8)
+        path = tmp_path / "ivf"
+        path.mkdir()
+        index._write(str(path), None)
+        (path / "notes.txt").write_text("not part of the index")
+
+        assert len(IVFIndex.load(str(path))) == len(index)
+        index.save(str(path))
+        assert not any((path / name).exists() for name in IVFIndex.FILES)
+        assert (path / "notes.txt").read_text() == "not part of the index"
+        assert len(IVFIndex.load(str(path))) == len(index)
+
+
+@pytest.mark.unit
+class TestIVFBackend:
+    """IVF backend built from and kept in step with the content collection"""
+
+    def test_full_probe_matches_exact_backend(self, tmp_path):
+        collection = make_collection(tmp_path)
+        queries = np.random.default_rng(3).normal(size=(3, 16)).astype(np.float32).tolist()
+
+        ivf = IVFBackend(collection, n_lists=4, nprobe=4)
+
+        assert ivf.query(queries, 5, {"course_title": "Course 1"})["ids"] == \
+            NumpyBackend(collection).query(queries, 5, {"course_title": "Course 1"})["ids"]
+
+    def test_saved_index_reused_and_stale_index_rebuilt(self, tmp_path):
+        collection = make_collection(tmp_path)
+        path = str(tmp_path / "ivf")
+        IVFBackend(collection, index_path=path, n_lists=4).query([[0.0] * 16], 1)
+
+        reused = IVFBackend(collection, index_path=path, n_lists=4)
+        assert reused._load_index() is not None
+
+        collection.add(ids=["extra"], embeddings=[[1.0] * 16], documents=["extra"],
+                       metadatas=[{"course_title": "Course 9"}])
+        assert IVFBackend(collection, index_path=path)._load_index() is None
+
+    def test_saved_index_of_older_version_rebuilt(self, tmp_path):
+        collection = make_collection(tmp_path)
+        path = str(tmp_path / "ivf")
+        IVFBackend(collection, index_path=path, n_lists=4).query([[0.0] * 16], 1)
+
+        # Same chunk count, different text, as after replacing a course
+        vector = collection.get(ids=["chunk_0"], include=["embeddings"])["embeddings"][0]
+        collection.update(ids=["chunk_0"], embeddings=[vector], documents=["rewritten"])
+        touch_collection(collection)
+
+        backend = IVFBackend(collection, index_path=path, n_lists=4)
+        assert backend._load_index() is None
+        assert backend.query([vector], 1)["documents"] == [["rewritten"]]
+        assert IVFBackend(collection, index_path=path)._load_index() is not None
+
+    def test_writes_after_clear_rebuild_partitions(self, tmp_path):
+        collection = make_collection(tmp_path)
+        backend = IVFBackend(collection, n_lists=4)
+        backend.query([[0.0] * 16], 1)
+
+        backend.cleared(collection)
+        assert backend.query([[0.0] * 16], 1)["ids"] == [[]]
+
+        backend.added(["a", "b"], np.eye(2, 16, dtype=np.float32), ["a", "b"],
+                      [{"course_title": "A"}, {"course_title": "B"}])
+        assert backend.query([[1.0] + [0.0] * 15], 1)["ids"] == [["a"]]
@@ -0,0 +1,155 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import patch
+
+from filters import matches_where
+from lexical_index import BM25Index
+from models import CourseChunk
+from vector_math import compute_distances
+
+
+def make_index():
+    index = BM25Index()
+    index.add(
+        ["a_0", "a_1", "b_0"],
+        ["The get_or_create_collection API returns a collection",
+         "Collections store embeddings and metadata",
+         "RAG pipelines retrieve chunks before generation"],
+        [{"course_title": "A", "lesson_number": 0},
+         {"course_title": "A", "lesson_number": 1},
+         {"course_title": "B", "lesson_number": 0}]
+    )
+    return index
+
+
+@pytest.mark.unit
+class TestBM25Index:
+    """Incremental BM25 scoring and filtering"""
+
+    def test_exact_identifier_ranks_first(self):
+        hits = make_index().search("get_or_create_collection", limit=3)
+
+        assert hits[0][0] == "a_0"
+        assert len(hits) == 1
+
+    def test_rare_terms_outweigh_common_terms(self):
+        index = make_index()
+        index.add(["b_1"], ["collection store of chunks"], [{"course_title": "B", "lesson_number": 1}])
+
+        assert index.search("pipelines collection", limit=1)[0][0] == "b_0"
+
+    def test_where_filter_applies(self):
+        hits = make_index().search("embeddings", limit=5,
+                                   where={"$and": [{"course_title": "A"}, {"lesson_number": 1}]})
+
+        assert [doc_id for doc_id, _ in hits] == ["a_1"]
+
+    def test_re_adding_replaces_document(self):
+        index = make_index()
+        index.add(["a_0"], ["nothing relevant here"], [{"course_title": "A", "lesson_number": 0}])
+
+        assert "a_0" not in [doc_id for doc_id, _ in index.search("get_or_create_collection", 5)]
+        assert len(index) == 3
+
+    def test_remove_and_clear(self):
+        index = make_index()
+        index.remove(["b_0"])
+        assert index.search("RAG", limit=5) == []
+        assert index.get("b_0") is None
+
+        index.clear()
+        assert len(index) == 0
+        assert index.search("collection", limit=5) == []
+
+
+@pytest.mark.unit
+class TestMatchesWhere:
+    """In-process evaluation of Chroma where filters"""
+
+    def test_operators(self):
+        metadata = {"course_title": "A", "lesson_number": 2}
+
+        assert matches_where(metadata, None)
+        assert matches_where(metadata, {"course_title": "A"})
+        assert matches_where(metadata, {"lesson_number": {"$gte": 1, "$lte": 2}})
+        assert matches_where(metadata, {"course_title": {"$in": ["A", "B"]}})
+        assert not matches_where(metadata, {"course_title": {"$nin": ["A"]}})
+        assert matches_where(metadata, {"$or": [{"course_title": "B"}, {"lesson_number": 2}]})
+
+    def test_unknown_operator_rejected(self):
+        with pytest.raises(ValueError):
+            matches_where({"lesson_number": 1}, {"lesson_number": {"$like": 1}})
+
+
+@pytest.mark.unit
+class TestHybridSearch:
+    """BM25 + vector retrieval fused with reciprocal rank fusion"""
+
+    def add_identifier_chunk(self, store):
+        store.add_course_content([
+            CourseChunk(content="Call get_or_create_collection once at startup",
+                        course_title="MCP Course", lesson_number=1, chunk_index=3)
+        ])
+
+    def test_default_is_pure_vector_search(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+
+        with patch.object(store, "_lexical_search", side_effect=AssertionError("no lexical")):
+            results = store.search("servers", limit=2)
+
+        assert results.error is None
+        assert len(results.documents) == 2
+
+    def test_lexical_only_hit_is_returned_with_distance(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", hybrid_candidates=2)
+        self.add_identifier_chunk(store)
+
+        with patch.object(store, "_lexical_search", return_value=[("MCP_Course_3", 4.2)]):
+            hybrid = store.search("agents take screenshots", limit=1,
+                                  lexical_weight=1.0, vector_weight=0.0)
+
+        assert "screenshots" in store.search("agents take screenshots", limit=1).documents[0]
+        assert hybrid.documents == ["Call get_or_create_collection once at startup"]
+        assert hybrid.ids == ["MCP_Course_3"]
+        assert hybrid.metadata[0]["chunk_index"] == 3
+        assert hybrid.distances[0] > 0
+
+    def test_hits_in_both_rankings_win(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        self.add_identifier_chunk(store)
+
+        results = store.search("clients and get_or_create_collection", limit=2, lexical_weight=1.0)
+
+        assert results.ids[0] == "MCP_Course_3"
+
+    def test_filters_apply_to_lexical_hits(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", hybrid_lexical_weight=1.0)
+        self.add_identifier_chunk(store)
+
+        results = store.search("get_or_create_collection tools", lesson_number=0, limit=5)
+
+        assert results.documents
+        assert "MCP_Course_3" not in results.ids
+        assert all(meta["lesson_number"] == 0 for meta in results.metadata)
+
+    def test_index_tracks_writes(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", hybrid_lexical_weight=1.0)
+        store.search("tools")
+        self.add_identifier_chunk(store)
+
+        assert store._lexical_search("get_or_create_collection", None, 5)[0][0] == "MCP_Course_3"
+
+        store.clear_all_data()
+        assert store._lexical_search("tools", None, 5) == []
+
+    def test_lexical_distance_matches_chroma(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        vector = store.search("servers expose tools", limit=1)
+        embedding = store._embed_query("servers expose tools")
+        stored = store.course_content.get(ids=vector.ids, include=["embeddings"])
+        distances = compute_distances(store.content_backend.space, embedding, stored["embeddings"])
+
+        assert distances[0][0] == pytest.approx(vector.distances[0], abs=1e-4)
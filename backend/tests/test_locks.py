@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+
+import pytest
+
+from locks import ReadWriteLock
+
+
+@pytest.mark.unit
+class TestReadWriteLock:
+    """Shared readers, exclusive writers"""
+
+    def test_readers_share(self):
+        lock = ReadWriteLock()
+        inside = threading.Barrier(2, timeout=2)
+
+        def reader():
+            with lock.read():
+                inside.wait()
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=2)
+        assert not any(thread.is_alive() for thread in threads)
+
+    def test_writer_excludes_readers(self):
+        lock = ReadWriteLock()
+        events = []
+        writing = threading.Event()
+        release = threading.Event()
+
+        def writer():
+            with lock.write():
+                writing.set()
+                release.wait(2)
+                events.append("write")
+
+        def reader():
+            with lock.read():
+                events.append("read")
+
+        write_thread = threading.Thread(target=writer)
+        write_thread.start()
+        writing.wait(2)
+        read_thread = threading.Thread(target=reader)
+        read_thread.start()
+        read_thread.join(timeout=0.1)
+        assert events == []
+
+        release.set()
+        write_thread.join(timeout=2)
+        read_thread.join(timeout=2)
+        assert events == ["write", "read"]
+
+    def test_waiting_writer_blocks_new_readers(self):
+        lock = ReadWriteLock()
+        events = []
+        reading = threading.Event()
+        release = threading.Event()
+
+        def first_reader():
+            with lock.read():
+                reading.set()
+                release.wait(2)
+            events.append("first read done")
+
+        def writer():
+            with lock.write():
+                events.append("write")
+
+        def late_reader():
+            with lock.read():
+                events.append("late read")
+
+        threads = [threading.Thread(target=first_reader)]
+        threads[0].start()
+        reading.wait(2)
+        threads.append(threading.Thread(target=writer))
+        threads[1].start()
+        while not lock._waiting_writers:
+            pass
+        threads.append(threading.Thread(target=late_reader))
+        threads[2].start()
+        threads[2].join(timeout=0.1)
+        assert "late read" not in events
+
+        release.set()
+        for thread in threads:
+            thread.join(timeout=2)
+        assert events.index("write") < events.index("late read")
@@ -0,0 +1,146 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from quantization import BinaryQuantizer, QuantizedIndex, ScalarQuantizer
+
+
+def unit_vectors(count=500, dimension=64, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_index(tmp_path, mode="int8", oversample=4, count=500):
+    vectors = unit_vectors(count)
+    ids = [f"chunk_{i}" for i in range(count)]
+    metadatas = [{"course_title": f"Course {i % 4}", "lesson_number": i % 3} for i in range(count)]
+    index = QuantizedIndex(str(tmp_path / "vectors.f32"), mode=mode, oversample=oversample)
+    index.build(ids, vectors, [f"document {i}" for i in range(count)], metadatas)
+    return index, ids, vectors
+
+
+def recall_at(index, ids, vectors, queries, k):
+    results = index.search("l2", queries, k)
+    recalls = []
+    for got, query in zip(results["ids"], queries):
+        exact = np.argsort(np.sum((vectors - query) ** 2, axis=1))[:k]
+        recalls.append(len(set(got) & {ids[row] for row in exact}) / k)
+    return float(np.mean(recalls))
+
+
+@pytest.mark.unit
+class TestQuantizers:
+    """Code construction"""
+
+    def test_scalar_round_trip_error_is_small(self):
+        vectors = unit_vectors()
+        quantizer = ScalarQuantizer(vectors)
+
+        codes = quantizer.encode(vectors)
+
+        assert codes.dtype == np.uint8
+        assert np.abs(quantizer.decode(codes) - vectors).max() <= quantizer.scale.max()
+
+    def test_binary_codes_are_packed_bits(self):
+        vectors = unit_vectors(dimension=64)
+        quantizer = BinaryQuantizer(vectors)
+
+        codes = quantizer.encode(vectors)
+
+        assert codes.shape == (len(vectors), 8)
+        assert np.argmin(quantizer.distances("l2", vectors[0], codes, np.linalg.norm(vectors, axis=1))) == 0
+
+
+@pytest.mark.unit
+class TestQuantizedIndex:
+    """Candidate generation on codes with exact rescoring"""
+
+    @pytest.mark.parametrize("mode,oversample,minimum", [("int8", 4, 0.98), ("binary", 10, 0.9)])
+    def test_recall_close_to_exact(self, tmp_path, mode, oversample, minimum):
+        index, ids, vectors = build_index(tmp_path, mode, oversample)
+        queries = unit_vectors(30, seed=1)
+
+        assert recall_at(index, ids, vectors, queries, 5) >= minimum
+
+    def test_distances_are_exact(self, tmp_path):
+        index, ids, vectors = build_index(tmp_path)
+        query = unit_vectors(1, seed=2)[0]
+
+        results = index.search("l2", [query], 3)
+
+        for doc_id, distance in zip(results["ids"][0], results["distances"][0]):
+            expected = np.sum((vectors[ids.index(doc_id)] - query) ** 2)
+            assert distance == pytest.approx(expected, abs=1e-4)
+
+    @pytest.mark.parametrize("mode,minimum", [("int8", 3.5), ("binary", 20)])
+    def test_memory_reduction(self, tmp_path, mode, minimum):
+        index, _, _ = build_index(tmp_path, mode)
+
+        assert index.memory_stats()["compression"] >= minimum
+
+    def test_filters(self, tmp_path):
+        index, _, _ = build_index(tmp_path)
+        where = {"$and": [{"course_title": "Course 1"}, {"lesson_number": 2}]}
+
+        results = index.search("l2", unit_vectors(2, seed=3), 5, where)
+
+        for metadatas in results["metadatas"]:
+            assert len(metadatas) == 5
+            assert all(meta["course_title"] == "Course 1" and meta["lesson_number"] == 2 for meta in metadatas)
+
+    def test_add_appends_and_replaces(self, tmp_path):
+        index, _, _ = build_index(tmp_path)
+        vector = unit_vectors(1, seed=4)
+
+        index.add(["chunk_0", "new"], np.vstack([vector, vector]), ["moved", "new"],
+                  [{"course_title": "Course 0"}, {"course_title": "New"}])
+
+        assert len(index) == 501
+        assert sorted(index.search("l2", vector, 2)["ids"][0]) == ["chunk_0", "new"]
+        assert np.allclose(index.vector("chunk_0"), vector[0])
+
+    def test_add_after_empty_build_fits_quantizer(self, tmp_path):
+        index = QuantizedIndex(str(tmp_path / "vectors.f32"))
+        index.build([], [], [], [])
+        assert index.search("l2", [[0.0] * 64], 1)["ids"] == [[]]
+
+        vectors = unit_vectors(20)
+        index.add([f"c{i}" for i in range(20)], vectors, ["d"] * 20, [{}] * 20)
+
+        assert index.search("l2", vectors[5:6], 1)["ids"] == [["c5"]]
+
+    def test_remove_drops_chunks(self, tmp_path):
+        index, _, vectors = build_index(tmp_path)
+
+        index.remove(["chunk_7", "missing"])
+
+        assert len(index) == 499
+        assert index.vector("chunk_7") is None
+        assert "chunk_7" not in index.search("l2", vectors[7:8], 5)["ids"][0]
+        assert np.allclose(index.vector("chunk_8"), vectors[8])
+
+    def test_indexes_sharing_a_path_keep_their_own_rows(self, tmp_path):
+        first, ids, vectors = build_index(tmp_path, count=100)
+        # Another worker rebuilds and extends its index on the same path
+        second, _, _ = build_index(tmp_path, count=40)
+        second.add(["extra"], unit_vectors(1, seed=9), ["extra"], [{}])
+
+        assert first.search("l2", vectors[5:6], 1)["ids"] == [["chunk_5"]]
+        assert np.allclose(first.vector("chunk_88"), vectors[88])
+
+    def test_rebuild_removes_previous_file(self, tmp_path):
+        index, ids, vectors = build_index(tmp_path)
+        index.build(ids, vectors, ["d"] * len(ids), [{}] * len(ids))
+
+        assert len(list(tmp_path.glob("vectors.f32.*"))) == 1
+
+    def test_reset_removes_file(self, tmp_path):
+        index, _, _ = build_index(tmp_path, count=50)
+        index.reset()
+
+        assert not index.is_built
+        assert list(tmp_path.glob("vectors.f32.*")) == []
@@ -17,6 +17,9 @@ class TestRealSystem(unittest.TestCase):
         """Set up with real components"""
         try:
             self.vector_store = VectorStore(config.CHROMA_PATH, config.EMBEDDING_MODEL)
+            # The embedding model loads lazily, so surface load failures here
+            if not self.vector_store.warm_up():
+                self.skipTest(f"Could not load embedding model: {self.vector_store.warm_up_error}")
             self.search_tool = CourseSearchTool(self.vector_store)
             self.tool_manager = ToolManager()
             self.tool_manager.register_tool(self.search_tool)
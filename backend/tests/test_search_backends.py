@@ -0,0 +1,308 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb.config import Settings
+from unittest.mock import patch
+
+from models import Course, CourseChunk
+from search_backends import (ChromaBackend, NumpyBackend, QuantizedBackend, ShardedBackend, course_titles_in,
+                             create_search_backend)
+from vector_math import compute_distances, hnsw_configuration, top_k
+
+
+def make_collection(tmp_path, count=60, dimension=16, space=None):
+    """Chroma collection filled with random chunks from three courses"""
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"),
+                                       settings=Settings(anonymized_telemetry=False))
+    metadata = {"hnsw:space": space} if space else None
+    collection = client.get_or_create_collection("course_content", metadata=metadata)
+    rng = np.random.default_rng(0)
+    collection.add(
+        ids=[f"chunk_{i}" for i in range(count)],
+        embeddings=rng.normal(size=(count, dimension)).astype(np.float32),
+        documents=[f"document {i}" for i in range(count)],
+        metadatas=[{"course_title": f"Course {i % 3}", "lesson_number": i % 4, "chunk_index": i}
+                   for i in range(count)]
+    )
+    return collection
+
+
+@pytest.mark.unit
+class TestNumpyBackend:
+    """Exact NumPy search agrees with Chroma"""
+
+    @pytest.mark.parametrize("space", [None, "cosine", "ip"])
+    def test_matches_chroma(self, tmp_path, space):
+        collection = make_collection(tmp_path, space=space)
+        queries = np.random.default_rng(1).normal(size=(3, 16)).astype(np.float32).tolist()
+
+        expected = ChromaBackend(collection).query(queries, n_results=5)
+        actual = NumpyBackend(collection).query(queries, n_results=5)
+
+        assert actual["ids"] == expected["ids"]
+        assert np.allclose(actual["distances"], expected["distances"], atol=1e-3)
+        assert actual["metadatas"] == expected["metadatas"]
+
+    @pytest.mark.parametrize("where", [
+        {"course_title": "Course 1"},
+        {"lesson_number": 2},
+        {"$and": [{"course_title": "Course 2"}, {"lesson_number": 3}]},
+        {"chunk_index": {"$gte": 40}},
+        {"course_title": {"$in": ["Course 0", "Course 2"]}},
+        {"$and": [{"course_title": {"$in": ["Course 0", "Course 1"]}},
+                  {"lesson_number": {"$gte": 1}}, {"lesson_number": {"$lte": 2}}]},
+    ])
+    def test_filters_match_chroma(self, tmp_path, where):
+        collection = make_collection(tmp_path)
+        queries = np.random.default_rng(2).normal(size=(2, 16)).astype(np.float32).tolist()
+
+        expected = ChromaBackend(collection).query(queries, n_results=4, where=where)
+        actual = NumpyBackend(collection).query(queries, n_results=4, where=where)
+
+        assert actual["ids"] == expected["ids"]
+
+    def test_unknown_filter_value_returns_nothing(self, tmp_path):
+        backend = NumpyBackend(make_collection(tmp_path))
+
+        results = backend.query([[0.0] * 16], n_results=3, where={"course_title": "Missing"})
+
+        assert results["ids"] == [[]]
+
+    def test_added_chunks_are_searchable_and_replace_existing(self, tmp_path):
+        backend = NumpyBackend(make_collection(tmp_path))
+        assert len(backend) == 60
+
+        vector = np.full((1, 16), 10.0, dtype=np.float32)
+        backend.added(["chunk_0", "new"], np.vstack([vector, vector]), ["replaced", "new document"],
+                      [{"course_title": "Course 0"}, {"course_title": "New"}])
+
+        assert len(backend) == 61
+        results = backend.query(vector.tolist(), n_results=2)
+        assert sorted(results["ids"][0]) == ["chunk_0", "new"]
+        assert backend.query(vector.tolist(), n_results=1, where={"course_title": "New"})["ids"] == [["new"]]
+        ids, vectors = backend.get_embeddings(["new", "missing"])
+        assert ids == ["new"] and np.allclose(vectors[0], vector[0])
+
+    def test_cleared_reloads_from_new_collection(self, tmp_path):
+        collection = make_collection(tmp_path)
+        backend = NumpyBackend(collection)
+        backend.query([[0.0] * 16], n_results=1)
+
+        client = chromadb.PersistentClient(path=str(tmp_path / "chroma"),
+                                           settings=Settings(anonymized_telemetry=False))
+        client.delete_collection("course_content")
+        empty = client.get_or_create_collection("course_content")
+        backend.cleared(empty)
+
+        assert backend.query([[0.0] * 16], n_results=1)["ids"] == [[]]
+
+
+def chroma_client(tmp_path):
+    """Client for the directory make_collection writes to"""
+    return chromadb.PersistentClient(path=str(tmp_path / "chroma"), settings=Settings(anonymized_telemetry=False))
+
+
+@pytest.mark.unit
+class TestShardedBackend:
+    """Per-course shard collections with routing and fan-out"""
+
+    @pytest.mark.parametrize("shards", [0, 2])
+    @pytest.mark.parametrize("where", [
+        None,
+        {"course_title": "Course 1"},
+        {"course_title": {"$in": ["Course 0", "Course 2"]}},
+        {"$and": [{"course_title": "Course 2"}, {"lesson_number": 3}]},
+        {"lesson_number": 1},
+    ])
+    def test_matches_chroma(self, tmp_path, shards, where):
+        collection = make_collection(tmp_path)
+        backend = ShardedBackend(collection, client=chroma_client(tmp_path), shards=shards)
+        queries = np.random.default_rng(4).normal(size=(2, 16)).astype(np.float32).tolist()
+
+        expected = ChromaBackend(collection).query(queries, n_results=5, where=where)
+        actual = backend.query(queries, n_results=5, where=where)
+
+        assert actual["ids"] == expected["ids"]
+        for got, want in zip(actual["distances"], expected["distances"]):
+            assert np.allclose(got, want, atol=1e-3)
+
+    def test_one_shard_per_course_and_routing(self, tmp_path):
+        collection = make_collection(tmp_path)
+        backend = ShardedBackend(collection, client=chroma_client(tmp_path))
+        shards = backend._get_shards()
+
+        assert len(shards) == 3
+        assert sorted(shard.count() for shard in shards.values()) == [20, 20, 20]
+        assert backend._route(shards, {"course_title": "Course 1"}) == [shards[backend.shard_name("Course 1")]]
+        assert backend._route(shards, {"course_title": "Unknown"}) == []
+
+    def test_existing_shards_reused_or_rebuilt(self, tmp_path):
+        collection = make_collection(tmp_path)
+        client = chroma_client(tmp_path)
+        ShardedBackend(collection, client=client)._get_shards()
+
+        reopened = ShardedBackend(collection, client=client)
+        reopened._build_shards = lambda: pytest.fail("shards should be reused")
+        assert len(reopened._get_shards()) == 3
+
+        regrouped = ShardedBackend(collection, client=client, shards=2)
+        assert len(regrouped._get_shards()) <= 2
+        assert sum(shard.count() for shard in regrouped._get_shards().values()) == 60
+
+    def test_writes_are_mirrored(self, tmp_path):
+        collection = make_collection(tmp_path)
+        backend = ShardedBackend(collection, client=chroma_client(tmp_path))
+        backend._get_shards()
+        vector = np.ones(16, dtype=np.float32)
+
+        backend.added(["new"], [vector], ["new"], [{"course_title": "Course 9", "lesson_number": 0}])
+        assert backend.query([vector.tolist()], 1, where={"course_title": "Course 9"})["ids"] == [["new"]]
+
+        backend.removed(["new", "chunk_0"])
+        assert backend.query([vector.tolist()], 1, where={"course_title": "Course 9"})["ids"] == [[]]
+        assert sum(shard.count() for shard in backend._get_shards().values()) == 59
+
+        backend.cleared(collection)
+        assert backend._existing_shards() == []
+
+    def test_shards_copy_hnsw_settings(self, tmp_path):
+        client = chroma_client(tmp_path)
+        collection = client.get_or_create_collection(
+            "course_content", configuration={"hnsw": {"space": "cosine", "ef_search": 40, "max_neighbors": 8}}
+        )
+        collection.add(ids=["a"], embeddings=[[1.0, 0.0]], documents=["a"], metadatas=[{"course_title": "A"}])
+
+        shard = next(iter(ShardedBackend(collection, client=client)._get_shards().values()))
+
+        assert hnsw_configuration(shard) == hnsw_configuration(collection)
+        assert hnsw_configuration(shard)["max_neighbors"] == 8
+
+    def test_requires_client(self, tmp_path):
+        collection = make_collection(tmp_path)
+        with pytest.raises(ValueError):
+            ShardedBackend(collection)
+        assert isinstance(create_search_backend("sharded", collection, client=chroma_client(tmp_path)),
+                          ShardedBackend)
+
+    def test_course_titles_in(self):
+        assert course_titles_in(None) is None
+        assert course_titles_in({"course_title": "A"}) == ["A"]
+        assert course_titles_in({"course_title": {"$in": ["A", "B"]}}) == ["A", "B"]
+        assert course_titles_in({"$and": [{"lesson_number": 1}, {"course_title": {"$eq": "A"}}]}) == ["A"]
+        assert course_titles_in({"course_title": {"$ne": "A"}}) is None
+        assert course_titles_in({"$or": [{"course_title": "A"}, {"course_title": "B"}]}) is None
+
+
+@pytest.mark.unit
+class TestQuantizedBackend:
+    """Quantized backend built from the content collection"""
+
+    def test_rebinds_keep_one_vectors_file(self, tmp_path):
+        collection = make_collection(tmp_path)
+        backend = QuantizedBackend(collection, vectors_path=str(tmp_path / "vectors.f32"))
+        query = np.random.default_rng(1).normal(size=(1, 16)).astype(np.float32).tolist()
+        backend.query(query, 5)
+
+        for _ in range(2):
+            backend.rebind(collection)
+            assert backend.query(query, 5)["ids"][0]
+        assert len(list(tmp_path.glob("vectors.f32.*"))) == 1
+
+        backend.close()
+        assert list(tmp_path.glob("vectors.f32.*")) == []
+
+
+@pytest.mark.unit
+class TestHelpers:
+    """Distance and top-k helpers"""
+
+    def test_top_k_orders_smallest_first(self):
+        distances = np.array([0.5, 0.1, 0.9, 0.3])
+
+        assert top_k(distances, 2).tolist() == [1, 3]
+        assert top_k(distances, 10).tolist() == [1, 3, 0, 2]
+
+    def test_l2_is_squared(self):
+        assert compute_distances("l2", [[0.0, 0.0]], [[3.0, 4.0]])[0][0] == pytest.approx(25.0)
+
+    def test_unknown_backend_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            create_search_backend("faiss", make_collection(tmp_path, count=1))
+
+
+@pytest.mark.unit
+class TestSearchBackendOption:
+    """VectorStore delegates content queries to the configured backend"""
+
+    def test_numpy_backend_matches_chroma(self, tmp_path, make_hashing_store):
+        chroma_store = make_hashing_store(tmp_path / "chroma")
+        numpy_store = make_hashing_store(tmp_path / "numpy", search_backend="numpy")
+        requests = [("servers", None, None, 3), ("tools", None, 1, 2), ("agents", "Computer Use", None, 2)]
+        numpy_store.course_resolver.set_titles(["MCP Course", "Computer Use"])
+        chroma_store.course_resolver.set_titles(["MCP Course", "Computer Use"])
+
+        expected = chroma_store.search_many(requests)
+        with patch.object(numpy_store.course_content, "query", side_effect=AssertionError("no chroma query")):
+            actual = numpy_store.search_many(requests)
+
+        # Equal-distance ties may come back in either order
+        for a, e in zip(actual, expected):
+            assert a.error is None
+            assert a.distances == pytest.approx(e.distances, abs=1e-4)
+        assert all(meta["course_title"] == "Computer Use" for meta in actual[2].metadata)
+
+    def test_numpy_backend_sees_writes_and_clears(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_backend="numpy")
+        store.search("servers")
+        store.add_course_content([CourseChunk(content="brand new topic", course_title="MCP Course",
+                                              lesson_number=2, chunk_index=9)])
+
+        assert store.search("brand new topic", limit=1).ids == ["MCP_Course_9"]
+
+        store.clear_all_data()
+        assert store.search("brand new topic").is_empty()
+
+    def test_ivf_backend_with_options(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_backend="ivf",
+                                   search_backend_options={"n_lists": 2, "nprobe": 2})
+
+        results = store.search("servers expose tools", lesson_number=0, limit=2)
+
+        assert results.error is None
+        assert store.content_backend.nprobe == 2
+        assert all(meta["lesson_number"] == 0 for meta in results.metadata)
+        assert "servers expose tools" in results.documents[0]
+
+    def test_quantized_backend(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_backend="quantized",
+                                   search_backend_options={"vectors_path": str(tmp_path / "vectors.f32")})
+        exact = make_hashing_store(tmp_path / "exact", search_backend="numpy")
+
+        results = store.search("servers expose tools", limit=3)
+
+        assert results.distances == pytest.approx(exact.search("servers expose tools", limit=3).distances, abs=1e-4)
+        store.add_course_content([CourseChunk(content="brand new topic", course_title="MCP Course",
+                                              lesson_number=2, chunk_index=9)])
+        assert store.search("brand new topic", limit=1).ids == ["MCP_Course_9"]
+
+    def test_sharded_backend(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_backend="sharded")
+        store.add_course_metadata(Course(title="MCP Course", instructor="Test",
+                                         course_link="http://example.com/mcp"))
+        exact = make_hashing_store(tmp_path / "exact", search_backend="numpy")
+
+        unscoped = store.search("servers expose tools", limit=3)
+        assert unscoped.distances == pytest.approx(exact.search("servers expose tools", limit=3).distances,
+                                                   abs=1e-4)
+
+        scoped = store.search("servers expose tools", course_name="MCP")
+        assert {meta["course_title"] for meta in scoped.metadata} == {"MCP Course"}
+
+        store.replace_course(Course(title="MCP Course", instructor="Test", course_link="http://example.com/mcp"),
+                             [CourseChunk(content="rewritten", course_title="MCP Course", lesson_number=0,
+                                          chunk_index=0)])
+        assert store.search("servers expose tools", course_name="MCP").documents == ["rewritten"]
@@ -0,0 +1,36 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from session_manager import SessionManager
+
+
+@pytest.mark.unit
+class TestSessionTenants:
+    """Sessions are scoped to the tenant that uses them"""
+
+    def test_other_tenant_cannot_read_history(self):
+        sessions = SessionManager()
+        session_id = sessions.create_session(tenant_id="acme")
+        sessions.add_exchange(session_id, "What is MCP?", "A protocol", tenant_id="acme")
+
+        assert "A protocol" in sessions.get_conversation_history(session_id, tenant_id="acme")
+        assert sessions.get_conversation_history(session_id, tenant_id="other") is None
+        assert sessions.get_conversation_history(session_id) is None
+
+    def test_same_id_keeps_separate_histories(self):
+        sessions = SessionManager()
+        sessions.add_exchange("session_1", "acme question", "acme answer", tenant_id="acme")
+        sessions.add_exchange("session_1", "default question", "default answer")
+
+        assert "acme" not in sessions.get_conversation_history("session_1")
+        assert "default" not in sessions.get_conversation_history("session_1", tenant_id="acme")
+
+    def test_default_namespace_keeps_plain_session_ids(self):
+        sessions = SessionManager()
+        session_id = sessions.create_session()
+        sessions.add_exchange(session_id, "question", "answer")
+
+        assert [message.content for message in sessions.sessions[session_id]] == ["question", "answer"]
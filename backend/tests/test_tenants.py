@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import patch
+
+from models import Course, CourseChunk
+from vector_store import VectorStore
+
+
+@pytest.mark.unit
+class TestTenants:
+    """Tenant namespaces served by one store and embedding model"""
+
+    def chunk(self, title, text, index=0):
+        return CourseChunk(content=text, course_title=title, lesson_number=0, chunk_index=index)
+
+    def test_tenants_are_isolated(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+        acme = store.for_tenant("acme")
+        acme.add_course_metadata(Course(title="Acme Course", instructor="Test", course_link="http://example.com"))
+        acme.add_course_content([self.chunk("Acme Course", "acme onboarding guide")])
+
+        assert acme.course_content.name == "acme__course_content"
+        assert acme.search("servers expose tools", limit=5).documents == ["acme onboarding guide"]
+        assert acme.get_existing_course_titles() == ["Acme Course"]
+        assert "acme onboarding guide" not in store.search("acme onboarding guide", limit=10).documents
+        assert store.for_tenant("globex").search("tools").is_empty()
+        assert store.search("acme", course_name="Acme Course").error == "No course found matching 'Acme Course'"
+
+    def test_tenant_stores_share_model_and_threads(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+        acme = store.for_tenant("acme")
+
+        assert store.for_tenant("acme") is acme
+        assert store.for_tenant(None) is store
+        assert acme.embedding_function is store.embedding_function
+        assert acme.async_pool is store.async_pool
+        assert acme.search_result_cache is not store.search_result_cache
+
+    def test_stats_and_caches_per_tenant(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+        acme = store.for_tenant("acme")
+        acme.add_course_content([self.chunk("Acme Course", "acme onboarding guide")])
+        acme.search("guide")
+        acme.search("guide")
+
+        stats = store.tenant_stats()
+
+        assert stats["default"]["chunks"] == 6
+        assert stats["acme"]["chunks"] == 1
+        assert stats["acme"]["caches"]["search_results"]["hits"] == 1
+        assert stats["default"]["caches"]["search_results"]["hits"] == 0
+
+    def test_tenant_reindex_leaves_default(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        acme = store.for_tenant("acme")
+        builder = acme.begin_generation()
+        builder.add_course(Course(title="Acme Course", instructor="Test", course_link="http://example.com"),
+                           [self.chunk("Acme Course", "acme onboarding guide")])
+        builder.commit(keep_previous=0)
+
+        assert acme.course_content.name == "acme__course_content__v1"
+        assert store.index_generation == 0
+        assert store.course_content.count() == 6
+        reopened = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing").for_tenant("acme")
+        assert reopened.index_generation == 1
+
+    def test_backend_files_per_tenant(self, tmp_path):
+        store = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                            search_backend="quantized",
+                            search_backend_options={"vectors_path": str(tmp_path / "vectors.f32"), "mode": "int8"})
+        acme = store.for_tenant("acme")
+
+        assert acme._settings["search_backend_options"] == {"vectors_path": str(tmp_path / "vectors.acme.f32"),
+                                                            "mode": "int8"}
+
+    def test_invalid_tenant_rejected(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        with pytest.raises(ValueError):
+            store.for_tenant("../etc")
+
+    def test_reads_never_create_tenants(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        with pytest.raises(LookupError):
+            store.for_tenant("globex", create=False)
+        assert not [collection for collection in store.client.list_collections()
+                    if collection.name.startswith("globex__")]
+
+        VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing").for_tenant("acme")
+        assert store.for_tenant("acme", create=False).tenant_id == "acme"
+
+    def test_least_recently_used_tenant_closed(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", max_tenants=2)
+        acme, globex = store.for_tenant("acme"), store.for_tenant("globex")
+        store.for_tenant("acme")
+
+        with patch.object(globex, "close") as close:
+            store.for_tenant("initech")
+
+        close.assert_called_once()
+        assert sorted(store.tenant_stats()) == ["acme", "default", "initech"]
+        assert store.for_tenant("acme") is acme
@@ -0,0 +1,590 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from embeddings import SentenceTransformerProvider
+from models import Course, CourseChunk, Lesson
+from vector_store import VectorStore
+
+
+class FakeModel:
+    """Stand-in for a SentenceTransformer that returns text-dependent vectors"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=False):
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), 8), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, sum(map(ord, token)) % 8] += 1.0
+        return vectors
+
+
+@pytest.fixture
+def vector_store(tmp_path):
+    """VectorStore backed by a throwaway Chroma directory"""
+    return VectorStore(str(tmp_path / "chroma"), "all-MiniLM-L6-v2")
+
+
+@pytest.mark.unit
+class TestWarmUp:
+    """Lazy model loading and readiness reporting"""
+
+    def test_model_not_loaded_on_init(self, vector_store):
+        assert not vector_store.embedding_function.is_loaded
+        assert not vector_store.is_ready()
+
+    def test_warm_up_loads_model_and_marks_ready(self, vector_store):
+        with patch.object(SentenceTransformerProvider, "_load_model",
+                          return_value=FakeModel()):
+            vector_store.start_warm_up().join(timeout=10)
+
+        assert vector_store.embedding_function.is_loaded
+        assert vector_store.is_ready()
+        assert vector_store.warm_up_error is None
+
+    def test_warm_up_failure_stays_not_ready(self, vector_store):
+        with patch.object(SentenceTransformerProvider, "_load_model",
+                          side_effect=RuntimeError("no model")):
+            assert vector_store.warm_up() is False
+
+        assert not vector_store.is_ready()
+        assert "no model" in vector_store.warm_up_error
+
+
+@pytest.fixture
+def fake_model():
+    """Patch the lazy embedding function to use FakeModel"""
+    model = FakeModel()
+    with patch.object(SentenceTransformerProvider, "_load_model",
+                      return_value=model):
+        yield model
+
+
+@pytest.fixture
+def populated_store(vector_store, fake_model):
+    """VectorStore with one small course loaded"""
+    course = Course(
+        title="MCP: Build Rich-Context AI Apps",
+        course_link="http://example.com/mcp",
+        instructor="Elie Schoppik",
+        lessons=[Lesson(lesson_number=1, title="Intro", lesson_link="http://example.com/mcp/1")]
+    )
+    vector_store.add_course_metadata(course)
+    vector_store.add_course_content([
+        CourseChunk(content="MCP servers expose tools", course_title=course.title,
+                    lesson_number=1, chunk_index=0),
+        CourseChunk(content="Clients connect to servers", course_title=course.title,
+                    lesson_number=1, chunk_index=1),
+    ])
+    fake_model.encoded.clear()
+    return vector_store
+
+
+@pytest.mark.unit
+class TestEmbeddingProviderSwitch:
+    """Collections do not pin the embedding provider that created them"""
+
+    def test_reopen_with_another_provider(self, tmp_path, make_hashing_store):
+        path = tmp_path / "chroma"
+        make_hashing_store(path)
+
+        store = VectorStore(str(path), "all-MiniLM-L6-v2", embedding_provider="sentence-transformers-quantized")
+
+        assert store.course_content.count() == 6
+        assert store.course_content.configuration_json.get("embedding_function") is None
+
+    def test_reopen_collection_that_recorded_a_provider(self, tmp_path, make_hashing_store):
+        path = tmp_path / "chroma"
+        store = make_hashing_store(path)
+        store.client.get_or_create_collection("course_notes", embedding_function=store.embedding_function)
+
+        reopened = VectorStore(str(path), "all-MiniLM-L6-v2", embedding_provider="sentence-transformers")
+
+        assert reopened._create_collection("course_notes").count() == 0
+
+
+@pytest.mark.unit
+class TestQueryEmbeddingCache:
+    """Repeated query texts are embedded once"""
+
+    def test_repeated_search_skips_model(self, populated_store, fake_model):
+        first = populated_store.search("What do MCP servers expose?")
+        second = populated_store.search("What  do MCP servers expose? ")
+
+        assert first.documents == second.documents
+        assert fake_model.encoded == ["What do MCP servers expose?"]
+        stats = populated_store.query_embedding_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_course_resolution_fallback_uses_cache(self, populated_store, fake_model):
+        populated_store._resolve_course_name("xyz")
+        populated_store.course_resolver.cache.clear()
+        populated_store._resolve_course_name("xyz")
+
+        assert fake_model.encoded.count("xyz") == 1
+
+
+@pytest.mark.unit
+class TestCourseNameResolution:
+    """Course names resolve lexically before falling back to vectors"""
+
+    def test_lexical_match_skips_model(self, populated_store, fake_model):
+        results = populated_store.search("tools", course_name="mcp")
+
+        assert results.error is None
+        assert "mcp" not in fake_model.encoded
+        assert populated_store.course_resolver.cached("MCP") == (True, "MCP: Build Rich-Context AI Apps")
+
+    def test_catalog_change_invalidates_cache(self, populated_store):
+        populated_store._resolve_course_name("Prompt")
+        populated_store.add_course_metadata(Course(
+            title="Prompt Compression", instructor="Test", course_link="http://example.com/pc"
+        ))
+
+        assert populated_store._resolve_course_name("Prompt") == "Prompt Compression"
+
+    def test_far_vector_match_is_rejected(self, populated_store):
+        populated_store.course_resolve_max_distance = 0.0
+        assert populated_store._resolve_course_name("zzzz qqqq") is None
+
+
+@pytest.mark.unit
+class TestCatalogLookups:
+    """Link and outline lookups are served from the catalog snapshot"""
+
+    def test_links_without_chroma_round_trip(self, populated_store):
+        with patch.object(populated_store.course_catalog, "get", side_effect=AssertionError("no get")):
+            assert populated_store.get_lesson_link("MCP: Build Rich-Context AI Apps", 1) == "http://example.com/mcp/1"
+            assert populated_store.get_course_link("MCP: Build Rich-Context AI Apps") == "http://example.com/mcp"
+            assert populated_store.get_all_courses_metadata()[0]["lessons"][0]["lesson_title"] == "Intro"
+
+    def test_snapshot_rebuilt_from_existing_collection(self, populated_store, tmp_path):
+        reopened = VectorStore(str(tmp_path / "chroma"), "all-MiniLM-L6-v2")
+
+        assert reopened.get_lesson_link("MCP: Build Rich-Context AI Apps", 1) == "http://example.com/mcp/1"
+
+    def test_outline_tool_uses_snapshot(self, populated_store):
+        from search_tools import CourseOutlineTool
+
+        outline = CourseOutlineTool(populated_store).execute(course_title="MCP")
+
+        assert "Course: MCP: Build Rich-Context AI Apps" in outline
+        assert "Lesson 1: Intro" in outline
+
+    def test_counts_and_titles_without_chroma_round_trip(self, populated_store):
+        title = "MCP: Build Rich-Context AI Apps"
+        populated_store.get_course_stats()  # Content counts are loaded once
+
+        with patch.object(populated_store.course_catalog, "get", side_effect=AssertionError("no get")), \
+                patch.object(populated_store.course_content, "get", side_effect=AssertionError("no get")):
+            assert populated_store.get_course_count() == 1
+            assert populated_store.get_existing_course_titles() == [title]
+            populated_store.add_course_content([
+                CourseChunk(content="Tools return results", course_title=title, lesson_number=2, chunk_index=2)
+            ])
+            assert populated_store.get_chunk_count() == 3
+            assert populated_store.get_course_stats() == {
+                title: {"lesson_count": 1, "lessons_with_content": 2, "chunk_count": 3}
+            }
+
+    def test_content_stats_loaded_from_existing_collection(self, populated_store, tmp_path):
+        reopened = VectorStore(str(tmp_path / "chroma"), "all-MiniLM-L6-v2")
+
+        assert reopened.get_chunk_count() == 2
+        reopened.clear_all_data()
+        assert reopened.get_chunk_count() == 0
+        assert reopened.get_course_stats() == {}
+
+    def test_clear_all_data_empties_snapshot(self, populated_store):
+        populated_store.clear_all_data()
+
+        assert populated_store.get_all_courses_metadata() == []
+        assert populated_store.get_lesson_link("MCP: Build Rich-Context AI Apps", 1) is None
+
+
+@pytest.mark.unit
+class TestSearchMany:
+    """Batched multi-query search API"""
+
+    def test_matches_individual_searches(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        requests = [
+            ("servers", None, None, 2),
+            ("screenshots", "Computer Use", None, 1),
+            ("tools", "MCP Course", 1, 3),
+        ]
+
+        batched = store.search_many(requests)
+        single = [store.search(*request) for request in requests]
+
+        assert [r.documents for r in batched] == [r.documents for r in single]
+        assert [r.metadata for r in batched] == [r.metadata for r in single]
+
+    def test_one_chroma_query_per_filter(self, tmp_path, make_hashing_store):
+        from vector_store import SearchRequest
+
+        store = make_hashing_store(tmp_path / "chroma")
+        with patch.object(store.course_content, "query", wraps=store.course_content.query) as query_spy:
+            results = store.search_many([
+                SearchRequest("servers"),
+                SearchRequest("clients"),
+                SearchRequest("tools", lesson_number=1),
+            ])
+
+        assert all(result.error is None for result in results)
+        assert query_spy.call_count == 2
+
+    def test_unresolved_course_only_fails_its_request(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", course_resolve_max_distance=0.0)
+        store.add_course_metadata(Course(title="MCP Course", instructor="Test",
+                                         course_link="http://example.com/mcp"))
+
+        results = store.search_many([("tools", "Quantum Chemistry", None, 1), ("tools", None, None, 1)])
+
+        assert results[0].error == "No course found matching 'Quantum Chemistry'"
+        assert results[1].error is None
+        assert len(results[1].documents) == 1
+
+
+@pytest.mark.unit
+class TestCourseReplacement:
+    """Per-course replace and delete without touching other courses"""
+
+    def course(self, title="MCP Course", lessons=2):
+        return Course(title=title, instructor="Test", course_link=f"http://example.com/{title}",
+                      lessons=[Lesson(lesson_number=n, title=f"Lesson {n}") for n in range(lessons)])
+
+    def chunks(self, title, texts):
+        return [CourseChunk(content=text, course_title=title, lesson_number=index % 2, chunk_index=index)
+                for index, text in enumerate(texts)]
+
+    @pytest.mark.parametrize("backend", ["chroma", "numpy"])
+    def test_replace_drops_old_chunks(self, tmp_path, backend, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_backend=backend, hybrid_lexical_weight=1.0)
+        store.add_course_metadata(self.course())
+        store.add_course_metadata(self.course("Computer Use"))
+        store.search("servers expose tools")  # Load the backend and lexical indexes
+        store.get_course_stats()
+
+        store.replace_course(self.course(lessons=3), self.chunks("MCP Course", ["rewritten lesson text"]))
+
+        results = store.search("servers expose tools", course_name="MCP Course")
+        assert results.documents == ["rewritten lesson text"]
+        assert store.course_content.get(where={"course_title": "MCP Course"})['ids'] == ["MCP_Course_0"]
+        assert store.get_course_outline("MCP Course")["lesson_count"] == 3
+        assert store.get_course_stats()["MCP Course"]["chunk_count"] == 1
+        # Other courses are untouched
+        assert len(store.search("servers expose tools", course_name="Computer Use").documents) == 3
+
+    @pytest.mark.parametrize("backend,options", [
+        ("ivf", {"index_path": "ivf", "n_lists": 2}),
+        ("quantized", {"vectors_path": "vectors.f32"}),
+        ("sharded", {}),
+    ])
+    def test_replacement_survives_restart(self, tmp_path, backend, options, make_hashing_store):
+        options = {key: str(tmp_path / value) if key.endswith("path") else value for key, value in options.items()}
+        store = make_hashing_store(tmp_path / "chroma", search_backend=backend, search_backend_options=options)
+        store.search("tools")  # Build and save the backend's index
+        old = self.chunks("MCP Course", ["old text about apples 0", "old text about apples 1",
+                                         "old text about apples 2"])
+        store.replace_course(self.course(), old)
+        store.search("apples")
+
+        store.replace_course(self.course(), [CourseChunk(content=chunk.content.replace("old text about apples",
+                                                                                       "new text about oranges"),
+                                                         course_title=chunk.course_title,
+                                                         lesson_number=chunk.lesson_number,
+                                                         chunk_index=chunk.chunk_index) for chunk in old])
+        restarted = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                                search_backend=backend, search_backend_options=options)
+
+        results = restarted.search("oranges", course_name="MCP Course", limit=3)
+        assert sorted(results.documents) == [f"new text about oranges {n}" for n in range(3)]
+
+    def test_sharded_replacement_before_first_search(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_backend="sharded")
+        store.search("tools")  # Build the shards
+        store.replace_course(self.course(), self.chunks("MCP Course", ["old text about apples 0",
+                                                                      "old text about apples 1"]))
+
+        restarted = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                                search_backend="sharded")
+        restarted.replace_course(self.course(), self.chunks("MCP Course", ["new text about oranges 0",
+                                                                          "new text about oranges 1"]))
+
+        results = restarted.search("oranges", course_name="MCP Course", limit=2)
+        assert sorted(results.documents) == ["new text about oranges 0", "new text about oranges 1"]
+
+    def test_delete_course(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_backend="numpy")
+        store.add_course_metadata(self.course())
+        store.search("tools")
+
+        assert store.delete_course("MCP Course") is True
+        assert store.delete_course("MCP Course") is False
+
+        assert "MCP Course" not in store.get_existing_course_titles()
+        assert store.course_content.get(where={"course_title": "MCP Course"})['ids'] == []
+        assert all(meta["course_title"] == "Computer Use" for meta in store.search("tools", limit=6).metadata)
+        assert store.get_chunk_count() == 3
+
+    def test_writes_are_batched(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        texts = [f"new chunk {n}" for n in range(5)]
+
+        with patch.object(store, "_write_batch_size", return_value=2), \
+                patch.object(store.course_content, "upsert", wraps=store.course_content.upsert) as upsert_spy:
+            store.replace_course(self.course(), self.chunks("MCP Course", texts))
+
+        assert upsert_spy.call_count == 3
+        assert store.get_chunk_count() == 8
+
+    def test_rejects_chunks_of_other_courses(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma")
+        with pytest.raises(ValueError):
+            store.replace_course(self.course(), self.chunks("Computer Use", ["stray"]))
+
+    def test_searches_wait_for_replacement(self, tmp_path, make_hashing_store):
+        import threading
+
+        store = make_hashing_store(tmp_path / "chroma")
+        writing, release = threading.Event(), threading.Event()
+        upsert = store.course_content.upsert
+
+        def slow_upsert(**kwargs):
+            writing.set()
+            release.wait(2)
+            return upsert(**kwargs)
+
+        results = []
+        with patch.object(store.course_content, "upsert", side_effect=slow_upsert):
+            writer = threading.Thread(target=store.replace_course,
+                                      args=(self.course(), self.chunks("MCP Course", ["replacement text"])))
+            writer.start()
+            writing.wait(2)
+            # The new chunks are half written here; the search must not run yet
+            reader = threading.Thread(target=lambda: results.append(
+                store.search("replacement text", course_name="MCP Course")))
+            reader.start()
+            reader.join(timeout=0.2)
+            assert results == []
+
+            release.set()
+            writer.join(timeout=5)
+            reader.join(timeout=5)
+
+        assert results[0].documents == ["replacement text"]
+
+    @pytest.mark.parametrize("backend", ["chroma", "numpy"])
+    def test_failed_replacement_keeps_old_chunks(self, tmp_path, backend, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", search_backend=backend, hybrid_lexical_weight=1.0)
+        store.add_course_metadata(self.course())
+        store.search("servers expose tools")
+        before = store.get_course_stats()["MCP Course"]["chunk_count"]
+        generation = store.corpus_generation
+
+        with patch.object(store.course_content, "upsert", side_effect=RuntimeError("disk full")):
+            with pytest.raises(RuntimeError):
+                store.replace_course(self.course(), self.chunks("MCP Course", ["replacement text"]))
+
+        assert store.corpus_generation != generation
+        assert store.get_course_stats()["MCP Course"]["chunk_count"] == before
+        results = store.search("servers expose tools", course_name="MCP Course")
+        assert results.documents and "replacement text" not in results.documents
+
+
+@pytest.mark.unit
+class TestOtherWriters:
+    """Catalog, statistics and cached results follow writes made through other stores"""
+
+    def course(self, link="http://example.com/lesson-0"):
+        return Course(title="MCP Course", instructor="Test", course_link="http://example.com",
+                      lessons=[Lesson(lesson_number=0, title="Intro", lesson_link=link)])
+
+    @pytest.mark.parametrize("backend", ["chroma", "numpy"])
+    def test_reader_sees_other_writers(self, tmp_path, backend, make_hashing_store):
+        writer = make_hashing_store(tmp_path / "chroma")
+        reader = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                             search_backend=backend, search_cache_size=16, revalidate_seconds=0)
+        assert reader.get_course_count() == 0
+        assert len(reader.search("tools", limit=10).documents) == 6
+
+        writer.replace_course(self.course(), [CourseChunk(content="oranges", course_title="MCP Course",
+                                                          lesson_number=0, chunk_index=0)])
+
+        assert reader.get_existing_course_titles() == ["MCP Course"]
+        assert reader.get_lesson_link("MCP Course", 0) == "http://example.com/lesson-0"
+        assert reader.get_course_stats()["MCP Course"]["chunk_count"] == 1
+        assert reader.search("oranges", course_name="MCP Course").documents == ["oranges"]
+
+        writer.replace_course(self.course("http://example.com/moved"), [])
+        assert reader.get_lesson_link("MCP Course", 0) == "http://example.com/moved"
+        assert reader.get_chunk_count() == 3
+
+    def test_checks_at_most_every_interval(self, tmp_path, make_hashing_store):
+        writer = make_hashing_store(tmp_path / "chroma")
+        reader = VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                             revalidate_seconds=60)
+        writer.add_course_metadata(self.course())
+
+        assert reader.get_course_count() == 0
+        assert reader.revalidate(force=True) is True
+        assert reader.get_course_count() == 1
+        assert reader.revalidate(force=True) is False
+
+    def test_own_writes_need_no_reload(self, tmp_path, make_hashing_store):
+        store = make_hashing_store(tmp_path / "chroma", revalidate_seconds=0)
+        store.add_course_metadata(self.course())
+
+        assert store.revalidate() is False
+
+
+@pytest.mark.unit
+class TestAsyncFacade:
+    """Async methods run the blocking work on the store's pool"""
+
+    def test_async_methods_match_sync(self, tmp_path, make_hashing_store):
+        import asyncio
+
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+        store.add_course_metadata(Course(title="MCP Course", instructor="Test", course_link="http://example.com/mcp"))
+
+        async def main():
+            return await asyncio.gather(
+                store.asearch("servers expose tools", limit=2),
+                store.asearch_many([("clients call tools", "MCP", None, 1)]),
+                store.aresolve_course_name("mcp"),
+                store.aget_catalog(),
+            )
+
+        searched, batched, resolved, catalog = asyncio.run(main())
+
+        assert searched.ids == store.search("servers expose tools", limit=2).ids
+        assert batched[0].metadata[0]["course_title"] == "MCP Course"
+        assert resolved == "MCP Course"
+        assert [course["title"] for course in catalog] == ["MCP Course"]
+        assert store.async_stats()["completed"] == 4
+
+    def test_cached_search_skips_pool(self, tmp_path, make_hashing_store):
+        import asyncio
+
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+        first = store.search("servers expose tools")
+
+        with patch.object(store.async_pool, "run", side_effect=AssertionError("not cached")):
+            assert asyncio.run(store.asearch("servers expose tools")) is first
+
+    def test_async_miss_counted_once(self, tmp_path, make_hashing_store):
+        import asyncio
+
+        store = make_hashing_store(tmp_path / "chroma", search_cache_size=16)
+        asyncio.run(store.asearch("servers expose tools"))
+        asyncio.run(store.asearch("servers expose tools"))
+
+        stats = store.search_result_cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+@pytest.mark.unit
+class TestChromaServer:
+    """Stores sharing one Chroma server over HTTP"""
+
+    def test_workers_share_the_server_index(self, tmp_path, chroma_server, make_hashing_store):
+        writer = make_hashing_store(tmp_path / "unused", chroma_server_url=chroma_server)
+        reader = VectorStore(str(tmp_path / "other"), "unused", embedding_provider="hashing",
+                             chroma_server_url=chroma_server)
+
+        assert not (tmp_path / "unused").exists()
+        assert reader.course_content.count() == 6
+        assert reader.search("servers expose tools", limit=1).documents[0].endswith("servers expose tools")
+
+        writer.add_course_content([CourseChunk(content="fresh material", course_title="MCP Course",
+                                               lesson_number=3, chunk_index=9)])
+        assert reader.search("fresh material", limit=1).documents == ["fresh material"]
+
+    def test_generation_pointer_lives_on_the_server(self, tmp_path, chroma_server, make_hashing_store):
+        store = make_hashing_store(tmp_path / "a", chroma_server_url=chroma_server)
+        worker = VectorStore(str(tmp_path / "b"), "unused", embedding_provider="hashing",
+                             chroma_server_url=chroma_server)
+
+        builder = store.begin_generation()
+        builder.add_course(Course(title="New Course", instructor="Test", course_link="http://example.com"),
+                           [CourseChunk(content="fresh material", course_title="New Course",
+                                        lesson_number=0, chunk_index=0)])
+        builder.commit()
+
+        assert worker.sync_generation() is True
+        assert worker.course_content.name == "course_content__v1"
+        assert worker.search("fresh material").documents == ["fresh material"]
+
+    def test_invalid_url_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            VectorStore(str(tmp_path / "chroma"), "unused", embedding_provider="hashing",
+                        chroma_server_url="localhost:8000")
+
+
+@pytest.mark.unit
+class TestMultiCourseFilters:
+    """Several courses and lesson ranges in one filtered search"""
+
+    @pytest.fixture
+    def make_store(self, tmp_path, make_hashing_store):
+        def make(**kwargs):
+            store = make_hashing_store(tmp_path / "chroma", **kwargs)
+            for title in ("MCP Course", "Computer Use"):
+                store.add_course_metadata(Course(title=title, instructor="Test",
+                                                 course_link=f"http://example.com/{title}"))
+            return store
+        return make
+
+    def test_build_filter(self, vector_store):
+        assert vector_store._build_filter(None, None) is None
+        assert vector_store._build_filter("A", 1) == {"$and": [{"course_title": "A"}, {"lesson_number": 1}]}
+        assert vector_store._build_filter(["A", "B", "A"], None) == {"course_title": {"$in": ["A", "B"]}}
+        assert vector_store._build_filter([], None, 1, 4) == {"$and": [{"lesson_number": {"$gte": 1}},
+                                                                       {"lesson_number": {"$lte": 4}}]}
+        assert vector_store._build_filter(["A"], None, 2, 2) == {"$and": [{"course_title": "A"},
+                                                                          {"lesson_number": 2}]}
+        assert vector_store._build_filter(["A", "B"], None, None, 3) == {"$and": [
+            {"course_title": {"$in": ["A", "B"]}}, {"lesson_number": {"$lte": 3}}
+        ]}
+
+    @pytest.mark.parametrize("backend", ["chroma", "numpy", "sharded"])
+    def test_courses_and_lesson_range(self, make_store, backend):
+        store = make_store(search_backend=backend)
+
+        results = store.search("tools", course_names=["mcp", "computer"], lesson_from=1, lesson_to=1, limit=10)
+
+        assert results.error is None
+        assert sorted((meta["course_title"], meta["lesson_number"]) for meta in results.metadata) == [
+            ("Computer Use", 1), ("MCP Course", 1)
+        ]
+        assert len(store.search("tools", course_name="MCP", course_names=["Computer"], limit=10).documents) == 6
+
+    def test_unresolved_names_reported(self, make_store):
+        store = make_store(course_resolve_max_distance=0.0)
+
+        results = store.search("tools", course_names=["MCP", "zzzz qqqq", "yyyy wwww"])
+
+        assert results.error == "No course found matching 'zzzz qqqq', 'yyyy wwww'"
+
+    def test_names_resolved_in_one_batch(self, make_store):
+        store = make_store()
+        embed_calls, catalog_queries = [], []
+        embed_queries, catalog_query = store._embed_queries, store.course_catalog.query
+        store._embed_queries = lambda texts: embed_calls.append(list(texts)) or embed_queries(texts)
+        store.course_catalog.query = lambda **kwargs: catalog_queries.append(kwargs) or catalog_query(**kwargs)
+
+        resolved = store._resolve_course_names(["MCP", "zzzz qqqq", "yyyy wwww"])
+
+        assert resolved["MCP"] == "MCP Course"
+        assert embed_calls == [["zzzz qqqq", "yyyy wwww"]]
+        assert len(catalog_queries) == 1
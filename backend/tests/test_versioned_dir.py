@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from versioned_dir import POINTER_FILE, current_dir, open_current, publish
+
+
+def write_value(value):
+    """Writer of a version holding one value file"""
+    def write(directory):
+        with open(os.path.join(directory, "value.txt"), "w") as f:
+            f.write(value)
+    return write
+
+
+def read_value(directory):
+    with open(os.path.join(directory, "value.txt")) as f:
+        return f.read()
+
+
+@pytest.mark.unit
+class TestVersionedDir:
+    """Versions published behind a pointer file"""
+
+    def test_nothing_published(self, tmp_path):
+        assert current_dir(str(tmp_path / "index")) is None
+        assert open_current(str(tmp_path / "index"), read_value) is None
+
+    def test_publish_switches_pointer(self, tmp_path):
+        path = str(tmp_path / "index")
+        first = publish(path, write_value("first"))
+        second = publish(path, write_value("second"))
+
+        assert current_dir(path) == second
+        assert open_current(path, read_value) == "second"
+        # The previous version stays for readers still opening it
+        assert os.path.isdir(first)
+
+    def test_keeps_only_newest_previous_versions(self, tmp_path):
+        path = str(tmp_path / "index")
+        for value in range(4):
+            publish(path, write_value(str(value)), keep_previous=2)
+
+        assert len([name for name in os.listdir(path) if name.startswith("v-")]) == 3
+
+    def test_failed_write_keeps_live_version(self, tmp_path):
+        path = str(tmp_path / "index")
+        publish(path, write_value("live"))
+
+        def failing(directory):
+            write_value("partial")(directory)
+            raise RuntimeError("disk full")
+
+        with pytest.raises(RuntimeError):
+            publish(path, failing)
+
+        assert open_current(path, read_value) == "live"
+        assert not [name for name in os.listdir(path) if name.startswith("tmp-")]
+
+    def test_only_legacy_files_removed(self, tmp_path):
+        path = tmp_path / "shared"
+        path.mkdir()
+        (path / "manifest.json").write_text("{}")
+        (path / "value.txt").write_text("flat")
+        (path / "notes.txt").write_text("unrelated")
+
+        assert current_dir(str(path)) == str(path)
+        publish(str(path), write_value("versioned"), legacy_files=("manifest.json", "value.txt"))
+
+        assert sorted(name for name in os.listdir(path) if not name.startswith("v-")) == [
+            POINTER_FILE, "notes.txt"]
+        assert open_current(str(path), read_value) == "versioned"
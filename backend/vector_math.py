@@ -0,0 +1,194 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from filters import matches_where
+
+
+def collection_space(collection) -> str:
+    """Distance function of a Chroma collection's HNSW index"""
+    configuration = collection.configuration_json or {}
+    hnsw = configuration.get("hnsw") or {}
+    return hnsw.get("space") or (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+# Per-collection HNSW settings; only ef_search can change once the index is built
+HNSW_PARAMETERS = ("space", "ef_construction", "ef_search", "max_neighbors")
+
+
+def hnsw_configuration(collection) -> Dict[str, Any]:
+    """HNSW_PARAMETERS of a Chroma collection, as stored in its configuration"""
+    hnsw = (collection.configuration_json or {}).get("hnsw") or {}
+    return {key: hnsw[key] for key in HNSW_PARAMETERS if hnsw.get(key) is not None}
+
+
+def compute_distances(space: str, queries: np.ndarray, matrix: np.ndarray,
+                      matrix_norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Distances between query rows and matrix rows, as Chroma computes them
+    ("l2" is squared euclidean, "cosine" and "ip" are one minus similarity).
+
+    Args:
+        matrix_norms: Precomputed L2 norms of the matrix rows (optional)
+
+    Returns:
+        (len(queries), len(matrix)) array
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    matrix = np.asarray(matrix, dtype=np.float32).reshape(-1, queries.shape[1])
+    if matrix_norms is None and space != "ip":
+        matrix_norms = np.linalg.norm(matrix, axis=1)
+    return distances_from_products(space, queries @ matrix.T, np.linalg.norm(queries, axis=1), matrix_norms)
+
+
+def distances_from_products(space: str, products: np.ndarray, query_norms: np.ndarray,
+                            matrix_norms: Optional[np.ndarray]) -> np.ndarray:
+    """Turn (queries x rows) dot products and L2 norms into distances"""
+    if space == "ip":
+        return 1.0 - products
+    query_norms = np.reshape(query_norms, (-1, 1))
+    if space == "cosine":
+        return 1.0 - products / np.maximum(query_norms * matrix_norms[None, :], 1e-12)
+    return np.maximum(query_norms ** 2 + (matrix_norms ** 2)[None, :] - 2.0 * products, 0.0)
+
+
+def top_k(distances: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k smallest distances, closest first"""
+    if k >= len(distances):
+        return np.argsort(distances, kind="stable")
+    candidates = np.argpartition(distances, k - 1)[:k]
+    return candidates[np.argsort(distances[candidates], kind="stable")]
+
+
+class MetadataMasks:
+    """
+    Boolean row masks over a list of metadata records.
+
+    Masks for each value of the common filter fields are computed once;
+    other where clauses are evaluated row by row.
+    """
+
+    FIELDS = ("course_title", "lesson_number")
+
+    def __init__(self, metadatas: List[Dict[str, Any]]):
+        self.metadatas = metadatas
+        self.masks: Dict[Tuple[str, Any], np.ndarray] = {}
+        for field in self.FIELDS:
+            values = np.array([metadata.get(field) for metadata in metadatas], dtype=object)
+            for value in set(values.tolist()):
+                self.masks[(field, value)] = values == value
+
+    def mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Boolean row mask for a where clause (None means all rows)"""
+        if not where:
+            return None
+        if len(where) == 1:
+            key, condition = next(iter(where.items()))
+            if key == "$and":
+                mask = np.ones(len(self.metadatas), dtype=bool)
+                for clause in condition:
+                    clause_mask = self.mask(clause)
+                    if clause_mask is not None:
+                        mask &= clause_mask
+                return mask
+            if key in self.FIELDS:
+                if isinstance(condition, dict) and list(condition) == ["$eq"]:
+                    condition = condition["$eq"]
+                if not isinstance(condition, dict):
+                    mask = self.masks.get((key, condition))
+                    return mask if mask is not None else np.zeros(len(self.metadatas), dtype=bool)
+                # $in, ranges etc.: union of the masks of every value the condition accepts
+                mask = np.zeros(len(self.metadatas), dtype=bool)
+                for (field, value), value_mask in self.masks.items():
+                    if field == key and matches_where({key: value}, where):
+                        mask |= value_mask
+                return mask
+        return np.fromiter((matches_where(metadata, where) for metadata in self.metadatas),
+                           dtype=bool, count=len(self.metadatas))
+
+
+class VectorBlock:
+    """
+    Immutable rows of chunk vectors with their IDs, documents and metadata.
+
+    Row norms and metadata masks are computed once, so a filtered search
+    is a masked matrix product plus argpartition top-k. Updates return a
+    new block, so readers never need a lock.
+    """
+
+    def __init__(self, ids: List[str], embeddings: Any, documents: List[str],
+                 metadatas: List[Dict[str, Any]], dimension: Optional[int] = None):
+        matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+        if matrix.size == 0:
+            matrix = matrix.reshape(0, dimension or 0)
+        self.ids = list(ids)
+        self.matrix = matrix
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.norms = np.linalg.norm(matrix, axis=1)
+        self.positions = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.masks = MetadataMasks(self.metadatas)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1]
+
+    def search(self, space: str, queries: Any, n_results: int,
+               where: Optional[Dict[str, Any]] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Exact nearest rows for each query within the filter.
+
+        Returns:
+            (row indices, distances) per query, closest first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        mask = self.masks.mask(where)
+        if mask is None:
+            rows, matrix, norms = np.arange(len(self.ids)), self.matrix, self.norms
+        else:
+            rows = np.flatnonzero(mask)
+            matrix, norms = self.matrix[rows], self.norms[rows]
+        if not len(rows):
+            return [(rows, np.zeros(0, dtype=np.float32)) for _ in queries]
+        distances = compute_distances(space, queries, matrix, norms)
+        results = []
+        for query_distances in distances:
+            order = top_k(query_distances, n_results)
+            results.append((rows[order], query_distances[order]))
+        return results
+
+    def vector(self, doc_id: str) -> Optional[np.ndarray]:
+        """Stored vector for an ID, or None"""
+        row = self.positions.get(doc_id)
+        return None if row is None else self.matrix[row]
+
+    def upsert(self, ids: List[str], embeddings: Any, documents: List[str],
+               metadatas: List[Dict[str, Any]]) -> 'VectorBlock':
+        """New block with rows for existing IDs replaced and the rest appended"""
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        keep = self._rows_without(ids)
+        return VectorBlock(
+            [self.ids[row] for row in keep] + list(ids),
+            np.vstack([self.matrix[keep].reshape(len(keep), vectors.shape[1]), vectors]),
+            [self.documents[row] for row in keep] + list(documents),
+            [self.metadatas[row] for row in keep] + list(metadatas)
+        )
+
+    def remove(self, ids: List[str]) -> 'VectorBlock':
+        """New block without the given IDs"""
+        keep = self._rows_without(ids)
+        return VectorBlock(
+            [self.ids[row] for row in keep],
+            self.matrix[keep],
+            [self.documents[row] for row in keep],
+            [self.metadatas[row] for row in keep],
+            dimension=self.dimension
+        )
+
+    def _rows_without(self, ids: List[str]) -> List[int]:
+        """Row indices not belonging to the given IDs"""
+        dropped = {self.positions[doc_id] for doc_id in ids if doc_id in self.positions}
+        return [row for row in range(len(self.ids)) if row not in dropped]
@@ -1,9 +1,53 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, NamedTuple, Tuple, Union
+from dataclasses import dataclass, field
 from models import Course, CourseChunk
-from sentence_transformers import SentenceTransformer
+from embeddings import EmbeddingProvider, create_embedding_provider
+from caching import LRUCache
+from batching import MicroBatcher, WorkerPool
+from course_resolver import CourseNameResolver
+from catalog_snapshot import CatalogSnapshot, ContentStats
+from lexical_index import BM25Index
+from locks import ReadWriteLock
+from search_backends import SearchBackend, ShardedBackend, SnapshotBackend, create_search_backend
+from vector_math import HNSW_PARAMETERS, compute_distances, hnsw_configuration
+from index_snapshot import export_snapshot
+from index_generations import (CATALOG_COLLECTION, CONTENT_COLLECTION, CollectionGenerationPointer,
+                               GenerationBuilder, GenerationPointer, building_generations, collection_names,
+                               collection_version, draining_generations, namespace_prefix, previous_generations,
+                               stored_generations, switch_times, touch_collection, validate_tenant_id)
+from context_expansion import merge_chunks
+from distance_cutoff import DistanceCutoff
+
+class ContentQuery(NamedTuple):
+    """One resolved content search (lexical_weight > 0 enables hybrid retrieval)"""
+    query: str
+    where: Optional[Dict]
+    limit: int
+    lexical_weight: float = 0.0
+    vector_weight: float = 1.0
+
+@dataclass
+class SearchRequest:
+    """One search in a search_many batch"""
+    query: str
+    course_name: Optional[str] = None
+    lesson_number: Optional[int] = None
+    limit: Optional[int] = None
+    lexical_weight: Optional[float] = None
+    vector_weight: Optional[float] = None
+    context_chunks: Optional[int] = None
+    course_names: Optional[List[str]] = None
+    lesson_from: Optional[int] = None
+    lesson_to: Optional[int] = None
 
 @dataclass
 class SearchResults:
@@ -12,14 +56,36 @@ class SearchResults:
     metadata: List[Dict[str, Any]]
     distances: List[float]
     error: Optional[str] = None
+    ids: List[str] = field(default_factory=list)
     
     @classmethod
-    def from_chroma(cls, chroma_results: Dict) -> 'SearchResults':
-        """Create SearchResults from ChromaDB query results"""
+    def from_chroma(cls, chroma_results: Dict, index: int = 0) -> 'SearchResults':
+        """Create SearchResults from one query (by index) of ChromaDB query results"""
         return cls(
-            documents=chroma_results['documents'][0] if chroma_results['documents'] else [],
-            metadata=chroma_results['metadatas'][0] if chroma_results['metadatas'] else [],
-            distances=chroma_results['distances'][0] if chroma_results['distances'] else []
+            documents=chroma_results['documents'][index] if chroma_results['documents'] else [],
+            metadata=chroma_results['metadatas'][index] if chroma_results['metadatas'] else [],
+            distances=chroma_results['distances'][index] if chroma_results['distances'] else [],
+            ids=chroma_results['ids'][index] if chroma_results.get('ids') else []
+        )
+
+    def truncate(self, limit: int) -> 'SearchResults':
+        """Keep only the first limit results"""
+        return SearchResults(
+            documents=self.documents[:limit],
+            metadata=self.metadata[:limit],
+            distances=self.distances[:limit],
+            error=self.error,
+            ids=self.ids[:limit]
+        )
+    
+    def select(self, positions: List[int]) -> 'SearchResults':
+        """Keep only the results at the given positions"""
+        return SearchResults(
+            documents=[self.documents[position] for position in positions],
+            metadata=[self.metadata[position] for position in positions],
+            distances=[self.distances[position] for position in positions],
+            error=self.error,
+            ids=[self.ids[position] for position in positions] if self.ids else []
         )
     
     @classmethod
@@ -34,35 +100,364 @@ class SearchResults:
 class VectorStore:
     """Vector storage using ChromaDB for course content and metadata"""
     
-    def __init__(self, chroma_path: str, embedding_model: str, max_results: int = 5):
+    def __init__(self, chroma_path: str, embedding_model: str, max_results: int = 5,
+                 embedding_cache_size: int = 1024,
+                 embedding_provider: Union[str, EmbeddingProvider] = "sentence-transformers",
+                 embedding_dimension: int = 384,
+                 embedding_server_socket: str = "/tmp/rag-embeddings.sock",
+                 search_batch_window_ms: float = 0.0,
+                 search_batch_max_size: int = 32,
+                 course_resolve_max_distance: Optional[float] = 1.5,
+                 hybrid_lexical_weight: float = 0.0,
+                 hybrid_vector_weight: float = 1.0,
+                 hybrid_candidates: int = 20,
+                 rrf_k: int = 60,
+                 search_backend: Union[str, type] = "chroma",
+                 search_backend_options: Optional[Dict[str, Any]] = None,
+                 search_cache_size: int = 0,
+                 search_cache_ttl_seconds: Optional[float] = 300.0,
+                 context_chunks: int = 0,
+                 async_workers: int = 8,
+                 hnsw_settings: Optional[Dict[str, Dict[str, Any]]] = None,
+                 chroma_server_url: Optional[str] = None,
+                 tenant_id: Optional[str] = None,
+                 max_distance: Optional[float] = None,
+                 max_distance_ratio: Optional[float] = None,
+                 distance_knee: bool = False,
+                 cutoff_min_results: int = 1,
+                 revalidate_seconds: Optional[float] = 1.0,
+                 generation_grace_seconds: float = 300.0,
+                 max_tenants: int = 64):
+        # Constructor arguments, reused to open tenant stores (see for_tenant)
+        self._settings = {name: value for name, value in locals().items() if name != "self"}
         self.max_results = max_results
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=chroma_path,
-            settings=Settings(anonymized_telemetry=False)
-        )
+        # Initialize ChromaDB client: embedded at chroma_path, or a Chroma server
+        # shared by every worker and host when chroma_server_url is set
+        self.chroma_server_url = chroma_server_url
+        self.client = self._connect(chroma_path, chroma_server_url)
         
-        # Set up sentence transformer embedding function
-        self.embedding_function = chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=embedding_model
+        # Set up the embedding provider (models load on first use)
+        self.embedding_function = create_embedding_provider(
+            embedding_provider,
+            model_name=embedding_model,
+            dimension=embedding_dimension,
+            socket_path=embedding_server_socket
         )
-        
-        # Create collections for different types of data
-        self.course_catalog = self._create_collection("course_catalog")  # Course titles/instructors
-        self.course_content = self._create_collection("course_content")  # Actual course material
-    
-    def _create_collection(self, name: str):
-        """Create or get a ChromaDB collection"""
-        return self.client.get_or_create_collection(
+
+        # Namespace of this store's collections (None = the default, unprefixed
+        # names); stores for other tenants are opened with for_tenant
+        self.tenant_id = validate_tenant_id(tenant_id) if tenant_id is not None else None
+        # Open tenant stores, least recently used first; beyond max_tenants the oldest is closed
+        self._tenants: "OrderedDict[str, VectorStore]" = OrderedDict()
+        self._tenants_lock = threading.Lock()
+        self.max_tenants = max_tenants
+        self._shares_threads = False  # Tenant stores run on their parent's pools
+
+        # HNSW parameters (see HNSW_PARAMETERS) keyed by collection, "course_catalog"
+        # or "course_content"; unset parameters keep Chroma's defaults
+        self.hnsw_settings = hnsw_settings or {}
+
+        # Create collections for different types of data, in the live index
+        # generation (see begin_generation)
+        self.generation_pointer = (CollectionGenerationPointer(self.client, self.tenant_id) if chroma_server_url
+                                   else GenerationPointer(chroma_path, self.tenant_id))
+        self.index_generation = self.generation_pointer.read()
+        self._index_generation_lock = threading.Lock()
+        catalog_name, content_name = collection_names(self.index_generation, self.tenant_id)
+        self.course_catalog = self._create_collection(catalog_name)  # Course titles/instructors
+        self.course_content = self._create_collection(content_name)  # Actual course material
+
+        # Writes through other processes (other workers, or other clients of a
+        # Chroma server) change the collections' version tokens; reads check
+        # them at most every revalidate_seconds and reload what changed (None disables)
+        self.revalidate_seconds = revalidate_seconds
+        self._revalidated_at = time.monotonic()
+        self._revalidate_lock = threading.Lock()
+        self._catalog_version = collection_version(self.course_catalog)
+        self._content_version = collection_version(self.course_content)
+        # Replaced index generations are dropped only after this long, so
+        # other processes have switched off them (see collect_generations)
+        self.generation_grace_seconds = generation_grace_seconds
+
+        # Engine answering content queries; Chroma remains the system of record
+        self.content_backend: SearchBackend = create_search_backend(
+            search_backend, self.course_content, client=self.client, **(search_backend_options or {})
+        )
+
+        # Readiness tracking for background warm-up
+        self._ready = threading.Event()
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self.warm_up_error: Optional[str] = None
+
+        # Query text -> embedding cache so repeated queries skip the model
+        self.query_embedding_cache = LRUCache(embedding_cache_size)
+
+        # Search results keyed on normalized arguments plus the corpus
+        # generation, which every write bumps (0 size disables)
+        self.corpus_generation = 0
+        self._generation_lock = threading.Lock()
+        self.search_result_cache = LRUCache(search_cache_size, ttl_seconds=search_cache_ttl_seconds)
+
+        # Searches hold this shared and course writes hold it exclusively, so a
+        # search never sees a course half written or half replaced
+        self._corpus_lock = ReadWriteLock()
+
+        # Neighbouring chunks merged into each hit by default (0 disables)
+        self.context_chunks = context_chunks
+
+        # Vector hits trimmed where their distances fall off (all rules off by default)
+        self.distance_cutoff = DistanceCutoff(max_distance=max_distance, max_ratio=max_distance_ratio,
+                                              knee=distance_knee, min_results=cutoff_min_results)
+
+        # Lexical course-name resolution with a cached vector fallback
+        self.course_resolve_max_distance = course_resolve_max_distance
+        self.catalog = self._load_catalog_snapshot()
+        self._content_stats: Optional[ContentStats] = None  # Loaded on first use
+        self._content_stats_lock = threading.Lock()
+        self.course_resolver = CourseNameResolver(self.catalog.titles())
+
+        # Concurrent content searches are collected for a few milliseconds and
+        # run as one batched embed + one Chroma query per filter (0 disables)
+        self.search_batcher: Optional[MicroBatcher] = None
+        if search_batch_window_ms > 0:
+            self.search_batcher = MicroBatcher(
+                self._run_content_queries,
+                max_wait_ms=search_batch_window_ms,
+                max_batch_size=search_batch_max_size,
+                name="search-batcher"
+            )
+
+        # Hybrid retrieval: BM25 over course content fused with vector hits by
+        # reciprocal rank fusion (a lexical weight of 0 keeps pure vector search)
+        self.hybrid_lexical_weight = hybrid_lexical_weight
+        self.hybrid_vector_weight = hybrid_vector_weight
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self._lexical_index: Optional[BM25Index] = None
+        self._lexical_index_lock = threading.Lock()
+        self._lexical_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lexical-search")
+
+        # Threads running the async facade (asearch etc.) off the event loop
+        self.async_pool = WorkerPool(async_workers, name="vector-store-async")
+
+    def for_tenant(self, tenant_id: Optional[str], create: bool = True) -> 'VectorStore':
+        """
+        Store for one tenant's catalog and content collections, opened on
+        first use. Tenant stores share this store's embedding model, Chroma
+        client and worker threads; collections, caches, statistics and index
+        generations are their own. None is the default namespace (this store).
+
+        Read paths pass create=False, so a tenant with no collections yet
+        raises LookupError instead of having them created. At most
+        max_tenants stores stay open; the least recently used is closed.
+        """
+        if tenant_id is None or tenant_id == self.tenant_id:
+            return self
+        evicted = None
+        with self._tenants_lock:
+            store = self._tenants.get(tenant_id)
+            if store is not None:
+                self._tenants.move_to_end(tenant_id)
+                return store
+            validate_tenant_id(tenant_id)
+            if not create and not stored_generations(self.client, tenant_id):
+                raise LookupError(f"Unknown tenant {tenant_id!r}")
+            options = self._settings["search_backend_options"] or {}
+            store = VectorStore(**{
+                **self._settings,
+                "tenant_id": tenant_id,
+                "embedding_provider": self.embedding_function,
+                # Offline index files are per tenant too
+                "search_backend_options": {key: self._tenant_path(value, tenant_id) if key.endswith("path")
+                                           else value for key, value in options.items()},
+            })
+            store.async_pool.close()
+            store.async_pool = self.async_pool
+            store._lexical_executor.shutdown()
+            store._lexical_executor = self._lexical_executor
+            store._shares_threads = True
+            self._tenants[tenant_id] = store
+            if len(self._tenants) > self.max_tenants:
+                _, evicted = self._tenants.popitem(last=False)
+        if evicted is not None:
+            evicted.close()
+        return store
+
+    def close(self):
+        """
+        Stop the background threads of this store and of the tenant stores
+        opened from it (a tenant store leaves the pools it shares running).
+        """
+        with self._tenants_lock:
+            tenants = list(self._tenants.values())
+            self._tenants.clear()
+        for store in tenants:
+            store.close()
+        if self.search_batcher is not None:
+            self.search_batcher.close()
+        self.content_backend.close()
+        if not self._shares_threads:
+            self.async_pool.close()
+            self._lexical_executor.shutdown(wait=False)
+
+    @staticmethod
+    def _tenant_path(path: str, tenant_id: str) -> str:
+        """A tenant's variant of a file or directory path: ./ivf_index -> ./ivf_index.acme"""
+        root, extension = os.path.splitext(path)
+        return f"{root}.{tenant_id}{extension}"
+
+    def tenant_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Course, chunk and cache statistics of this store and each tenant opened from it"""
+        with self._tenants_lock:
+            stores = [self] + list(self._tenants.values())
+        return {
+            store.tenant_id or "default": {
+                "courses": store.get_course_count(),
+                "chunks": store.get_chunk_count(),
+                "caches": store.cache_stats(),
+            }
+            for store in stores
+        }
+
+    @staticmethod
+    def _connect(chroma_path: str, server_url: Optional[str] = None):
+        """
+        Chroma client for the store. Over HTTP, one pooled session is shared
+        by every thread of the process; queries and writes always carry
+        embeddings computed here, so the server never runs a model.
+        """
+        settings = Settings(anonymized_telemetry=False)
+        if server_url:
+            parsed = urlparse(server_url)
+            if parsed.scheme not in ("http", "https") or not parsed.hostname:
+                raise ValueError(f"Chroma server URL must look like http://host:port, got '{server_url}'")
+            return chromadb.HttpClient(
+                host=parsed.hostname,
+                port=parsed.port or (443 if parsed.scheme == "https" else 8000),
+                ssl=parsed.scheme == "https",
+                settings=settings
+            )
+        return chromadb.PersistentClient(path=chroma_path, settings=settings)
+
+    def _create_collection(self, name: str, exclusive: bool = False,
+                           metadata: Optional[Dict[str, Any]] = None):
+        """
+        Create or get a ChromaDB collection, with the HNSW settings for its
+        kind. With exclusive=True an existing collection is an error, so
+        only one process can create a given name. metadata applies only
+        when the collection is created.
+        """
+        # Embeddings are always computed here and passed explicitly, so no
+        # provider is attached: Chroma would record its name and refuse to
+        # reopen the collection once EMBEDDING_PROVIDER changes
+        settings = self._hnsw_settings_for(name)
+        create = self.client.create_collection if exclusive else self.client.get_or_create_collection
+        collection = create(
             name=name,
-            embedding_function=self.embedding_function
+            embedding_function=None,
+            configuration={"hnsw": settings} if settings else None,
+            metadata=metadata
         )
+        if settings:
+            self._apply_hnsw_settings(collection, settings)
+        return collection
+
+    def _hnsw_settings_for(self, name: str) -> Dict[str, Any]:
+        """Configured HNSW parameters for a catalog or content collection of any generation"""
+        kind = CATALOG_COLLECTION if name[len(namespace_prefix(self.tenant_id)):].startswith(CATALOG_COLLECTION) \
+            else CONTENT_COLLECTION
+        settings = self.hnsw_settings.get(kind) or {}
+        unknown = set(settings) - set(HNSW_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown HNSW settings for {kind}: {', '.join(sorted(unknown))}")
+        return {key: value for key, value in settings.items() if value is not None}
+
+    def _apply_hnsw_settings(self, collection, settings: Dict[str, Any]):
+        """
+        Bring an existing collection in line with the configured settings.
+        Chroma keeps the parameters a collection was created with, so only
+        ef_search is updated in place; the others need a rebuilt index
+        (e.g. RAGSystem.reindex_folder, which creates new collections).
+        """
+        current = hnsw_configuration(collection)
+        ef_search = settings.get("ef_search")
+        if ef_search is not None and current.get("ef_search") != ef_search:
+            collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+        stale = [f"{key}={current.get(key)} (configured {value})" for key, value in settings.items()
+                 if key != "ef_search" and current.get(key) != value]
+        if stale:
+            print(f"Collection {collection.name} keeps {', '.join(stale)} until it is rebuilt")
     
-    def search(self, 
+    def warm_up(self) -> bool:
+        """
+        Load the embedding model and touch both collections so the first
+        real query does not pay cold-start costs.
+
+        Returns:
+            True if the store is ready to serve queries
+        """
+        try:
+            embedding = self.embedding_function.embed(["warm up"])[0]
+            self.course_catalog.count()
+            if self.course_content.count() > 0:
+                self.content_backend.query(query_embeddings=[embedding], n_results=1)
+            self.warm_up_error = None
+            self._ready.set()
+        except Exception as e:
+            self.warm_up_error = str(e)
+            print(f"Error warming up vector store: {e}")
+        return self._ready.is_set()
+
+    def start_warm_up(self) -> threading.Thread:
+        """Warm up the store on a background thread (idempotent)"""
+        if self._warm_up_thread is None or not self._warm_up_thread.is_alive():
+            self._warm_up_thread = threading.Thread(
+                target=self.warm_up, name="vector-store-warm-up", daemon=True
+            )
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def is_ready(self) -> bool:
+        """Whether the embedding model and collections have been warmed up"""
+        return self._ready.is_set()
+
+    @staticmethod
+    def _normalize_query(text: str) -> str:
+        """Normalize query text for embedding cache lookups"""
+        return " ".join(text.split())
+
+    def _embed_queries(self, texts: List[str]) -> List[Any]:
+        """
+        Embed query texts, serving repeats from the LRU cache and encoding
+        all misses in a single model call.
+        """
+        keys = [self._normalize_query(text) for text in texts]
+        embeddings = [self.query_embedding_cache.get(key) for key in keys]
+
+        missing = list(dict.fromkeys(key for key, emb in zip(keys, embeddings) if emb is None))
+        if missing:
+            computed = dict(zip(missing, self.embedding_function.embed(missing)))
+            for key, embedding in computed.items():
+                self.query_embedding_cache.put(key, embedding)
+            embeddings = [emb if emb is not None else computed[key]
+                          for key, emb in zip(keys, embeddings)]
+        return embeddings
+
+    def _embed_query(self, text: str) -> Any:
+        """Embed a single query text through the cache"""
+        return self._embed_queries([text])[0]
+
+    def search(self,
                query: str,
                course_name: Optional[str] = None,
                lesson_number: Optional[int] = None,
-               limit: Optional[int] = None) -> SearchResults:
+               limit: Optional[int] = None,
+               lexical_weight: Optional[float] = None,
+               vector_weight: Optional[float] = None,
+               context_chunks: Optional[int] = None,
+               course_names: Optional[List[str]] = None,
+               lesson_from: Optional[int] = None,
+               lesson_to: Optional[int] = None) -> SearchResults:
         """
         Main search interface that handles course resolution and content search.
         
@@ -71,74 +466,751 @@ class VectorStore:
             course_name: Optional course name/title to filter by
             lesson_number: Optional lesson number to filter by
             limit: Maximum results to return
+            lexical_weight: RRF weight of BM25 hits (0 disables hybrid retrieval)
+            vector_weight: RRF weight of vector hits
+            context_chunks: Neighbouring chunks (each side) merged into every hit
+            course_names: Several course names searched together (with course_name, if given)
+            lesson_from: First lesson of an inclusive lesson range
+            lesson_to: Last lesson of an inclusive lesson range
             
         Returns:
             SearchResults object with documents and metadata
         """
-        # Step 1: Resolve course name if provided
-        course_title = None
-        if course_name:
-            course_title = self._resolve_course_name(course_name)
-            if not course_title:
-                return SearchResults.empty(f"No course found matching '{course_name}'")
+        self.revalidate()
+        request = SearchRequest(query, course_name, lesson_number, limit, lexical_weight, vector_weight,
+                                context_chunks, course_names, lesson_from, lesson_to)
+        cache_key = self._search_cache_key(request)
+        cached = self.search_result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        with self._corpus_lock.read():
+            prepared = self._prepare_request(request)
+            if isinstance(prepared, SearchResults):
+                results = prepared
+            elif self.search_batcher is not None:
+                results = self.search_batcher.submit(prepared)
+            else:
+                results = self._run_content_queries([prepared])[0]
+            results = self._expand_context([results], [self._context_chunks(request)])[0]
+            self._cache_search_results(cache_key, results)
+        return results
+
+    def search_many(self, requests: List[Union[SearchRequest, Tuple]]) -> List[SearchResults]:
+        """
+        Run several searches together: course names are resolved once each,
+        queries are embedded in one call, and Chroma is queried once per
+        distinct filter.
+
+        Args:
+            requests: SearchRequest objects or (query, course_name, lesson_number, limit) tuples
+
+        Returns:
+            SearchResults for each request, in order
+        """
+        self.revalidate()
+        requests = [request if isinstance(request, SearchRequest) else SearchRequest(*request)
+                    for request in requests]
+        cache_keys = [self._search_cache_key(request) for request in requests]
+        prepared = [self.search_result_cache.get(key) for key in cache_keys]
+        if all(item is not None for item in prepared):
+            return prepared
+
+        with self._corpus_lock.read():
+            for position, request in enumerate(requests):
+                if prepared[position] is None:
+                    prepared[position] = self._prepare_request(request)
+                    if isinstance(prepared[position], SearchResults):
+                        self._cache_search_results(cache_keys[position], prepared[position])
+
+            pending = [position for position, item in enumerate(prepared) if not isinstance(item, SearchResults)]
+            if pending:
+                searched = self._run_content_queries([prepared[p] for p in pending])
+                searched = self._expand_context(searched, [self._context_chunks(requests[p]) for p in pending])
+                for position, results in zip(pending, searched):
+                    prepared[position] = results
+                    self._cache_search_results(cache_keys[position], results)
+        return prepared
+
+    async def asearch(self,
+                      query: str,
+                      course_name: Optional[str] = None,
+                      lesson_number: Optional[int] = None,
+                      limit: Optional[int] = None,
+                      lexical_weight: Optional[float] = None,
+                      vector_weight: Optional[float] = None,
+                      context_chunks: Optional[int] = None,
+                      course_names: Optional[List[str]] = None,
+                      lesson_from: Optional[int] = None,
+                      lesson_to: Optional[int] = None) -> SearchResults:
+        """
+        Async search: cached results are returned on the event loop, anything
+        else (including a due revalidation) runs on the async pool (same
+        arguments as search).
+        """
+        if not self._revalidation_due():
+            request = SearchRequest(query, course_name, lesson_number, limit, lexical_weight, vector_weight,
+                                    context_chunks, course_names, lesson_from, lesson_to)
+            # A miss is counted by the search it falls through to
+            cached = self.search_result_cache.get(self._search_cache_key(request), record_miss=False)
+            if cached is not None:
+                return cached
+        return await self.async_pool.run(self.search, query, course_name, lesson_number, limit,
+                                         lexical_weight, vector_weight, context_chunks,
+                                         course_names, lesson_from, lesson_to)
+
+    async def asearch_many(self, requests: List[Union[SearchRequest, Tuple]]) -> List[SearchResults]:
+        """Async search_many, run on the async pool"""
+        return await self.async_pool.run(self.search_many, requests)
+
+    async def aresolve_course_name(self, course_name: str) -> Optional[str]:
+        """Async course name resolution, run on the async pool"""
+        return await self.async_pool.run(self._resolve_course_name, course_name)
+
+    async def aget_catalog(self) -> List[Dict[str, Any]]:
+        """Async get_all_courses_metadata, run on the async pool"""
+        return await self.async_pool.run(self.get_all_courses_metadata)
+
+    def async_stats(self) -> Dict[str, Any]:
+        """Queue depth and wait times of the async pool"""
+        return self.async_pool.stats()
+
+    def _search_cache_key(self, request: SearchRequest) -> Tuple:
+        """Result cache key: normalized arguments plus the current corpus generation"""
+        return (
+            self.corpus_generation,
+            self._normalize_query(request.query),
+            tuple(" ".join(name.casefold().split()) for name in self._requested_courses(request)),
+            request.lesson_number,
+            request.lesson_from,
+            request.lesson_to,
+            request.limit if request.limit is not None else self.max_results,
+            self.hybrid_lexical_weight if request.lexical_weight is None else request.lexical_weight,
+            self.hybrid_vector_weight if request.vector_weight is None else request.vector_weight,
+            self._context_chunks(request),
+            self.distance_cutoff
+        )
+
+    @staticmethod
+    def _requested_courses(request: SearchRequest) -> List[str]:
+        """Course names a request filters by (course_name and course_names), deduplicated"""
+        names = ([request.course_name] if request.course_name else []) + list(request.course_names or [])
+        return list(dict.fromkeys(name for name in names if name))
+
+    def _context_chunks(self, request: SearchRequest) -> int:
+        """Neighbouring chunks to merge into each hit for a request"""
+        return self.context_chunks if request.context_chunks is None else request.context_chunks
+
+    @staticmethod
+    def _chunk_id(course_title: str, chunk_index: int) -> str:
+        """Content collection ID of a chunk"""
+        return f"{course_title.replace(' ', '_')}_{chunk_index}"
+
+    def _expand_context(self, results_list: List[SearchResults],
+                        context_chunks: List[int]) -> List[SearchResults]:
+        """
+        Replace each hit's text with the passage formed by it and up to N
+        chunks either side from the same lesson, overlap removed. Neighbours
+        are fetched by ID in one collection read: no embedding or vector
+        search is involved.
+        """
+        wanted = set()
+        for results, count in zip(results_list, context_chunks):
+            if count <= 0:
+                continue
+            for meta in results.metadata:
+                if meta.get("course_title") is None or meta.get("chunk_index") is None:
+                    continue
+                for offset in range(1, count + 1):
+                    if meta["chunk_index"] - offset >= 0:
+                        wanted.add(self._chunk_id(meta["course_title"], meta["chunk_index"] - offset))
+                    wanted.add(self._chunk_id(meta["course_title"], meta["chunk_index"] + offset))
+        if not wanted:
+            return results_list
+
+        try:
+            fetched = self.course_content.get(ids=sorted(wanted), include=["documents", "metadatas"])
+        except Exception as e:
+            print(f"Error fetching neighbouring chunks: {e}")
+            return results_list
+        neighbours = {
+            (meta.get("course_title"), meta.get("chunk_index")): (document, meta)
+            for document, meta in zip(fetched['documents'] or [], fetched['metadatas'] or [])
+        }
+
+        expanded = []
+        for results, count in zip(results_list, context_chunks):
+            if count <= 0 or results.is_empty():
+                expanded.append(results)
+                continue
+            expanded.append(SearchResults(
+                documents=[merge_chunks(self._context_window(document, meta, neighbours, count))
+                           for document, meta in zip(results.documents, results.metadata)],
+                metadata=results.metadata,
+                distances=results.distances,
+                error=results.error,
+                ids=results.ids
+            ))
+        return expanded
+
+    @staticmethod
+    def _context_window(document: str, meta: Dict[str, Any],
+                        neighbours: Dict[Tuple[str, int], Tuple[str, Dict[str, Any]]],
+                        count: int) -> List[str]:
+        """Texts of the contiguous same-lesson chunks around a hit, in order"""
+        title, index = meta.get("course_title"), meta.get("chunk_index")
+        if title is None or index is None:
+            return [document]
+        before, after = [], []
+        for step, window in ((-1, before), (1, after)):
+            for offset in range(1, count + 1):
+                neighbour = neighbours.get((title, index + step * offset))
+                if neighbour is None or neighbour[1].get("lesson_number") != meta.get("lesson_number"):
+                    break
+                window.append(neighbour[0])
+        return before[::-1] + [document] + after
+
+    def _cache_search_results(self, cache_key: Tuple, results: SearchResults):
+        """Cache deterministic outcomes (not transient search errors)"""
+        if results.error is None or results.error.startswith("No course found"):
+            self.search_result_cache.put(cache_key, results)
+
+    def _bump_generation(self):
+        """Mark the corpus as changed so earlier cached results are never served"""
+        with self._generation_lock:
+            self.corpus_generation += 1
+            self.search_result_cache.clear()
+
+    def _mark_written(self, catalog: bool = False, content: bool = False):
+        """
+        After a write (caller holds the write lock): give the written
+        collections new version tokens, so other processes reload them, and
+        drop this process's cached results.
+        """
+        try:
+            if catalog:
+                self._catalog_version = self._touch(self.course_catalog, self._catalog_version)
+            if content:
+                self._content_version = self._touch(self.course_content, self._content_version)
+        except Exception as e:
+            print(f"Error updating collection versions: {e}")
+        self._bump_generation()
+
+    def _touch(self, collection, seen: Optional[str]) -> Optional[str]:
+        """New version token for a collection written here, and the version to remember for it"""
+        current = collection_version(self.client.get_collection(collection.name))
+        token = touch_collection(collection)
+        # Someone else wrote since the last check: remember no version, so it is reloaded
+        return token if current == seen else None
+
+    def _revalidation_due(self) -> bool:
+        return (self.revalidate_seconds is not None
+                and time.monotonic() - self._revalidated_at >= self.revalidate_seconds)
+
+    def revalidate(self, force: bool = False) -> bool:
+        """
+        Pick up writes made through other processes. A new live index
+        generation is switched to (see sync_generation); otherwise, when a
+        collection's version token differs from the one this store last
+        saw, the catalog snapshot, or the content statistics, lexical index
+        and search backend, are reloaded and cached results dropped. Reads
+        call this; it checks Chroma at most every revalidate_seconds unless
+        forced.
+
+        Returns:
+            Whether anything was reloaded
+        """
+        if not (force or self._revalidation_due()):
+            return False
+        if not self._revalidate_lock.acquire(blocking=False):
+            return False  # Another thread is checking
+        try:
+            self._revalidated_at = time.monotonic()
+            try:
+                if self.sync_generation():
+                    return True
+                catalog = self.client.get_collection(self.course_catalog.name)
+                content = self.client.get_collection(self.course_content.name)
+            except Exception as e:
+                print(f"Error checking collection versions: {e}")
+                return False
+            catalog_changed = collection_version(catalog) != self._catalog_version
+            content_changed = collection_version(content) != self._content_version
+            if not (catalog_changed or content_changed):
+                return False
+            with self._corpus_lock.write():
+                self._reload(catalog=catalog if catalog_changed else None,
+                             content=content if content_changed else None)
+                self._bump_generation()
+            return True
+        finally:
+            self._revalidate_lock.release()
+
+    def _reload(self, catalog=None, content=None):
+        """
+        Adopt freshly fetched collections: drop the content statistics and
+        lexical index and rebind the search backend, or reload the catalog
+        snapshot (caller holds the write lock).
+        """
+        if content is not None:
+            self._content_version = collection_version(content)
+            self.course_content = content
+            self.content_backend.changed(content)
+            with self._content_stats_lock:
+                self._content_stats = None
+            with self._lexical_index_lock:
+                self._lexical_index = None
+        if catalog is not None:
+            self._catalog_version = collection_version(catalog)
+            self.course_catalog = catalog
+            self.catalog.load(self._catalog_records(catalog))
+            self.course_resolver.set_titles(self.catalog.titles())
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Size and hit-rate statistics for each cache"""
+        return {
+            "search_results": self.search_result_cache.stats(),
+            "query_embeddings": self.query_embedding_cache.stats(),
+            "course_names": self.course_resolver.cache.stats(),
+        }
+
+    def _prepare_request(self, request: SearchRequest) -> Union[ContentQuery, SearchResults]:
+        """
+        Turn a search request into a content query, or an error result if
+        its course name cannot be resolved.
+        """
+        # Step 1: Resolve course names if provided, all in one batch
+        course_titles = []
+        names = self._requested_courses(request)
+        if names:
+            resolved = self._resolve_course_names(names)
+            missing = [name for name in names if not resolved[name]]
+            if missing:
+                return SearchResults.empty(f"No course found matching {', '.join(repr(name) for name in missing)}")
+            course_titles = [resolved[name] for name in names]
         
         # Step 2: Build filter for content search
-        filter_dict = self._build_filter(course_title, lesson_number)
-        
-        # Step 3: Search course content
-        # Use provided limit or fall back to configured max_results
-        search_limit = limit if limit is not None else self.max_results
+        filter_dict = self._build_filter(course_titles, request.lesson_number, request.lesson_from,
+                                         request.lesson_to)
         
-        try:
-            results = self.course_content.query(
-                query_texts=[query],
-                n_results=search_limit,
-                where=filter_dict
+        # Step 3: Use provided limit or fall back to configured max_results
+        search_limit = request.limit if request.limit is not None else self.max_results
+        return ContentQuery(
+            request.query,
+            filter_dict,
+            search_limit,
+            self.hybrid_lexical_weight if request.lexical_weight is None else request.lexical_weight,
+            self.hybrid_vector_weight if request.vector_weight is None else request.vector_weight
+        )
+
+    def _run_content_queries(self, requests: List[ContentQuery]) -> List[SearchResults]:
+        """
+        Run several content searches with one embedding call and one backend
+        query per distinct filter. Hybrid requests also run BM25 on a
+        separate thread while Chroma is queried, and the two rankings are
+        fused with reciprocal rank fusion.
+
+        Args:
+            requests: ContentQuery (or (query, where filter, limit) tuples)
+
+        Returns:
+            SearchResults for each request, in order
+        """
+        requests = [ContentQuery(*request) for request in requests]
+
+        # Lexical retrieval runs concurrently with embedding and the vector queries
+        lexical_futures = {
+            position: self._lexical_executor.submit(
+                self._lexical_search, request.query, request.where, self._candidate_depth(request)
             )
-            return SearchResults.from_chroma(results)
+            for position, request in enumerate(requests)
+            if request.lexical_weight > 0
+        }
+
+        try:
+            embeddings = self._embed_queries([request.query for request in requests])
         except Exception as e:
-            return SearchResults.empty(f"Search error: {str(e)}")
-    
+            return [SearchResults.empty(f"Search error: {str(e)}") for _ in requests]
+
+        # Group request positions by filter
+        groups: Dict[str, List[int]] = {}
+        for position, request in enumerate(requests):
+            groups.setdefault(json.dumps(request.where, sort_keys=True), []).append(position)
+
+        results: List[Optional[SearchResults]] = [None] * len(requests)
+        for positions in groups.values():
+            filter_dict = requests[positions[0]].where
+            n_results = max(self._candidate_depth(requests[position]) for position in positions)
+            try:
+                chroma_results = self.content_backend.query(
+                    query_embeddings=[embeddings[position] for position in positions],
+                    n_results=n_results,
+                    where=filter_dict
+                )
+                for index, position in enumerate(positions):
+                    request = requests[position]
+                    vector_results = SearchResults.from_chroma(chroma_results, index)
+                    if position in lexical_futures:
+                        results[position] = self._apply_cutoff(self._fuse(
+                            request, embeddings[position], vector_results, lexical_futures[position].result()
+                        ))
+                    else:
+                        results[position] = self._apply_cutoff(vector_results.truncate(request.limit))
+            except Exception as e:
+                for position in positions:
+                    results[position] = SearchResults.empty(f"Search error: {str(e)}")
+        return results
+
+    def _apply_cutoff(self, results: SearchResults) -> SearchResults:
+        """
+        Drop hits the distance cutoff rejects. The cut is found on the
+        sorted distances and applied as a distance threshold, so fused
+        hybrid results keep their RRF order.
+        """
+        ordered = sorted(results.distances)
+        keep = self.distance_cutoff.count(ordered)
+        if keep == len(ordered):
+            return results
+        if keep == 0:
+            return results.select([])
+        threshold = ordered[keep - 1]
+        return results.select([position for position, distance in enumerate(results.distances)
+                               if distance <= threshold])
+
+    def _candidate_depth(self, request: ContentQuery) -> int:
+        """How many hits to retrieve per ranking before truncating to the limit"""
+        if request.lexical_weight > 0:
+            return max(request.limit, self.hybrid_candidates)
+        return request.limit
+
+    def _get_lexical_index(self) -> BM25Index:
+        """Build the BM25 index from the content collection on first use"""
+        if self._lexical_index is None:
+            with self._lexical_index_lock:
+                if self._lexical_index is None:
+                    index = BM25Index()
+                    results = self.course_content.get(include=["documents", "metadatas"])
+                    index.add(results['ids'], results['documents'] or [], results['metadatas'] or [])
+                    self._lexical_index = index
+        return self._lexical_index
+
+    def _lexical_search(self, query: str, where: Optional[Dict], limit: int) -> List[Tuple[str, float]]:
+        """BM25 hits for a query within the same filter as the vector search"""
+        return self._get_lexical_index().search(query, limit, where)
+
+    def _fuse(self, request: ContentQuery, embedding: Any, vector_results: SearchResults,
+              lexical_hits: List[Tuple[str, float]]) -> SearchResults:
+        """
+        Combine vector and lexical rankings with weighted reciprocal rank
+        fusion: score = sum of weight / (rrf_k + rank) over the rankings a
+        chunk appears in.
+        """
+        scores: Dict[str, float] = {}
+        rankings = [(request.vector_weight, vector_results.ids),
+                    (request.lexical_weight, [doc_id for doc_id, _ in lexical_hits])]
+        for weight, ranking in rankings:
+            if weight <= 0:
+                continue
+            for rank, doc_id in enumerate(ranking, start=1):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight / (self.rrf_k + rank)
+        ranked = sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)[:request.limit]
+
+        # Lexical-only hits still report a vector distance in the collection's space
+        found = {doc_id: (document, metadata, distance) for doc_id, document, metadata, distance
+                 in zip(vector_results.ids, vector_results.documents,
+                        vector_results.metadata, vector_results.distances)}
+        missing = [doc_id for doc_id in ranked if doc_id not in found]
+        if missing:
+            stored_ids, vectors = self.content_backend.get_embeddings(missing)
+            distances = compute_distances(self.content_backend.space, embedding, vectors)[0] if stored_ids else []
+            index = self._get_lexical_index()
+            for doc_id, distance in zip(stored_ids, distances):
+                document, metadata = index.get(doc_id)
+                found[doc_id] = (document, metadata, float(distance))
+
+        ranked = [doc_id for doc_id in ranked if doc_id in found]
+        return SearchResults(
+            documents=[found[doc_id][0] for doc_id in ranked],
+            metadata=[found[doc_id][1] for doc_id in ranked],
+            distances=[found[doc_id][2] for doc_id in ranked],
+            ids=ranked
+        )
+
+    def _load_catalog_snapshot(self) -> CatalogSnapshot:
+        """Read the whole catalog once into a parsed, indexed snapshot"""
+        try:
+            return CatalogSnapshot(self._catalog_records(self.course_catalog))
+        except Exception as e:
+            print(f"Error loading course catalog: {e}")
+            return CatalogSnapshot()
+
+    def _catalog_records(self, collection) -> List[Dict[str, Any]]:
+        """Catalog metadata records: from the index snapshot when it matches the collection, else from Chroma"""
+        if isinstance(self.content_backend, SnapshotBackend):
+            records = self.content_backend.catalog_records(collection)
+            if records is not None:
+                return records
+        return collection.get(include=["metadatas"])['metadatas'] or []
+
+    def _get_content_stats(self) -> ContentStats:
+        """Per-course chunk counts, read from the content metadata on first use"""
+        if self._content_stats is None:
+            with self._content_stats_lock:
+                if self._content_stats is None:
+                    try:
+                        stored = self.course_content.get(include=["metadatas"])
+                        self._content_stats = ContentStats(stored['ids'], stored['metadatas'] or [])
+                    except Exception as e:
+                        print(f"Error loading content statistics: {e}")
+                        return ContentStats()
+        return self._content_stats
+
     def _resolve_course_name(self, course_name: str) -> Optional[str]:
-        """Use vector search to find best matching course by name"""
+        """
+        Find the catalog title matching a user-supplied course name.
+
+        Lexical matching (exact, case-folded, prefix, containment, acronym,
+        trigram) is tried first; vector search is only used to break ties
+        between lexical candidates or when nothing matches lexically.
+        """
+        return self._resolve_course_names([course_name])[course_name]
+
+    def _resolve_course_names(self, course_names: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolve several course names at once (see _resolve_course_name):
+        names without a cached or lexical answer share one embedding call
+        and one catalog query per candidate set.
+        """
+        resolved: Dict[str, Optional[str]] = {}
+        pending = []
+        for course_name in dict.fromkeys(course_names):
+            found, title = self.course_resolver.cached(course_name)
+            if found:
+                resolved[course_name] = title
+                continue
+            version = self.course_resolver.version
+            title, candidates = self.course_resolver.match(course_name)
+            if title is None:
+                pending.append((course_name, candidates, version))
+            else:
+                self.course_resolver.remember(course_name, title, version)
+                resolved[course_name] = title
+
+        if pending:
+            titles = self._vector_resolve_course_names([name for name, _, _ in pending],
+                                                       [candidates for _, candidates, _ in pending])
+            for (course_name, _, version), title in zip(pending, titles):
+                self.course_resolver.remember(course_name, title, version)
+                resolved[course_name] = title
+        return resolved
+
+    def _vector_resolve_course_name(self, course_name: str,
+                                    candidates: List[str]) -> Optional[str]:
+        """Use vector search to find the best matching course, optionally among candidates"""
+        return self._vector_resolve_course_names([course_name], [candidates])[0]
+
+    def _vector_resolve_course_names(self, course_names: List[str],
+                                     candidates_list: List[List[str]]) -> List[Optional[str]]:
+        """Vector fallback for several names: one embedding call, one catalog query per candidate set"""
+        titles: List[Optional[str]] = [None] * len(course_names)
         try:
-            results = self.course_catalog.query(
-                query_texts=[course_name],
-                n_results=1
-            )
-            
-            if results['documents'][0] and results['metadatas'][0]:
-                # Return the title (which is now the ID)
-                return results['metadatas'][0][0]['title']
+            embeddings = self._embed_queries(course_names)
+            groups: Dict[Tuple[str, ...], List[int]] = {}
+            for position, candidates in enumerate(candidates_list):
+                groups.setdefault(tuple(candidates), []).append(position)
+            for candidates, positions in groups.items():
+                results = self.course_catalog.query(
+                    query_embeddings=[embeddings[position] for position in positions],
+                    n_results=1,
+                    where={"title": {"$in": list(candidates)}} if candidates else None
+                )
+                for index, position in enumerate(positions):
+                    if not (results['documents'][index] and results['metadatas'][index]):
+                        continue
+                    # Without lexical evidence, reject matches that are too far away
+                    distance = results['distances'][index][0]
+                    max_distance = self.course_resolve_max_distance
+                    if not candidates and max_distance is not None and distance > max_distance:
+                        continue
+                    # Return the title (which is now the ID)
+                    titles[position] = results['metadatas'][index][0]['title']
         except Exception as e:
             print(f"Error resolving course name: {e}")
-        
-        return None
+        return titles
     
-    def _build_filter(self, course_title: Optional[str], lesson_number: Optional[int]) -> Optional[Dict]:
-        """Build ChromaDB filter from search parameters"""
-        if not course_title and lesson_number is None:
+    def _build_filter(self, course_titles: Union[str, List[str], None], lesson_number: Optional[int],
+                      lesson_from: Optional[int] = None, lesson_to: Optional[int] = None) -> Optional[Dict]:
+        """
+        Build ChromaDB filter from search parameters: one course is an
+        equality, several an $in, and a lesson range $gte/$lte clauses
+        (Chroma takes one operator per field condition).
+        """
+        if isinstance(course_titles, str):
+            course_titles = [course_titles]
+        titles = list(dict.fromkeys(course_titles or []))
+        if lesson_from is not None and lesson_from == lesson_to and lesson_number is None:
+            lesson_number, lesson_from, lesson_to = lesson_from, None, None
+
+        clauses = []
+        if len(titles) == 1:
+            clauses.append({"course_title": titles[0]})
+        elif titles:
+            clauses.append({"course_title": {"$in": titles}})
+        if lesson_number is not None:
+            clauses.append({"lesson_number": lesson_number})
+        if lesson_from is not None:
+            clauses.append({"lesson_number": {"$gte": lesson_from}})
+        if lesson_to is not None:
+            clauses.append({"lesson_number": {"$lte": lesson_to}})
+
+        if not clauses:
             return None
-            
-        # Handle different filter combinations
-        if course_title and lesson_number is not None:
-            return {"$and": [
-                {"course_title": course_title},
-                {"lesson_number": lesson_number}
-            ]}
-        
-        if course_title:
-            return {"course_title": course_title}
-            
-        return {"lesson_number": lesson_number}
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
     
     def add_course_metadata(self, course: Course):
         """Add course information to the catalog for semantic search"""
-        import json
-
-        course_text = course.title
+        metadata = self._catalog_metadata(course)
+        embeddings = self.embedding_function.embed([course.title])
+        with self._corpus_lock.write():
+            self.course_catalog.add(
+                documents=[course.title],
+                embeddings=embeddings,
+                metadatas=[metadata],
+                ids=[course.title]
+            )
+            self.catalog.upsert_course(metadata)
+            self.course_resolver.add_title(course.title)
+            self._mark_written(catalog=True)
+    
+    def add_course_content(self, chunks: List[CourseChunk]):
+        """Add course content chunks to the vector store"""
+        if not chunks:
+            return
         
-        # Build lessons metadata and serialize as JSON string
+        ids, documents, metadatas = self._content_records(chunks)
+        embeddings = self.embedding_function.embed(documents)
+        with self._corpus_lock.write():
+            self.course_content.add(
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids
+            )
+            self._index_content(ids, embeddings, documents, metadatas)
+            self._mark_written(content=True)
+
+    def replace_course(self, course: Course, chunks: List[CourseChunk]):
+        """
+        Replace a course's catalog entry and all of its content chunks.
+
+        Embeddings are computed up front. The new chunks are upserted first
+        and only the old chunks they do not replace are deleted afterwards,
+        so other processes never see the course without chunks; searches
+        here are held off, so none sees a mix of the old and new versions.
+        If a write fails partway, this process reloads both collections
+        from Chroma and other processes are told to do the same.
+        """
+        strays = {chunk.course_title for chunk in chunks if chunk.course_title != course.title}
+        if strays:
+            raise ValueError(f"Chunks for {', '.join(sorted(strays))} passed to replace_course('{course.title}')")
+
+        metadata = self._catalog_metadata(course)
+        title_embeddings = self.embedding_function.embed([course.title])
+        ids, documents, metadatas = self._content_records(chunks)
+        embeddings = self.embedding_function.embed(documents) if documents else []
+        with self._corpus_lock.write():
+            written = False
+            try:
+                old_ids = self.course_content.get(where={"course_title": course.title}, include=[])['ids']
+                self.course_catalog.upsert(
+                    documents=[course.title],
+                    embeddings=title_embeddings,
+                    metadatas=[metadata],
+                    ids=[course.title]
+                )
+                for start in range(0, len(ids), self._write_batch_size()):
+                    end = start + self._write_batch_size()
+                    self.course_content.upsert(
+                        documents=documents[start:end],
+                        embeddings=embeddings[start:end],
+                        metadatas=metadatas[start:end],
+                        ids=ids[start:end]
+                    )
+                new_ids = set(ids)
+                stale = [doc_id for doc_id in old_ids if doc_id not in new_ids]
+                for start in range(0, len(stale), self._write_batch_size()):
+                    self.course_content.delete(ids=stale[start:start + self._write_batch_size()])
+                written = True
+            finally:
+                if written:
+                    self._replace_course_content(course.title, stale, ids, embeddings, documents, metadatas)
+                    self.catalog.upsert_course(metadata)
+                    self.course_resolver.add_title(course.title)
+                else:
+                    self._reload_collections()
+                self._mark_written(catalog=True, content=True)
+
+    def _replace_course_content(self, course_title: str, stale: List[str], ids: List[str], embeddings: Any,
+                                documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Mirror a course replacement into the search backend, stats and lexical index"""
+        if stale:
+            self.content_backend.removed(stale)
+        with self._content_stats_lock:
+            if self._content_stats is not None:
+                self._content_stats.remove_course(course_title)
+        with self._lexical_index_lock:
+            if self._lexical_index is not None:
+                self._lexical_index.remove(stale)
+        if ids:
+            self._index_content(ids, embeddings, documents, metadatas)
+
+    def _reload_collections(self):
+        """After a failed write: reload everything derived from both collections (caller holds the write lock)"""
+        try:
+            self._reload(catalog=self.client.get_collection(self.course_catalog.name),
+                         content=self.client.get_collection(self.course_content.name))
+        except Exception as e:
+            print(f"Error reloading collections: {e}")
+
+    def delete_course(self, course_title: str) -> bool:
+        """
+        Remove a course's catalog entry and content chunks.
+
+        Returns:
+            Whether anything was stored for the course
+        """
+        with self._corpus_lock.write():
+            removed = self._delete_course_content(course_title)
+            existed = course_title in self.catalog or removed > 0
+            self.course_catalog.delete(ids=[course_title])
+            self.catalog.remove_course(course_title)
+            self.course_resolver.remove_title(course_title)
+            self._mark_written(catalog=True, content=True)
+        return existed
+
+    def _delete_course_content(self, course_title: str) -> int:
+        """Delete a course's chunks by metadata filter (caller holds the write lock)"""
+        where = {"course_title": course_title}
+        ids = self.course_content.get(where=where, include=[])['ids']
+        if not ids:
+            return 0
+        self.course_content.delete(where=where)
+        self.content_backend.removed(ids)
+        with self._content_stats_lock:
+            if self._content_stats is not None:
+                self._content_stats.remove_course(course_title)
+        with self._lexical_index_lock:
+            if self._lexical_index is not None:
+                self._lexical_index.remove(ids)
+        return len(ids)
+
+    def _write_batch_size(self) -> int:
+        """Largest batch Chroma accepts in one write"""
+        return self.client.get_max_batch_size()
+
+    @staticmethod
+    def _catalog_metadata(course: Course) -> Dict[str, Any]:
+        """Catalog record for a course, lessons serialized as a JSON string"""
         lessons_metadata = []
         for lesson in course.lessons:
             lessons_metadata.append({
@@ -147,23 +1219,16 @@ class VectorStore:
                 "lesson_link": lesson.lesson_link
             })
         
-        self.course_catalog.add(
-            documents=[course_text],
-            metadatas=[{
-                "title": course.title,
-                "instructor": course.instructor,
-                "course_link": course.course_link,
-                "lessons_json": json.dumps(lessons_metadata),  # Serialize as JSON string
-                "lesson_count": len(course.lessons)
-            }],
-            ids=[course.title]
-        )
-    
-    def add_course_content(self, chunks: List[CourseChunk]):
-        """Add course content chunks to the vector store"""
-        if not chunks:
-            return
-        
+        return {
+            "title": course.title,
+            "instructor": course.instructor,
+            "course_link": course.course_link,
+            "lessons_json": json.dumps(lessons_metadata),  # Serialize as JSON string
+            "lesson_count": len(course.lessons)
+        }
+
+    def _content_records(self, chunks: List[CourseChunk]) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        """IDs, documents and metadata for content chunks"""
         documents = [chunk.content for chunk in chunks]
         metadatas = [{
             "course_title": chunk.course_title,
@@ -171,97 +1236,203 @@ class VectorStore:
             "chunk_index": chunk.chunk_index
         } for chunk in chunks]
         # Use title with chunk index for unique IDs
-        ids = [f"{chunk.course_title.replace(' ', '_')}_{chunk.chunk_index}" for chunk in chunks]
-        
-        self.course_content.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+        ids = [self._chunk_id(chunk.course_title, chunk.chunk_index) for chunk in chunks]
+        return ids, documents, metadatas
+
+    def _index_content(self, ids: List[str], embeddings: Any, documents: List[str],
+                       metadatas: List[Dict[str, Any]]):
+        """Mirror written chunks into the search backend, stats and lexical index"""
+        self.content_backend.added(ids, embeddings, documents, metadatas)
+        with self._content_stats_lock:
+            if self._content_stats is not None:
+                self._content_stats.add(ids, metadatas)
+        with self._lexical_index_lock:
+            if self._lexical_index is not None:
+                self._lexical_index.add(ids, documents, metadatas)
     
     def clear_all_data(self):
         """Clear all data from both collections"""
+        with self._corpus_lock.write():
+            self._clear_collections()
+            self._mark_written(catalog=True, content=True)
+
+    def _clear_collections(self):
+        """Drop and recreate both collections (caller holds the write lock)"""
         try:
-            self.client.delete_collection("course_catalog")
-            self.client.delete_collection("course_content")
+            catalog_name, content_name = self.course_catalog.name, self.course_content.name
+            self.client.delete_collection(catalog_name)
+            self.client.delete_collection(content_name)
             # Recreate collections
-            self.course_catalog = self._create_collection("course_catalog")
-            self.course_content = self._create_collection("course_content")
+            self.course_catalog = self._create_collection(catalog_name)
+            self.course_content = self._create_collection(content_name)
+            self._catalog_version = self._content_version = None
+            self.content_backend.cleared(self.course_content)
+            self.catalog.clear()
+            self.course_resolver.set_titles([])
+            with self._content_stats_lock:
+                self._content_stats = ContentStats()
+            with self._lexical_index_lock:
+                if self._lexical_index is not None:
+                    self._lexical_index.clear()
         except Exception as e:
             print(f"Error clearing data: {e}")
     
+    def begin_generation(self) -> GenerationBuilder:
+        """
+        Start building a new index generation (blue/green reindexing).
+
+        The builder writes to fresh, versioned catalog and content
+        collections while searches keep using the live ones; its commit()
+        validates the new generation and switches to it atomically.
+        """
+        with self._index_generation_lock:
+            generation = max(stored_generations(self.client, self.tenant_id) | {self.index_generation}) + 1
+            while True:
+                try:
+                    # Creating the content collection claims the number, across processes too
+                    return GenerationBuilder(self, generation)
+                except Exception:
+                    if generation not in stored_generations(self.client, self.tenant_id):
+                        raise
+                    generation += 1
+
+    def _switch_generation(self, generation: int, course_catalog, course_content, publish: bool = True):
+        """
+        Make a generation live (publish=False when another process already
+        wrote the pointer). Searches are held off for the switch, so none
+        sees a mix of generations, and none still reads the old one once
+        this returns.
+        """
+        catalog_records = course_catalog.get(include=["metadatas"])['metadatas'] or []
+        with self._corpus_lock.write():
+            if publish:
+                self.generation_pointer.write(generation)
+            self.index_generation = generation
+            self.course_catalog = course_catalog
+            self.course_content = course_content
+            self._catalog_version = collection_version(course_catalog)
+            self._content_version = collection_version(course_content)
+            self.content_backend.rebind(course_content)
+            self.catalog.load(catalog_records)
+            self.course_resolver.set_titles(self.catalog.titles())
+            with self._content_stats_lock:
+                self._content_stats = None
+            with self._lexical_index_lock:
+                self._lexical_index = None
+            self._bump_generation()
+
+    def sync_generation(self) -> bool:
+        """
+        Switch to the live generation if another process committed a new
+        one (reads call this through revalidate).
+
+        Returns:
+            Whether the store switched
+        """
+        generation = self.generation_pointer.read()
+        if generation == self.index_generation:
+            return False
+        catalog_name, content_name = collection_names(generation, self.tenant_id)
+        self._switch_generation(generation, self._create_collection(catalog_name),
+                                self._create_collection(content_name), publish=False)
+        return True
+
+    def collect_generations(self, keep_previous: int = 1) -> List[int]:
+        """
+        Drop generations older than the live one, keeping the newest
+        keep_previous of them, and any replaced less than
+        generation_grace_seconds ago, so other workers can drain onto the
+        new one. Builds in progress are never dropped, whatever their
+        number (their commit is refused if they are older than the live
+        generation).
+
+        Returns:
+            The dropped generations
+        """
+        with self._index_generation_lock:
+            building = building_generations(self.client, self.tenant_id)
+            older = previous_generations(stored_generations(self.client, self.tenant_id) - building,
+                                         self.index_generation, keep_previous)
+            draining = draining_generations(older, switch_times(self.generation_pointer.record()),
+                                            self.generation_grace_seconds)
+            stale = [generation for generation in older if generation not in draining]
+        for generation in stale:
+            self._drop_generation(generation)
+        return stale
+
+    def _drop_generation(self, generation: int):
+        """Delete a generation's collections, including any derived from them (e.g. shards)"""
+        catalog_name, content_name = collection_names(generation, self.tenant_id)
+        for collection in self.client.list_collections():
+            name = collection.name
+            if name in (catalog_name, content_name) or name.startswith(ShardedBackend.shard_prefix(content_name)):
+                try:
+                    self.client.delete_collection(name)
+                except Exception as e:
+                    print(f"Error dropping collection {name}: {e}")
+
+    def export_snapshot(self, path: str):
+        """
+        Export the content index and catalog as a read-only, memory-mapped
+        snapshot (see index_snapshot.IndexSnapshot). Writes wait until the
+        export has read the collections, so the snapshot is consistent.
+        """
+        with self._corpus_lock.read():
+            # Fresh handles, so the recorded versions are the collections' current ones
+            export_snapshot(self.client.get_collection(self.course_content.name),
+                            self.client.get_collection(self.course_catalog.name), path,
+                            space=self.content_backend.space,
+                            embedding_model=getattr(self.embedding_function, "model_name", None))
+
     def get_existing_course_titles(self) -> List[str]:
-        """Get all existing course titles from the vector store"""
-        try:
-            # Get all documents from the catalog
-            results = self.course_catalog.get()
-            if results and 'ids' in results:
-                return results['ids']
-            return []
-        except Exception as e:
-            print(f"Error getting existing course titles: {e}")
-            return []
+        """Get all existing course titles (served from the catalog snapshot)"""
+        self.revalidate()
+        return self.catalog.titles()
     
     def get_course_count(self) -> int:
-        """Get the total number of courses in the vector store"""
-        try:
-            results = self.course_catalog.get()
-            if results and 'ids' in results:
-                return len(results['ids'])
-            return 0
-        except Exception as e:
-            print(f"Error getting course count: {e}")
-            return 0
+        """Get the total number of courses (served from the catalog snapshot)"""
+        self.revalidate()
+        return len(self.catalog)
+
+    def get_chunk_count(self) -> int:
+        """Get the total number of content chunks"""
+        self.revalidate()
+        return self._get_content_stats().chunk_count()
+
+    def get_course_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get per-course counts without reading the collections: catalog
+        lessons, lessons with content, and content chunks.
+        """
+        self.revalidate()
+        stats = self._get_content_stats()
+        titles = self.catalog.titles()
+        titles += [title for title in stats.titles() if title not in self.catalog]
+        return {
+            title: {
+                "lesson_count": self.catalog.lesson_count(title) or stats.lesson_count(title),
+                "lessons_with_content": stats.lesson_count(title),
+                "chunk_count": stats.chunk_count(title),
+            }
+            for title in titles
+        }
     
     def get_all_courses_metadata(self) -> List[Dict[str, Any]]:
-        """Get metadata for all courses in the vector store"""
-        import json
-        try:
-            results = self.course_catalog.get()
-            if results and 'metadatas' in results:
-                # Parse lessons JSON for each course
-                parsed_metadata = []
-                for metadata in results['metadatas']:
-                    course_meta = metadata.copy()
-                    if 'lessons_json' in course_meta:
-                        course_meta['lessons'] = json.loads(course_meta['lessons_json'])
-                        del course_meta['lessons_json']  # Remove the JSON string version
-                    parsed_metadata.append(course_meta)
-                return parsed_metadata
-            return []
-        except Exception as e:
-            print(f"Error getting courses metadata: {e}")
-            return []
+        """Get metadata for all courses in the vector store (lessons parsed)"""
+        self.revalidate()
+        return self.catalog.all_courses()
+
+    def get_course_outline(self, course_title: str) -> Optional[Dict[str, Any]]:
+        """Get parsed metadata, including the lessons list, for one course"""
+        self.revalidate()
+        return self.catalog.course(course_title)
 
     def get_course_link(self, course_title: str) -> Optional[str]:
         """Get course link for a given course title"""
-        try:
-            # Get course by ID (title is the ID)
-            results = self.course_catalog.get(ids=[course_title])
-            if results and 'metadatas' in results and results['metadatas']:
-                metadata = results['metadatas'][0]
-                return metadata.get('course_link')
-            return None
-        except Exception as e:
-            print(f"Error getting course link: {e}")
-            return None
+        self.revalidate()
+        return self.catalog.course_link(course_title)
     
     def get_lesson_link(self, course_title: str, lesson_number: int) -> Optional[str]:
         """Get lesson link for a given course title and lesson number"""
-        import json
-        try:
-            # Get course by ID (title is the ID)
-            results = self.course_catalog.get(ids=[course_title])
-            if results and 'metadatas' in results and results['metadatas']:
-                metadata = results['metadatas'][0]
-                lessons_json = metadata.get('lessons_json')
-                if lessons_json:
-                    lessons = json.loads(lessons_json)
-                    # Find the lesson with matching number
-                    for lesson in lessons:
-                        if lesson.get('lesson_number') == lesson_number:
-                            return lesson.get('lesson_link')
-            return None
-        except Exception as e:
-            print(f"Error getting lesson link: {e}")
-    
\ No newline at end of file
+        self.revalidate()
+        return self.catalog.lesson_link(course_title, lesson_number)
@@ -0,0 +1,89 @@
+"""Index directories replaced atomically through a pointer file"""
+
+import os
+import shutil
+import time
+import uuid
+from typing import Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Names the live version subdirectory of a versioned directory
+POINTER_FILE = "CURRENT"
+
+
+def current_dir(path: str) -> Optional[str]:
+    """
+    Directory holding the live version of path: the subdirectory named by
+    its pointer file, path itself for a directory written before versions
+    existed (files directly inside, with a manifest.json), or None.
+    """
+    try:
+        with open(os.path.join(path, POINTER_FILE)) as f:
+            return os.path.join(path, f.read().strip())
+    except (FileNotFoundError, NotADirectoryError):
+        return path if os.path.exists(os.path.join(path, "manifest.json")) else None
+
+
+def open_current(path: str, load: Callable[[str], T], attempts: int = 3) -> Optional[T]:
+    """
+    Load the live version of path, or None if nothing was published. A
+    version removed while it was being opened is retried with the new one.
+    """
+    for attempt in range(attempts):
+        directory = current_dir(path)
+        if directory is None:
+            return None
+        try:
+            return load(directory)
+        except FileNotFoundError:
+            if attempt == attempts - 1:
+                raise
+    return None
+
+
+def publish(path: str, write: Callable[[str], None], keep_previous: int = 1,
+            legacy_files: Iterable[str] = ()) -> str:
+    """
+    Write a new version of path and make it live in one step.
+
+    write fills a fresh subdirectory; the pointer file is then replaced
+    (write + rename), so readers see the old version or the new one, never
+    a partial or missing one. The newest keep_previous older versions stay
+    for readers still opening them; processes with removed files memory-
+    mapped keep their pages until they unmap them.
+
+    legacy_files names the files a flat (pre-version) layout of path held;
+    they are removed once the new version is live. Any other file in path
+    is left alone, as path may be a directory shared with other data.
+
+    Returns:
+        The new version's directory
+    """
+    os.makedirs(path, exist_ok=True)
+    token = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+    staging = os.path.join(path, f"tmp-{token}")
+    version = f"v-{token}"
+    try:
+        os.makedirs(staging)
+        write(staging)
+        os.rename(staging, os.path.join(path, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer_staging = os.path.join(path, f"{POINTER_FILE}.tmp-{token}")
+    with open(pointer_staging, "w") as f:
+        f.write(version)
+    os.replace(pointer_staging, os.path.join(path, POINTER_FILE))
+
+    # Versions are named in time order; drop all but the newest few older ones
+    older = sorted(name for name in os.listdir(path) if name.startswith("v-") and name < version)
+    for name in older[:max(len(older) - keep_previous, 0)]:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    # Files of the flat layout that predates versions
+    for name in legacy_files:
+        full_path = os.path.join(path, name)
+        if os.path.isfile(full_path):
+            os.remove(full_path)
+    return os.path.join(path, version)